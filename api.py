@@ -1,8 +1,17 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from project_quoter import ProjectQuoter
+from jobs import InvalidCallbackUrl, JobManager, JobQueueFull, SqliteJobStore
+from util import metrics
+from util.http_cache import QuoteCache
+from util.timing import NULL_TIMINGS, StageTimings
+from window_quoter.pricing_catalog import PricingCatalog
 from flask_cors import CORS
+from typing import Dict, Optional, Tuple
+import json
 import os
 import logging
+import threading
+import time
 
 logging.basicConfig(
     level=logging.INFO,
@@ -11,8 +20,197 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
-CORS(app, origins="*")
+# The front end reads ETag to send If-None-Match when it resubmits a project
+CORS(app, origins="*", expose_headers=["ETag"])
 app.json.sort_keys = False
+
+# Quoters are created once per worker process and shared by every request, so the OpenAI
+# client, its keep-alive connections and the formatted prompts are built only once
+_project_quoters = {}
+_project_quoters_lock = threading.Lock()
+
+
+# QUOTE_TIMINGS=1 collects stage timings for every request, not just those asking with ?timings=1
+TIMINGS_ALWAYS = os.environ.get("QUOTE_TIMINGS", "") == "1"
+
+# LLM_OUTPUT_FORMAT=json constrains model output to a JSON schema (structured output) instead of YAML text
+OUTPUT_FORMAT = os.environ.get("LLM_OUTPUT_FORMAT", "yaml")
+
+# QUOTE_PIPELINE=single_call splits and configures a project's windows in one model call (see ProjectQuoter)
+PIPELINE = os.environ.get("QUOTE_PIPELINE", "per_window")
+
+
+# Repeat /quote_project requests are answered from this worker's QuoteCache for
+# QUOTE_CACHE_TTL_SECONDS (0 turns the cache off), or with 304 when If-None-Match matches
+_quote_cache = None
+_quote_cache_lock = threading.Lock()
+
+
+def get_quote_cache():
+    global _quote_cache
+    if _quote_cache is None:
+        with _quote_cache_lock:
+            if _quote_cache is None:
+                _quote_cache = QuoteCache(max_entries=int(os.environ.get("QUOTE_CACHE_MAX_ENTRIES", 256)),
+                                          ttl_seconds=float(os.environ.get("QUOTE_CACHE_TTL_SECONDS", 600)))
+    return _quote_cache
+
+
+def quote_etag(project_dict, project_quoter):
+    """Strong ETag for quoting project_dict with project_quoter at the current pricing version"""
+    pricing_version = PricingCatalog.get_catalog(project_quoter.pricing_config_path).version
+    return QuoteCache.make_etag(project_dict, pricing_version, project_quoter.model_name,
+                                f"{project_quoter.pipeline}/{project_quoter.output_format}")
+
+
+def get_timings():
+    """StageTimings if this request asked for timings (?timings=1), otherwise the no-op NULL_TIMINGS"""
+    return timings_for(request.args.get("timings", ""))
+
+
+def timings_for(timings_arg: str):
+    """StageTimings if the ?timings= query argument (or QUOTE_TIMINGS=1) asks for them, otherwise NULL_TIMINGS"""
+    if TIMINGS_ALWAYS or timings_arg.lower() in ("1", "true", "yes"):
+        return StageTimings()
+    return NULL_TIMINGS
+
+
+# The request handling below is shared by this app and the ASGI app in asgi.py. Responses are
+# (body, status, headers) tuples, which Flask views can return as they are.
+
+def json_response(body, status: int = 200, headers: Optional[Dict[str, str]] = None) -> Tuple[bytes, int, Dict[str, str]]:
+    """body encoded as jsonify encodes it in this app (compact, keys in order), so both apps send the same bytes"""
+    return ((json.dumps(body, separators=(",", ":")) + "\n").encode("utf-8"), status,
+            {'Content-Type': 'application/json', **(headers or {})})
+
+
+def cached_quote(project_dict: Dict, project_quoter: ProjectQuoter, timings,
+                 if_none_match: Optional[str]) -> Tuple[Optional[str], Optional[Tuple]]:
+    """
+    (etag, response) for a /quote_project request, response being the cached quote or a 304
+    to send instead of quoting, or None. Requests with timings bypass the cache (etag None).
+    """
+    if timings.enabled:
+        return None, None
+    etag = quote_etag(project_dict, project_quoter)
+    result, cached = get_quote_cache().lookup(etag, if_none_match)
+    if result == "not_modified":
+        return etag, (b"", 304, {'ETag': etag})
+    if cached is not None:
+        return etag, (cached, 200, {'Content-Type': 'application/json', 'ETag': etag, 'X-Quote-Cache': 'hit'})
+    return etag, None
+
+
+def quote_response(project_name: str, price_breakdown: Dict, etag: Optional[str], stats: Dict, timings) -> Tuple:
+    """The /quote_project response for a finished quote, stored in the quote cache if every window was priced"""
+    logger.debug(f"price_breakdown: {price_breakdown}")
+    response_body = {
+        "project_name": project_name,
+        "price_breakdown": price_breakdown
+    }
+    headers = {}
+    if timings.enabled:
+        response_body["timings"] = timings.as_dict()
+        headers['Server-Timing'] = timings.server_timing()
+    if "pre_llm_ms" in stats:
+        logger.info(f"Pre-LLM overhead: {stats['pre_llm_ms']:.2f}ms")
+        headers['X-Pre-LLM-Ms'] = f"{stats['pre_llm_ms']:.2f}"
+    if etag is not None and QuoteCache.cacheable(price_breakdown):
+        headers.update({'ETag': etag, 'X-Quote-Cache': 'miss'})
+    body, status, headers = json_response(response_body, headers=headers)
+    if 'ETag' in headers:
+        get_quote_cache().set(etag, body)
+    return body, status, headers
+
+
+def stream_line(event: Dict, project_name: str, timings) -> str:
+    """One /quote_project/stream line; the final totals or error event carries the project name"""
+    if event["event"] in ("totals", "error"):
+        event = {"event": event["event"], "project_name": project_name, "price_breakdown": event["price_breakdown"]}
+        if timings.enabled:
+            event["timings"] = timings.as_dict()
+    return json.dumps(event) + "\n"
+
+
+# Ask reverse proxies not to buffer the stream
+STREAM_HEADERS = {'X-Accel-Buffering': 'no', 'Cache-Control': 'no-cache'}
+
+
+def submit_quote_job(project_dict: Dict, project_quoter: ProjectQuoter) -> Tuple:
+    """
+    The POST /jobs response. Checking the callback URL resolves its host and the job is
+    written to the job store, so this blocks; asgi.py runs it on a worker thread.
+    """
+    project_name = project_dict['project_name']
+    callback_url = project_dict.pop('callback_url', None)
+    try:
+        job = get_job_manager().submit(lambda: project_quoter.stream_project(project_dict),
+                                       project_name=project_name, callback_url=callback_url)
+    except InvalidCallbackUrl as e:
+        return json_response({"error": str(e)}, 400)
+    except JobQueueFull as e:
+        return json_response({"error": str(e)}, 503, headers={'Retry-After': '30'})
+    status_url = f"/jobs/{job['id']}"
+    return json_response({"job_id": job["id"], "status": job["status"], "status_url": status_url}, 202,
+                         headers={'Location': status_url})
+
+
+# Background quote jobs (POST /jobs). JOBS_DB_PATH keeps job state in SQLite so any worker
+# process on the node can answer GET /jobs/<id>; by default it is in this process's memory.
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """Return this worker's JobManager, configured from the JOBS_* environment variables"""
+    global _job_manager
+    if _job_manager is None:
+        with _job_manager_lock:
+            if _job_manager is None:
+                db_path = os.environ.get("JOBS_DB_PATH")
+                allowed_hosts = os.environ.get("JOBS_CALLBACK_HOSTS")
+                _job_manager = JobManager(
+                    max_workers=int(os.environ.get("JOBS_MAX_WORKERS", 4)),
+                    max_pending=int(os.environ.get("JOBS_MAX_PENDING", 100)),
+                    store=SqliteJobStore(db_path) if db_path else None,
+                    ttl_seconds=float(os.environ.get("JOBS_TTL_SECONDS", 3600)),
+                    allowed_callback_hosts=allowed_hosts.split(",") if allowed_hosts else None,
+                    callback_workers=int(os.environ.get("JOBS_CALLBACK_WORKERS", 2)))
+    return _job_manager
+
+
+def get_project_quoter(model_name):
+    """Return this worker's ProjectQuoter for model_name"""
+    project_quoter = _project_quoters.get(model_name)
+    if project_quoter is None:
+        with _project_quoters_lock:
+            project_quoter = _project_quoters.setdefault(
+                model_name, ProjectQuoter(model_name, output_format=OUTPUT_FORMAT, pipeline=PIPELINE))
+    return project_quoter
+
+@app.before_request
+def start_request_metrics():
+    if request.path == '/metrics':
+        return
+    g.metrics_start = time.perf_counter()
+    g.metrics_endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.REQUESTS_IN_FLIGHT.labels(g.metrics_endpoint).inc()
+
+@app.after_request
+def record_response_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    # Runs once the response has been sent, so streamed responses are timed to their last byte
+    if 'metrics_start' not in g:
+        return
+    metrics.REQUESTS_IN_FLIGHT.labels(g.metrics_endpoint).dec()
+    status = 500 if exc is not None else g.get('metrics_status', 500)
+    metrics.REQUEST_LATENCY.labels(g.metrics_endpoint, request.method, str(status)).observe(
+        time.perf_counter() - g.metrics_start)
+
 @app.route('/quote_project', methods=['POST'])
 def quote_project():
     """
@@ -49,7 +247,17 @@ def quote_project():
         "project_name": "My Project", 
         "price_breakdown": {...}
     }
+
+    The X-Pre-LLM-Ms response header reports the time spent handling the request before the
+    first model call. With ?timings=1 the response also has a Server-Timing header and a
+    "timings" section with per-stage and per-window latencies and retry counts.
+
+    Quotes where every window was priced carry a strong ETag over the request body, pricing
+    version and model. A resubmission is answered from the worker's cache (X-Quote-Cache: hit),
+    or with 304 Not Modified if its If-None-Match matches. Requests with ?timings=1 bypass the cache.
     """
+    stats = {"request_start": time.perf_counter()}
+    timings = get_timings()
     project_dict = request.get_json()
 
     project_name = project_dict['project_name']
@@ -57,16 +265,92 @@ def quote_project():
     # Default model for now - could be configurable later
     model_name = "gpt-4.1"
     
-    # Create project quoter and get quote
-    project_quoter = ProjectQuoter(model_name)
-    total_cost, price_breakdown = project_quoter.quote_project(project_dict)
-    logger.debug(f"price_breakdown: {price_breakdown}")
-    json_response = jsonify({
-        "project_name": project_name,
-        "price_breakdown": price_breakdown
-    })
-    logger.debug(f"json_response: {json_response}")
-    return json_response
+    # Get quote from this worker's shared project quoter
+    project_quoter = get_project_quoter(model_name)
+    etag, cached = cached_quote(project_dict, project_quoter, timings, request.headers.get('If-None-Match'))
+    if cached is not None:
+        return cached
+
+    total_cost, price_breakdown = project_quoter.quote_project(project_dict, stats=stats, timings=timings)
+    return quote_response(project_name, price_breakdown, etag, stats, timings)
+
+@app.route('/quote_project/stream', methods=['POST'])
+def quote_project_stream():
+    """
+    Quote a window project, streaming results as newline-delimited JSON (NDJSON).
+
+    Takes the same JSON body as /quote_project. Each line is one event:
+        {"event": "windows", "windows": {...}}                   # window list from the description parser
+        {"event": "window", "window": "Window 1", "quote": {...}} # one per window, as soon as it is priced
+        {"event": "window_failed", "window": "Window 2", "error": "..."}
+        {"event": "totals", "project_name": "My Project", "price_breakdown": {...}}  # same breakdown as /quote_project
+    or a single {"event": "error", "project_name": ..., "price_breakdown": {"Error": ...}} if the
+    descriptions could not be separated into windows. With ?timings=1 the last event also has
+    a "timings" section.
+    """
+    stats = {"request_start": time.perf_counter()}
+    timings = get_timings()
+    project_dict = request.get_json()
+
+    project_name = project_dict['project_name']
+
+    # Default model for now - could be configurable later
+    model_name = "gpt-4.1"
+
+    project_quoter = get_project_quoter(model_name)
+
+    def generate():
+        for event in project_quoter.stream_project(project_dict, stats=stats, timings=timings):
+            yield stream_line(event, project_name, timings)
+        if "pre_llm_ms" in stats:
+            logger.info(f"Pre-LLM overhead: {stats['pre_llm_ms']:.2f}ms")
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson', headers=STREAM_HEADERS)
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue a project quote and return at once, instead of holding the connection for the
+    whole quote. Takes the /quote_project body plus an optional "callback_url", which is
+    POSTed the finished job as JSON.
+
+    Returns 202 with {"job_id", "status", "status_url"} and a Location header; 503 with
+    Retry-After when the job queue is full; 400 for an unusable callback_url.
+    """
+    project_dict = request.get_json()
+
+    # Default model for now - could be configurable later
+    model_name = "gpt-4.1"
+    return submit_quote_job(project_dict, get_project_quoter(model_name))
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    A quote job's state:
+    {
+        "id": "...",
+        "status": "queued" | "running" | "succeeded" | "failed",
+        "project_name": "My Project",
+        "progress": {"windows_done": 2, "windows_total": 5},
+        "result": {"total_cost": ..., "price_breakdown": {...}},  # once finished, as from /quote_project
+        "error": "...",                                           # failed jobs only
+        "callback": {"url": ..., "status": "pending" | "delivered" | "failed", "attempts": 1},
+        "created_at": ..., "started_at": ..., "finished_at": ...
+    }
+    Finished jobs are kept for JOBS_TTL_SECONDS (default an hour), then 404.
+    """
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({"error": f"No job '{job_id}'"}), 404
+    return jsonify(job)
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus metrics, summed over all workers when PROMETHEUS_MULTIPROC_DIR is set"""
+    body, content_type = metrics.render()
+    if body is None:
+        return jsonify({"error": "prometheus_client is not installed"}), 501
+    return Response(body, content_type=content_type)
 
 @app.route('/test', methods=['GET'])
 def test():
@@ -0,0 +1,288 @@
+"""
+Async (ASGI) serving path for the quote API.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8000
+
+Serves the same endpoints and response bodies as the Flask app in api.py. On /quote_project
+and /quote_project/stream every model call is awaited (ProjectQuoter.astream_project), so a
+quote waiting on the model holds no thread and one worker can serve hundreds of quotes at
+once. Background jobs still run on the JobManager's thread pool, as in api.py, and share its
+quoters and job store.
+
+The app is written against the ASGI interface directly rather than a framework; it has
+only a handful of routes. The request handling itself (quote cache and ETags, response
+bodies, stream events, job submission) is shared with api.py; blocking parts of it, like
+resolving a job's callback host, run on worker threads.
+"""
+import asyncio
+import json
+import logging
+import re
+import time
+import traceback
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from api import (STREAM_HEADERS, cached_quote, get_job_manager, get_project_quoter, json_response, quote_response,
+                 stream_line, submit_quote_job, timings_for)
+from util import metrics
+
+logger = logging.getLogger(__name__)
+
+# Default model for now - could be configurable later
+MODEL_NAME = "gpt-4.1"
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Request:
+    def __init__(self, scope: Dict, body: bytes):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        self.headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]}
+        self.body = body
+        self.path_params = {}
+
+    def get_json(self) -> Dict:
+        try:
+            data = json.loads(self.body)
+        except ValueError as e:
+            raise HTTPError(400, f"Failed to decode JSON object: {e}")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Expected a JSON object")
+        return data
+
+
+class Response:
+    def __init__(self, body: bytes = b"", status: int = 200, content_type: str = "application/json",
+                 headers: Optional[Dict[str, str]] = None):
+        self.body = body
+        self.status = status
+        self.headers = {"content-type": content_type, **(headers or {})} if content_type else dict(headers or {})
+
+    def raw_headers(self) -> List[Tuple[bytes, bytes]]:
+        return [(name.lower().encode("latin-1"), str(value).encode("latin-1")) for name, value in self.headers.items()]
+
+    @classmethod
+    def from_tuple(cls, response: Tuple[bytes, int, Dict[str, str]]) -> "Response":
+        """A Response from the (body, status, headers) tuples api.py's shared handlers return"""
+        body, status, headers = response
+        return cls(body, status, content_type=None, headers=headers)
+
+    async def send(self, send, receive):
+        if self.status != 304:
+            self.headers["content-length"] = str(len(self.body))
+        await send({"type": "http.response.start", "status": self.status, "headers": self.raw_headers()})
+        await send({"type": "http.response.body", "body": self.body})
+
+
+class StreamingResponse(Response):
+    """Sends each chunk of an async iterator as soon as it is produced"""
+
+    def __init__(self, chunks: AsyncIterator[bytes], status: int = 200, content_type: str = "application/x-ndjson",
+                 headers: Optional[Dict[str, str]] = None):
+        super().__init__(b"", status, content_type, headers)
+        self.chunks = chunks
+
+    async def send(self, send, receive):
+        # Stop generating (and calling the model) as soon as the client goes away
+        disconnected = asyncio.Event()
+
+        async def watch_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+        watcher = asyncio.ensure_future(watch_disconnect())
+        try:
+            await send({"type": "http.response.start", "status": self.status, "headers": self.raw_headers()})
+            async for chunk in self.chunks:
+                if disconnected.is_set():
+                    logger.info("Client disconnected, stopping the stream")
+                    break
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            watcher.cancel()
+            await self.chunks.aclose()
+
+
+def jsonify(body, status: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """JSON encoded exactly as Flask's jsonify in api.py encodes it, so both apps return identical bodies"""
+    return Response.from_tuple(json_response(body, status, headers))
+
+
+def get_timings(request: Request):
+    """StageTimings if this request asked for timings (?timings=1), otherwise the no-op NULL_TIMINGS"""
+    return timings_for(request.query.get("timings", [""])[0])
+
+
+async def quote_project(request: Request) -> Response:
+    """Async /quote_project; see api.quote_project for the request and response format"""
+    stats = {"request_start": time.perf_counter()}
+    timings = get_timings(request)
+    project_dict = request.get_json()
+    project_name = project_dict['project_name']
+
+    project_quoter = get_project_quoter(MODEL_NAME)
+    etag, cached = cached_quote(project_dict, project_quoter, timings, request.headers.get('if-none-match'))
+    if cached is not None:
+        return Response.from_tuple(cached)
+
+    total_cost, price_breakdown = await project_quoter.aquote_project(project_dict, stats=stats, timings=timings)
+    return Response.from_tuple(quote_response(project_name, price_breakdown, etag, stats, timings))
+
+
+async def quote_project_stream(request: Request) -> Response:
+    """Async /quote_project/stream; see api.quote_project_stream for the event format"""
+    stats = {"request_start": time.perf_counter()}
+    timings = get_timings(request)
+    project_dict = request.get_json()
+    project_name = project_dict['project_name']
+    project_quoter = get_project_quoter(MODEL_NAME)
+
+    async def generate():
+        events = project_quoter.astream_project(project_dict, stats=stats, timings=timings)
+        try:
+            async for event in events:
+                yield stream_line(event, project_name, timings).encode("utf-8")
+        finally:
+            await events.aclose()
+        if "pre_llm_ms" in stats:
+            logger.info(f"Pre-LLM overhead: {stats['pre_llm_ms']:.2f}ms")
+
+    return StreamingResponse(generate(), headers=STREAM_HEADERS)
+
+
+async def submit_job(request: Request) -> Response:
+    """POST /jobs; see api.submit_job. Jobs run on the JobManager's threads, not the event loop"""
+    project_dict = request.get_json()
+    project_quoter = get_project_quoter(MODEL_NAME)
+    # Submitting resolves the callback host (DNS) and writes the job store, both blocking
+    return Response.from_tuple(await asyncio.to_thread(submit_quote_job, project_dict, project_quoter))
+
+
+async def get_job(request: Request) -> Response:
+    """GET /jobs/<job_id>; see api.get_job"""
+    job_id = request.path_params["job_id"]
+    # The job store may be SQLite
+    job = await asyncio.to_thread(get_job_manager().get, job_id)
+    if job is None:
+        return jsonify({"error": f"No job '{job_id}'"}, 404)
+    return jsonify(job)
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    body, content_type = metrics.render()
+    if body is None:
+        return jsonify({"error": "prometheus_client is not installed"}, 501)
+    return Response(body, content_type=content_type)
+
+
+async def test(request: Request) -> Response:
+    return jsonify({"status": "working", "message": "GET request successful"},
+                   headers={'Access-Control-Allow-Origin': '*'})
+
+
+# (rule, pattern, {method: handler}); rules are the metrics endpoint labels, as in api.py
+ROUTES = [
+    ("/quote_project", re.compile(r"/quote_project"), {"POST": quote_project}),
+    ("/quote_project/stream", re.compile(r"/quote_project/stream"), {"POST": quote_project_stream}),
+    ("/jobs", re.compile(r"/jobs"), {"POST": submit_job}),
+    ("/jobs/<job_id>", re.compile(r"/jobs/(?P<job_id>[^/]+)"), {"GET": get_job}),
+    ("/metrics", re.compile(r"/metrics"), {"GET": metrics_endpoint}),
+    ("/test", re.compile(r"/test"), {"GET": test}),
+]
+
+
+def match_route(path: str):
+    """(rule, handlers, path params) for path, or (None, None, None)"""
+    for rule, pattern, handlers in ROUTES:
+        match = pattern.fullmatch(path)
+        if match:
+            return rule, handlers, match.groupdict()
+    return None, None, None
+
+
+def cors_headers(request: Request, handlers: Dict) -> Dict[str, str]:
+    """Any origin is allowed, as with CORS(app, origins="*") in api.py"""
+    if "origin" not in request.headers:
+        return {}
+    headers = {"Access-Control-Allow-Origin": "*", "Access-Control-Expose-Headers": "ETag"}
+    if request.method == "OPTIONS":
+        headers["Access-Control-Allow-Methods"] = ", ".join(sorted(handlers))
+        if "access-control-request-headers" in request.headers:
+            headers["Access-Control-Allow-Headers"] = request.headers["access-control-request-headers"]
+    return headers
+
+
+async def handle(request: Request, rule: Optional[str], handlers: Optional[Dict]) -> Response:
+    if handlers is None:
+        return jsonify({"error": "Not Found"}, 404)
+    if request.method == "OPTIONS":
+        return Response(status=200, content_type="text/html; charset=utf-8")
+    handler = handlers.get(request.method)
+    if handler is None:
+        return jsonify({"error": "Method Not Allowed"}, 405, headers={"Allow": ", ".join(sorted(handlers))})
+    try:
+        return await handler(request)
+    except HTTPError as e:
+        return jsonify({"error": str(e)}, e.status)
+    except Exception as e:
+        logger.error(f"Exception on {request.method} {request.path}: {e}\n{traceback.format_exc()}")
+        return jsonify({"error": "Internal Server Error"}, 500)
+
+
+async def read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+    request = Request(scope, await read_body(receive))
+    rule, handlers, path_params = match_route(request.path)
+    request.path_params = path_params or {}
+    if rule == "/metrics":
+        response = await handle(request, rule, handlers)
+        await response.send(send, receive)
+        return
+
+    endpoint = rule or "unmatched"
+    start = time.perf_counter()
+    metrics.REQUESTS_IN_FLIGHT.labels(endpoint).inc()
+    status = 500
+    try:
+        response = await handle(request, rule, handlers)
+        response.headers.update(cors_headers(request, handlers or {}))
+        status = response.status
+        # Streamed responses are timed to their last byte, as in api.py
+        await response.send(send, receive)
+    finally:
+        metrics.REQUESTS_IN_FLIGHT.labels(endpoint).dec()
+        metrics.REQUEST_LATENCY.labels(endpoint, request.method, str(status)).observe(time.perf_counter() - start)
@@ -0,0 +1,147 @@
+"""
+Fixed synthetic corpus for the benchmarks. Everything is generated from a seeded RNG so
+every run, on every commit, measures the same inputs.
+"""
+import copy
+import os
+import random
+
+import yaml
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PRICING_CONFIG_PATH = os.path.join(REPO_ROOT, "valid_config_generator", "pricing.yaml")
+
+SEED = 20240601
+
+UNIT_TYPES = ['casement', 'awning', 'picture_window', 'fixed_casement', 'single_slider',
+              'single_hung', 'double_end_slider', 'double_hung', 'double_slider']
+INTERIOR_TYPES = {'casement', 'awning', 'picture_window', 'fixed_casement'}
+HARDWARE = {
+    'casement': ['rotto_corner_drive_1_corner', 'rotto_corner_drive_2_corners', 'egress_hardware',
+                 'hinges_add_over_30', 'limiters', 'encore_system'],
+    'awning': ['encore_system', 'limiters'],
+}
+GLASS = [('double', 'lowe_180', 4), ('double', 'lowe_272', 3), ('double', 'laminated_clear', 6),
+         ('triple', 'lowe_180_clear_clear', 4), ('triple', 'clear_clear_clear', 5)]
+SHAPES = [None, 'half_circle', 'ellipse', 'trapezoid']
+CASINGS = ['vinyl_casing_3_1_2', 'wood_return', 'vinyl_pkg_2_3_8_casing_3_1_2', 'wood_ext']
+FINISHES = ['white', 'colour', 'stain']
+
+# (config, key path) lookups in the shapes WindowQuoter uses, including misses
+YAML_KEY_PATHS = [
+    "units", "brickmould", "casing_extension.type", "units.unit_1.unit_type",
+    "units.unit_1.glass.subtype", "units.unit_1.hardware.limiters", "units.unit_9.glass.type",
+]
+PRICING_KEY_PATHS = [
+    "casement.exterior.colour_base_perc", "awning.interior.stain_add_on", "casement.limiters",
+    "shapes.half_circle", "double_hung.exterior.stain_add_on", "not_a_type.exterior.colour_base_perc",
+]
+
+# Formatted descriptions as ProjectQuoter sends them to ValidConfigGenerator
+FREE_TEXT_DESCRIPTIONS = [
+    "casement, width: 36, height: 48, project description: black black 180/clear",
+    "white white awning with encore system, width: 34, height: 34",
+    "picture window half circle 50 x 36 triple pane low e 180, width: 50, height: 36",
+    "CA/A red in white out, width: 60, height: 40, project description: 272 laminated",
+    "C/VF/C black/black, 2 corner rotto on casements, width: 96, height: 48",
+    "double hung stain out, width: 30, height: 60, project description: brickmould 1_5_8",
+    "SS tempered 272, 4 5/8 vinyl ext, width: 48, height: 36",
+    "fixed casement ellipse with brickmould extras, frosted glass, width: 40, height: 24",
+    "DS white/custom colour, jamb 2.5 no groove, width: 72, height: 36",
+    "awning triple 180 clear clear 5mm, limiters, width: 30, height: 20, project description: black black",
+]
+
+
+def random_config(rng, float_heights=False):
+    """
+    A random valid window config in the shape ValidConfigGenerator produces. The tests share
+    it; they ask for float_heights too, which the benchmark corpus leaves out to stay fixed.
+    """
+    n_units = rng.choice([1, 1, 2, 3])
+    units = {}
+    for u in range(1, n_units + 1):
+        unit_type = rng.choice(UNIT_TYPES)
+        glass_type, subtype, thickness = rng.choice(GLASS)
+        unit = {
+            'unit_type': unit_type,
+            'window_area_frac': 1 / n_units,
+            'exterior': rng.choice(['white', 'colour', 'custom_colour', 'stain']),
+            'glass': {'type': glass_type, 'subtype': subtype, 'thickness_mm': thickness},
+        }
+        if unit_type in INTERIOR_TYPES:
+            unit['interior'] = rng.choice(FINISHES)
+        if unit_type in HARDWARE:
+            unit['hardware'] = {hw: rng.random() < 0.5 for hw in HARDWARE[unit_type]}
+        shape = rng.choice(SHAPES)
+        if shape is not None:
+            unit['shapes'] = {'type': shape,
+                              'extras': {'brickmould': rng.random() < 0.5, 'extension': rng.random() < 0.5}}
+        units[f'unit_{u}'] = unit
+    width, height = rng.randint(12, 120), rng.randint(12, 96)
+    if float_heights:
+        height = rng.choice([height, rng.uniform(12, 96)])
+    config = {'width': width, 'height': height, 'units': units}
+    if rng.random() < 0.5:
+        config['brickmould'] = {'include': rng.random() < 0.8, 'size': rng.choice(['0', '1_5_8', '2']),
+                                'finish': rng.choice(FINISHES)}
+    if rng.random() < 0.5:
+        config['casing_extension'] = {'type': rng.choice(CASINGS), 'finish': rng.choice(FINISHES),
+                                      'include_bay_bow_extension': rng.random() < 0.3,
+                                      'include_bay_bow_plywood': rng.random() < 0.3}
+    return config
+
+
+def break_config(rng, config):
+    """A copy of config with one or two of the mistakes the model typically makes"""
+    config = copy.deepcopy(config)
+    unit = config['units']['unit_1']
+    mistakes = [
+        lambda: unit.__setitem__('unit_type', 'casment'),
+        lambda: unit.setdefault('glass', {}).__setitem__('subtype', 'lowe_999'),
+        lambda: unit.__setitem__('exterior', 'black'),
+        lambda: unit.pop('glass', None),
+        lambda: config.__setitem__('width', -36),
+        lambda: config.__setitem__('height', "48 inches"),
+        lambda: config.__setitem__('frame_colour', 'white'),
+    ]
+    for mistake in rng.sample(mistakes, rng.choice([1, 2])):
+        mistake()
+    return config
+
+
+def window_configs(n=500):
+    rng = random.Random(SEED)
+    return [random_config(rng) for _ in range(n)]
+
+
+def validation_configs(n=500):
+    """Three valid configs for every invalid one"""
+    rng = random.Random(SEED + 1)
+    configs = [random_config(rng) for _ in range(n)]
+    return [break_config(rng, config) if i % 4 == 3 else config for i, config in enumerate(configs)]
+
+
+def load_pricing_config():
+    with open(PRICING_CONFIG_PATH, "r") as file:
+        return yaml.safe_load(file)
+
+
+def bracket_lookups(pricing_config, n=1000):
+    """(value, brackets) pairs spread over every bracket list in the pricing config"""
+    bracket_lists = list(_find_bracket_lists(pricing_config))
+    rng = random.Random(SEED + 2)
+    lookups = []
+    for _ in range(n):
+        brackets = rng.choice(bracket_lists)
+        top = max(b.get('max_sf', b.get('max_size')) for b in brackets)
+        lookups.append((rng.uniform(0.5, top * 1.2), brackets))
+    return lookups
+
+
+def _find_bracket_lists(node):
+    if isinstance(node, dict):
+        for value in node.values():
+            yield from _find_bracket_lists(value)
+    elif isinstance(node, list) and node and all(isinstance(b, dict) for b in node):
+        if all('max_sf' in b or 'max_size' in b for b in node):
+            yield node
@@ -0,0 +1,133 @@
+"""
+HTTP load test for the quote API: requests/sec at a fixed p95 latency.
+
+    # Model responses from the stub server, so the test measures serving, not the model
+    python -m llm_io.stub_server --recordings llm_recordings.jsonl --port 8001 --latency-ms 800
+    export OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=stub
+
+    uvicorn api:app --interface wsgi --port 8000 &      # Flask deployment
+    python -m benchmarks.load_test http://127.0.0.1:8000 --projects projects.jsonl --label flask
+    uvicorn asgi:app --port 8000 &                       # async deployment
+    python -m benchmarks.load_test http://127.0.0.1:8000 --projects projects.jsonl --label asgi
+
+Record the projects' model responses first (LLM_BACKEND=record, one pass over projects.jsonl)
+so the stub server can answer every request. Projects are read as for project_quoter.bulk.
+
+At each concurrency level (1, 2, 4, ... up to --max-concurrency) that many clients POST
+projects back to back for --duration seconds. Each level reports requests/sec, p50/p95
+latency and errors. The headline is the best throughput whose p95 stays within --p95-ms,
+so deployments are compared at equal tail latency rather than at saturation.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+DEFAULT_PROJECT = {
+    "project_name": "Load test",
+    "project_description": "black black 180/clear",
+    "window_descriptions": "3x 36 x 48 casement, 34x34 white white awning with grilles, 2x 60x40 CA/A",
+}
+
+
+async def run_level(url: str, projects: List[Dict], concurrency: int, duration: float, timeout: float) -> Dict:
+    """concurrency clients sending projects back to back for duration seconds"""
+    latencies = []
+    errors = 0
+    next_project = itertools.cycle(projects)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(url, json=next(next_project))
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    n = len(latencies)
+    return {
+        "concurrency": concurrency,
+        "requests": n,
+        "errors": errors,
+        "rps": n / elapsed,
+        "p50_ms": latencies[n // 2] * 1000 if n else None,
+        "p95_ms": latencies[min(n - 1, int(n * 0.95))] * 1000 if n else None,
+    }
+
+
+def best_within(levels: List[Dict], p95_ms: float):
+    """The level with the highest throughput whose p95 is within p95_ms and had no errors"""
+    within = [level for level in levels if level["p95_ms"] is not None and level["p95_ms"] <= p95_ms
+              and not level["errors"]]
+    return max(within, key=lambda level: level["rps"]) if within else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base_url", help="e.g. http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/quote_project")
+    parser.add_argument("--projects", help="JSONL file of projects (default: one built-in project)")
+    parser.add_argument("--p95-ms", type=float, default=5000, help="Tail latency budget for the headline number")
+    parser.add_argument("--max-concurrency", type=int, default=256)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per concurrency level")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--label", default="", help="Name of the deployment under test, saved with the results")
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.projects:
+        from project_quoter.bulk import read_projects
+        projects = [project for _, project in read_projects(args.projects)]
+    else:
+        projects = [DEFAULT_PROJECT]
+    url = args.base_url.rstrip("/") + args.path
+
+    levels = []
+    concurrency = 1
+    print(f"{'clients':>8} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+    while concurrency <= args.max_concurrency:
+        level = asyncio.run(run_level(url, projects, concurrency, args.duration, args.timeout))
+        levels.append(level)
+        p50 = f"{level['p50_ms']:.0f}" if level["p50_ms"] is not None else "-"
+        p95 = f"{level['p95_ms']:.0f}" if level["p95_ms"] is not None else "-"
+        print(f"{concurrency:>8} {level['rps']:>8.2f} {p50:>9} {p95:>9} {level['errors']:>7}", flush=True)
+        # Past the latency budget, more clients only add queueing
+        if level["p95_ms"] is None or level["p95_ms"] > args.p95_ms * 2:
+            break
+        concurrency *= 2
+
+    best = best_within(levels, args.p95_ms)
+    if best is None:
+        print(f"No level kept p95 within {args.p95_ms:.0f}ms without errors", file=sys.stderr)
+    else:
+        print(f"{args.label or url}: {best['rps']:.2f} req/s at p95 {best['p95_ms']:.0f}ms "
+              f"(budget {args.p95_ms:.0f}ms, {best['concurrency']} clients)")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"label": args.label, "url": url, "p95_budget_ms": args.p95_ms, "best": best, "levels": levels},
+                      f, indent=2)
+    return 0 if best is not None else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Compare the config generator's prompt styles and output formats: input tokens per call and,
+with --live, end-to-end latency (retries included) and how often a retry was needed.
+
+    python -m benchmarks.prompt_report                 # token counts only, no network
+    python -m benchmarks.prompt_report --live 3        # also generate each description 3x per variant
+
+Token counts use tiktoken's o200k_base encoding (the gpt-4.1 family) when it is available,
+otherwise an estimate of 4 characters per token. --live uses the backend chosen by
+LLM_BACKEND, so it also runs against recordings or the stub server. The json variants count the
+structured output schema, which is sent with every request, as prompt tokens.
+"""
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+
+from benchmarks import corpus
+from util.timing import StageTimings
+from valid_config_generator import schema
+from valid_config_generator.valid_config_generator import ValidConfigGenerator
+
+
+def token_counter():
+    """Return (count_tokens, method)"""
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("o200k_base")
+        return (lambda text: len(encoding.encode(text))), "tiktoken o200k_base"
+    except Exception:
+        return (lambda text: round(len(text) / 4)), "estimate (chars / 4)"
+
+
+def measure_live(generator, repeats):
+    """Generate every corpus description repeats times, bypassing the shorthand parser and response cache"""
+    generator.model.cache = None
+    latencies, retries, first_try_valid, failed = [], [], 0, 0
+    for description in corpus.FREE_TEXT_DESCRIPTIONS:
+        for _ in range(repeats):
+            timings = StageTimings()
+            start = time.perf_counter()
+            config = generator.generate_config(description, timings=timings)
+            latencies.append(time.perf_counter() - start)
+            n_retries = timings.counters.get("retries", 0)
+            retries.append(n_retries)
+            first_try_valid += bool(config) and n_retries == 0
+            failed += not config
+    latencies.sort()
+    n = len(latencies)
+    return {
+        "calls": n,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[min(n - 1, int(n * 0.95))] * 1000,
+        "retries_per_call": sum(retries) / n,
+        "retry_rate": sum(1 for r in retries if r) / n,
+        "first_try_valid_rate": first_try_valid / n,
+        "failure_rate": failed / n,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="gpt-4.1")
+    parser.add_argument("--live", type=int, default=0, metavar="N", help="Call the model N times per description")
+    parser.add_argument("--output", help="Also write the report as JSON")
+    args = parser.parse_args(argv)
+    logging.disable(logging.WARNING)
+
+    count_tokens, method = token_counter()
+    inputs = [count_tokens(description) for description in corpus.FREE_TEXT_DESCRIPTIONS]
+    report = {"token_method": method, "model": args.model, "variants": {}}
+    for style in ValidConfigGenerator.PROMPT_STYLES:
+        for output_format in ValidConfigGenerator.OUTPUT_FORMATS:
+            prompt = ValidConfigGenerator.default_prompt(style, output_format)
+            # A structured output schema is sent with every request and billed as input
+            text_format = schema.config_json_schema() if output_format == "json" else None
+            prompt_tokens = count_tokens(prompt) + (count_tokens(json.dumps(text_format)) if text_format else 0)
+            result = {
+                "prompt_chars": len(prompt),
+                "prompt_tokens": prompt_tokens,
+                "mean_input_tokens_per_call": prompt_tokens + statistics.mean(inputs),
+            }
+            if args.live:
+                generator = ValidConfigGenerator(args.model, fast_path=False, prompt_style=style,
+                                                 output_format=output_format)
+                result.update(measure_live(generator, args.live))
+            report["variants"][f"{style}/{output_format}"] = result
+
+    print(f"Tokens: {method}")
+    for variant, result in report["variants"].items():
+        line = f"{variant:<14} {result['prompt_chars']:>7,} chars {result['prompt_tokens']:>7,} prompt tokens"
+        if "p50_ms" in result:
+            line += (f"  p50 {result['p50_ms']:>7.0f}ms  p95 {result['p95_ms']:>7.0f}ms"
+                     f"  retry rate {result['retry_rate']:.0%}  failed {result['failure_rate']:.0%}")
+        print(line)
+    compact, full = report["variants"]["compact/yaml"], report["variants"]["full/yaml"]
+    print(f"compact / full prompt tokens: {compact['prompt_tokens'] / full['prompt_tokens']:.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
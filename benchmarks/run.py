@@ -0,0 +1,279 @@
+"""
+Microbenchmarks for the quoting, validation and formatting hot paths.
+
+    python -m benchmarks.run                       # all benchmarks, results saved to benchmarks/results/<commit>.json
+    python -m benchmarks.run -k brackets           # only benchmarks whose name contains "brackets"
+    python -m benchmarks.run --compare benchmarks/results/abc1234.json
+
+Each benchmark cycles through a fixed synthetic corpus (benchmarks/corpus.py), timing every
+call individually for p50/p99 latency. Allocations are measured in a separate tracemalloc
+pass so tracing doesn't skew the timings.
+"""
+import argparse
+import datetime
+import gc
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from benchmarks import corpus
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Benchmark name -> setup function returning (fn, items); fn is called with one item per op
+BENCHMARKS: Dict[str, Callable[[], Tuple[Callable, Sequence]]] = {}
+
+
+def benchmark(name):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+@benchmark("window_quoter.quote_window")
+def setup_quote_window():
+    from window_quoter.window_quoter import WindowQuoter
+
+    def quote(config):
+        return WindowQuoter(config, corpus.PRICING_CONFIG_PATH).quote_window()
+    return quote, corpus.window_configs()
+
+
+@benchmark("window_quoter.quote_window[parsed]")
+def setup_quote_parsed_window():
+    from valid_config_generator.config_model import WindowConfig
+    from window_quoter.window_quoter import WindowQuoter
+
+    def quote(config):
+        return WindowQuoter(config, corpus.PRICING_CONFIG_PATH).quote_window()
+    return quote, [WindowConfig.from_dict(config) for config in corpus.window_configs()]
+
+
+@benchmark("config_model.WindowConfig.from_dict")
+def setup_window_config_from_dict():
+    from valid_config_generator.config_model import WindowConfig
+    return WindowConfig.from_dict, corpus.window_configs()
+
+
+def setup_load_pricing(source):
+    import hashlib
+    import tempfile
+    from window_quoter.pricing_snapshot import build_snapshot, load_snapshot, load_yaml
+
+    with open(corpus.PRICING_CONFIG_PATH, "rb") as file:
+        raw = file.read()
+    if source == "yaml":
+        return load_yaml, [raw]
+    path = build_snapshot(corpus.PRICING_CONFIG_PATH, os.path.join(tempfile.mkdtemp(), "pricing.yaml.snap"))
+    version = hashlib.sha256(raw).hexdigest()
+
+    def load(path):
+        return load_snapshot(path, version)
+    return load, [path]
+
+
+for _source in ("yaml", "snapshot"):
+    benchmark(f"pricing_snapshot.load[{_source}]")(lambda source=_source: setup_load_pricing(source))
+
+
+@benchmark("helper_funcs.calculate_price_from_yaml_brackets")
+def setup_brackets():
+    from window_quoter.helper_funcs import calculate_price_from_yaml_brackets
+
+    def lookup(item):
+        return calculate_price_from_yaml_brackets(*item)
+    return lookup, corpus.bracket_lookups(corpus.load_pricing_config())
+
+
+@benchmark("yaml_util.getOrReturnNoneYaml")
+def setup_get_or_return_none():
+    from util.yaml_util import getOrReturnNoneYaml
+
+    pricing_config = corpus.load_pricing_config()
+    items = [(config, path) for config in corpus.window_configs(50) for path in corpus.YAML_KEY_PATHS]
+    items += [(pricing_config, path) for path in corpus.PRICING_KEY_PATHS] * 50
+
+    def get(item):
+        return getOrReturnNoneYaml(*item)
+    return get, items
+
+
+@benchmark("config_validator.validate")
+def setup_validate():
+    from valid_config_generator.config_validator import ConfigValidator
+    return ConfigValidator().validate, corpus.validation_configs()
+
+
+@benchmark("config_validator.parse")
+def setup_parse():
+    from valid_config_generator.config_validator import ConfigValidator
+    return ConfigValidator().parse, corpus.validation_configs()
+
+
+def setup_format_json(n_windows):
+    from project_quoter import ProjectQuoter
+    from window_quoter.window_quoter import WindowQuoter
+
+    configs = corpus.window_configs()
+    project_breakdown = {}
+    total_cost = labour = 0
+    for i in range(1, n_windows + 1):
+        cost, breakdown = WindowQuoter(configs[(i - 1) % len(configs)], corpus.PRICING_CONFIG_PATH).quote_window()
+        project_breakdown[f"Window {i}"] = {'cost': cost, 'breakdown': breakdown, 'quantity': 1 + i % 3}
+        total_cost += cost * (1 + i % 3)
+        labour += breakdown['labour']
+    project_breakdown['Quoted Windows'] = n_windows
+    project_breakdown['Total Window Cost'] = total_cost
+    project_breakdown['Labour'] = labour
+    project_breakdown['Total Project Cost'] = total_cost + labour
+    return ProjectQuoter("benchmark").format_json, [project_breakdown]
+
+
+for _n in (1, 50, 1000):
+    benchmark(f"project_quoter.format_json[{_n}]")(lambda n=_n: setup_format_json(n))
+
+
+def measure(fn: Callable, items: Sequence, min_time: float = 1.0, min_ops: int = 100, alloc_ops: int = 100) -> Dict:
+    """
+    Time fn over items (cycling) for at least min_time seconds and min_ops calls. Slow
+    benchmarks stop short of min_ops after 5 * min_time, with at least 3 calls.
+    """
+    # Warm up caches (pricing catalog, compiled brackets) before timing
+    warmup_end = time.perf_counter() + min(0.2, min_time / 5)
+    i = 0
+    while i < len(items) and time.perf_counter() < warmup_end:
+        fn(items[i])
+        i += 1
+
+    timings = []
+    gc.collect()
+    start = time.perf_counter()
+    deadline = start + min_time
+    hard_deadline = start + 5 * min_time
+    i = 0
+    perf_counter_ns = time.perf_counter_ns
+    while len(timings) < 3 or time.perf_counter() < deadline or (
+            len(timings) < min_ops and time.perf_counter() < hard_deadline):
+        item = items[i % len(items)]
+        t0 = perf_counter_ns()
+        fn(item)
+        timings.append(perf_counter_ns() - t0)
+        i += 1
+    elapsed = time.perf_counter() - start
+
+    timings.sort()
+    n = len(timings)
+    result = {
+        "ops": n,
+        "ops_per_sec": n / elapsed,
+        "mean_us": sum(timings) / n / 1000,
+        "p50_us": timings[n // 2] / 1000,
+        "p99_us": timings[min(n - 1, int(n * 0.99))] / 1000,
+    }
+    # tracemalloc slows calls down several times, so slow benchmarks trace fewer of them
+    result.update(measure_allocations(fn, items, min(alloc_ops, max(1, int(min_time * 1e6 / result["mean_us"])))))
+    return result
+
+
+def measure_allocations(fn: Callable, items: Sequence, n_ops: int) -> Dict:
+    """Mean peak and retained bytes allocated per call, via tracemalloc"""
+    n_ops = max(1, min(n_ops, len(items) * 10))
+    tracemalloc.start()
+    peak_total = retained_total = 0
+    try:
+        for i in range(n_ops):
+            item = items[i % len(items)]
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            result = fn(item)
+            current, peak = tracemalloc.get_traced_memory()
+            del result
+            peak_total += peak - before
+            retained_total += current - before
+    finally:
+        tracemalloc.stop()
+    return {
+        "alloc_peak_bytes": peak_total / n_ops,
+        "alloc_bytes": retained_total / n_ops,
+    }
+
+
+def git_commit() -> Dict:
+    repo = corpus.REPO_ROOT
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=repo, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=repo,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+def run(names: List[str], min_time: float) -> Dict:
+    results = {
+        **git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": {},
+    }
+    for name in names:
+        fn, items = BENCHMARKS[name]()
+        results["benchmarks"][name] = measure(fn, items, min_time=min_time)
+        print_row(name, results["benchmarks"][name])
+    return results
+
+
+def print_row(name: str, result: Dict, baseline: Dict = None):
+    line = (f"{name:<50} {result['ops_per_sec']:>12,.0f} ops/s  p50 {result['p50_us']:>10.2f}us"
+            f"  p99 {result['p99_us']:>10.2f}us  alloc {result['alloc_peak_bytes']:>12,.0f}B")
+    if baseline:
+        line += f"  {result['ops_per_sec'] / baseline['ops_per_sec']:>6.2f}x"
+    print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds to time each benchmark for")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results file to report speedups against")
+    parser.add_argument("--list", action="store_true", help="List benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return
+    # Keep the code under test from logging into the timings
+    logging.disable(logging.CRITICAL)
+    names = [name for name in BENCHMARKS if args.filter in name]
+    results = run(names, args.min_time)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        label = (results["commit"] or "unknown")[:12] + ("-dirty" if results["dirty"] else "")
+        output = os.path.join(RESULTS_DIR, f"{label}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {baseline.get('commit', '?')[:12]} (ops/s ratio, >1 is faster):")
+        for name, result in results["benchmarks"].items():
+            if name in baseline["benchmarks"]:
+                print_row(name, result, baseline["benchmarks"][name])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3 @@
+from .job_manager import InvalidCallbackUrl, JobManager, JobQueueFull, MemoryJobStore, SqliteJobStore
+
+__all__ = ['InvalidCallbackUrl', 'JobManager', 'JobQueueFull', 'MemoryJobStore', 'SqliteJobStore']
@@ -0,0 +1,274 @@
+import copy
+import ipaddress
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+
+class JobQueueFull(RuntimeError):
+    """Raised by JobManager.submit when max_pending jobs are already queued or running"""
+
+
+class InvalidCallbackUrl(ValueError):
+    """Raised by JobManager.submit for a callback URL that isn't http(s) or isn't allowed"""
+
+
+class _NoRedirects(urllib.request.HTTPRedirectHandler):
+    # A redirect would send the callback to a host that was never checked; 3xx is a failed delivery
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+_callback_opener = urllib.request.build_opener(_NoRedirects)
+
+
+def _is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])  # IPv6 addresses may carry a %scope
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    # is_global excludes private, loopback, link-local (169.254.169.254), shared and reserved ranges
+    return ip.is_global and not ip.is_multicast
+
+
+class MemoryJobStore:
+    """Jobs in a dict, visible to the process that runs them"""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def save(self, job: Dict):
+        # Copy so readers never see a job the worker thread is halfway through updating
+        with self._lock:
+            self._jobs[job["id"]] = copy.deepcopy(job)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return copy.deepcopy(job) if job is not None else None
+
+    def delete_finished_before(self, cutoff: float):
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items()
+                           if job["status"] in FINISHED and job["finished_at"] < cutoff]:
+                del self._jobs[job_id]
+
+
+class SqliteJobStore:
+    """
+    Jobs in a SQLite database (WAL mode), so every worker process on the node can answer
+    GET /jobs/<id> for a job another worker is running.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._connection()
+
+    def _connection(self):
+        # One connection per thread, reopened after a fork (see ResponseCache)
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.db_path, timeout=5.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, job TEXT NOT NULL, finished_at REAL)")
+            connection.commit()
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def save(self, job: Dict):
+        connection = self._connection()
+        connection.execute("INSERT OR REPLACE INTO jobs (id, status, job, finished_at) VALUES (?, ?, ?, ?)",
+                           (job["id"], job["status"], json.dumps(job), job.get("finished_at")))
+        connection.commit()
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        row = self._connection().execute("SELECT job FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def delete_finished_before(self, cutoff: float):
+        connection = self._connection()
+        connection.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,))
+        connection.commit()
+
+
+class JobManager:
+    """
+    Runs project quotes in the background on a bounded thread pool.
+
+    A job runs a callable returning ProjectQuoter.stream_project events; its progress
+    (windows done / total) and result are taken from those events. Jobs and their results
+    are kept in store for ttl_seconds after they finish. If the job has a callback_url, the
+    finished job is POSTed to it as JSON, retrying failed deliveries. Callbacks are sent from
+    their own small pool, so a slow receiver doesn't hold up queued quotes.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 100, store=None, ttl_seconds: float = 3600,
+                 callback_timeout: float = 10.0, callback_attempts: int = 3, allowed_callback_hosts: Iterable[str] = None,
+                 callback_workers: int = 2):
+        """
+        allowed_callback_hosts: hostnames callbacks may be sent to, whatever they resolve to. None
+        allows any host that resolves only to public addresses (no loopback, private or link-local).
+        """
+        self.max_pending = max_pending
+        self.store = store if store is not None else MemoryJobStore()
+        self.ttl_seconds = ttl_seconds
+        self.callback_timeout = callback_timeout
+        self.callback_attempts = callback_attempts
+        self.allowed_callback_hosts = set(allowed_callback_hosts) if allowed_callback_hosts is not None else None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="quote-job")
+        self._callback_executor = ThreadPoolExecutor(max_workers=callback_workers, thread_name_prefix="job-callback")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def check_callback_url(self, url: str):
+        """Raises InvalidCallbackUrl unless callbacks may be sent to url (see __init__)"""
+        parsed = urllib.parse.urlparse(url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise InvalidCallbackUrl(f"Callback URL must be an http(s) URL, got '{url}'")
+        if self.allowed_callback_hosts is not None:
+            if parsed.hostname not in self.allowed_callback_hosts:
+                raise InvalidCallbackUrl(f"Callbacks to host '{parsed.hostname}' are not allowed")
+            return
+        try:
+            port = parsed.port or (443 if parsed.scheme == "https" else 80)
+            addresses = {info[4][0] for info in socket.getaddrinfo(parsed.hostname, port, type=socket.SOCK_STREAM)}
+        except (OSError, UnicodeError, ValueError) as e:
+            raise InvalidCallbackUrl(f"Could not resolve callback host '{parsed.hostname}': {e}")
+        for address in addresses:
+            if not _is_public_address(address):
+                raise InvalidCallbackUrl(f"Callbacks to '{parsed.hostname}' ({address}) are not allowed: "
+                                         f"not a public address")
+
+    def submit(self, run: Callable[[], Iterator[Dict]], project_name: str = None, callback_url: str = None) -> Dict:
+        """
+        Queue run, a callable returning stream_project events, and return the new job.
+
+        Raises JobQueueFull if max_pending jobs are already queued or running, and
+        InvalidCallbackUrl for a callback_url that can't be used.
+        """
+        if callback_url:
+            self.check_callback_url(callback_url)
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"{self._pending} jobs are already queued or running")
+            self._pending += 1
+        self.store.delete_finished_before(time.time() - self.ttl_seconds)
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": QUEUED,
+            "project_name": project_name,
+            "progress": {"windows_done": 0, "windows_total": None},
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        if callback_url:
+            job["callback"] = {"url": callback_url, "status": "pending", "attempts": 0}
+        self.store.save(job)
+        submitted = copy.deepcopy(job)
+        self._executor.submit(self._run, job, run)
+        return submitted
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """The job's current state, or None if it doesn't exist or has expired"""
+        return self.store.get(job_id)
+
+    def _run(self, job: Dict, run: Callable[[], Iterator[Dict]]):
+        job["status"] = RUNNING
+        job["started_at"] = time.time()
+        self.store.save(job)
+        try:
+            for event in run():
+                self.apply_event(job, event)
+                # The finished state is saved once finished_at is set, below
+                if job["status"] == RUNNING:
+                    self.store.save(job)
+            if job["status"] == RUNNING:
+                job["status"] = FAILED
+                job["error"] = "The quote ended without a result"
+        except Exception as e:
+            logger.error(f"Job {job['id']} failed: {e}")
+            job["status"] = FAILED
+            job["error"] = str(e)
+        finally:
+            job["finished_at"] = time.time()
+            self.store.save(job)
+            with self._lock:
+                self._pending -= 1
+        logger.info(f"Job {job['id']} {job['status']} in {job['finished_at'] - job['started_at']:.1f}s")
+        if "callback" in job:
+            self._callback_executor.submit(self.send_callback, job)
+
+    @staticmethod
+    def apply_event(job: Dict, event: Dict):
+        """Update job from one stream_project event"""
+        kind = event["event"]
+        if kind == "windows":
+            job["progress"]["windows_total"] = len(event["windows"])
+        elif kind in ("window", "window_failed"):
+            job["progress"]["windows_done"] += 1
+        elif kind == "totals":
+            job["status"] = SUCCEEDED
+            job["result"] = {"total_cost": event["total_cost"], "price_breakdown": event["price_breakdown"]}
+        elif kind == "error":
+            job["status"] = FAILED
+            job["error"] = event["price_breakdown"].get("Error", "Quote failed")
+            job["result"] = {"price_breakdown": event["price_breakdown"]}
+
+    def send_callback(self, job: Dict):
+        """POST the finished job to its callback URL, retrying with backoff"""
+        callback = job["callback"]
+        payload = json.dumps({key: value for key, value in job.items() if key != "callback"}).encode("utf-8")
+        while callback["attempts"] < self.callback_attempts:
+            callback["attempts"] += 1
+            request = urllib.request.Request(callback["url"], data=payload, method="POST",
+                                             headers={"Content-Type": "application/json"})
+            try:
+                # Checked again: the host may resolve somewhere else now than when the job was submitted
+                self.check_callback_url(callback["url"])
+            except InvalidCallbackUrl as e:
+                callback["status"] = "failed"
+                callback["error"] = str(e)
+                logger.warning(f"Callback for job {job['id']} not sent: {e}")
+                break
+            try:
+                with _callback_opener.open(request, timeout=self.callback_timeout):
+                    pass
+                callback["status"] = "delivered"
+                callback.pop("error", None)
+                break
+            except (urllib.error.URLError, OSError) as e:
+                callback["status"] = "failed"
+                callback["error"] = str(e)
+                logger.warning(f"Callback for job {job['id']} to {callback['url']} failed "
+                               f"(attempt {callback['attempts']}): {e}")
+                if callback["attempts"] < self.callback_attempts:
+                    time.sleep(2 ** (callback["attempts"] - 1))
+        self.store.save(job)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+        self._callback_executor.shutdown(wait=wait)
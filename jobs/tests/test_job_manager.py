@@ -0,0 +1,198 @@
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from jobs import InvalidCallbackUrl, JobManager, JobQueueFull, SqliteJobStore
+
+EVENTS = [
+    {"event": "windows", "windows": {"window_1": {}, "window_2": {}}},
+    {"event": "window", "window": "Window 1", "quote": {}},
+    {"event": "window_failed", "window": "Window 2", "error": "Config generation failed"},
+    {"event": "totals", "total_cost": 1234.5, "price_breakdown": {"Total Project Cost": "$1,234.50"}},
+]
+
+
+def wait_for(manager, job_id, timeout=5.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        job = manager.get(job_id)
+        if job["status"] in ("succeeded", "failed") and job.get("callback", {}).get("status") != "pending":
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+class CallbackHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.server.received.append((self.path, json.loads(self.rfile.read(int(self.headers["Content-Length"])))))
+        if self.path == "/redirect":
+            self.send_response(307)
+            self.send_header("Location", "/done")
+        else:
+            self.server.release.wait(5)
+            self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestJobManager(unittest.TestCase):
+    def test_progress_and_result(self):
+        release = threading.Event()
+
+        def run():
+            for event in EVENTS[:2]:
+                yield event
+            release.wait(5)
+            yield from EVENTS[2:]
+
+        manager = JobManager(max_workers=1)
+        job = manager.submit(run, project_name="123 Main Street")
+        self.assertEqual(job["status"], "queued")
+        deadline = time.perf_counter() + 5
+        while manager.get(job["id"])["progress"]["windows_done"] < 1 and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        running = manager.get(job["id"])
+        self.assertEqual((running["status"], running["progress"]), ("running", {"windows_done": 1, "windows_total": 2}))
+
+        release.set()
+        job = wait_for(manager, job["id"])
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual(job["progress"], {"windows_done": 2, "windows_total": 2})
+        self.assertEqual(job["result"]["total_cost"], 1234.5)
+        self.assertIsNotNone(job["finished_at"])
+
+    def test_failures(self):
+        def raises():
+            raise RuntimeError("model unavailable")
+            yield
+
+        manager = JobManager(max_workers=1)
+        job = wait_for(manager, manager.submit(raises)["id"])
+        self.assertEqual((job["status"], job["error"]), ("failed", "model unavailable"))
+        job = wait_for(manager, manager.submit(lambda: iter([{"event": "error", "price_breakdown": {"Error": "Unable to separate"}}]))["id"])
+        self.assertEqual((job["status"], job["error"]), ("failed", "Unable to separate"))
+
+    def test_queue_full(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def blocked():
+            release.wait(5)
+            yield from EVENTS
+
+        manager = JobManager(max_workers=1, max_pending=2)
+        for _ in range(2):
+            manager.submit(blocked)
+        with self.assertRaises(JobQueueFull):
+            manager.submit(lambda: iter(EVENTS))
+
+    def start_callback_server(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), CallbackHandler)
+        server.received = []
+        server.release = threading.Event()
+        server.release.set()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.shutdown)
+        self.addCleanup(server.release.set)
+        return server
+
+    def test_callback(self):
+        server = self.start_callback_server()
+
+        manager = JobManager(max_workers=1, allowed_callback_hosts=["127.0.0.1"])
+        with self.assertRaises(InvalidCallbackUrl):
+            manager.submit(lambda: iter(EVENTS), callback_url="http://metadata.internal/")
+        with self.assertRaises(InvalidCallbackUrl):
+            manager.submit(lambda: iter(EVENTS), callback_url="file:///etc/passwd")
+        job = manager.submit(lambda: iter(EVENTS), callback_url=f"http://127.0.0.1:{server.server_port}/done")
+        job = wait_for(manager, job["id"])
+
+        self.assertEqual(job["callback"]["status"], "delivered")
+        self.assertEqual(len(server.received), 1)
+        self.assertEqual(server.received[0][1]["id"], job["id"])
+        self.assertEqual(server.received[0][1]["result"]["total_cost"], 1234.5)
+
+    def test_callbacks_to_non_public_addresses_refused(self):
+        manager = JobManager(max_workers=1)
+        for url in ("http://127.0.0.1:8000/", "http://localhost/", "http://10.0.0.5/", "http://192.168.1.1/",
+                    "http://169.254.169.254/latest/meta-data/", "http://[::1]/", "http://[::ffff:127.0.0.1]/",
+                    "http://0.0.0.0/"):
+            with self.subTest(url=url), self.assertRaises(InvalidCallbackUrl):
+                manager.submit(lambda: iter(EVENTS), callback_url=url)
+        public = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("93.184.216.34", 443))]
+        with mock.patch("socket.getaddrinfo", return_value=public):
+            manager.check_callback_url("https://example.com/quotes")
+        # A name resolving to any internal address is refused, e.g. after DNS rebinding
+        with mock.patch("socket.getaddrinfo", return_value=public + [(socket.AF_INET, socket.SOCK_STREAM, 6, "",
+                                                                      ("10.1.2.3", 443))]):
+            with self.assertRaises(InvalidCallbackUrl):
+                manager.check_callback_url("https://example.com/quotes")
+
+    def test_callback_redirects_not_followed(self):
+        server = self.start_callback_server()
+        manager = JobManager(max_workers=1, callback_attempts=1, allowed_callback_hosts=["127.0.0.1"])
+        job = manager.submit(lambda: iter(EVENTS), callback_url=f"http://127.0.0.1:{server.server_port}/redirect")
+        job = wait_for(manager, job["id"])
+        self.assertEqual(job["callback"]["status"], "failed")
+        self.assertEqual([path for path, _ in server.received], ["/redirect"])
+
+    def test_slow_callback_does_not_block_quotes(self):
+        server = self.start_callback_server()
+        server.release.clear()
+        manager = JobManager(max_workers=1, allowed_callback_hosts=["127.0.0.1"])
+        slow = manager.submit(lambda: iter(EVENTS), callback_url=f"http://127.0.0.1:{server.server_port}/done")
+        # The only quote worker is free again while the first job's callback is still waiting
+        self.assertEqual(wait_for(manager, manager.submit(lambda: iter(EVENTS))["id"])["status"], "succeeded")
+        self.assertEqual(manager.get(slow["id"])["callback"]["status"], "pending")
+        server.release.set()
+        self.assertEqual(wait_for(manager, slow["id"])["callback"]["status"], "delivered")
+
+    def test_sqlite_store(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "jobs.sqlite3")
+            manager = JobManager(max_workers=1, store=SqliteJobStore(path))
+            job = wait_for(manager, manager.submit(lambda: iter(EVENTS))["id"])
+            # Another worker process would open its own store on the same file
+            self.assertEqual(SqliteJobStore(path).get(job["id"]), job)
+            SqliteJobStore(path).delete_finished_before(time.time() + 1)
+            self.assertIsNone(manager.get(job["id"]))
+
+
+@mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test", "LLM_CACHE_PATH": ""})
+class TestJobsApi(unittest.TestCase):
+    def test_submit_and_poll(self):
+        import api
+        from project_quoter.tests.test_project_quoter import PROJECT, WINDOW_DESCRIPTIONS
+
+        def get_response(model_io, input, use_cache=True):
+            return WINDOW_DESCRIPTIONS if input == PROJECT["window_descriptions"] else "width: [unclosed"
+
+        client = api.app.test_client()
+        with mock.patch("llm_io.model_io.ModelIO.get_response", get_response), \
+                mock.patch.object(api, "_job_manager", JobManager(max_workers=1)):
+            response = client.post("/jobs", json=PROJECT)
+            self.assertEqual(response.status_code, 202)
+            status_url = response.headers["Location"]
+            self.assertEqual(status_url, response.get_json()["status_url"])
+
+            job = wait_for(api.get_job_manager(), response.get_json()["job_id"])
+            polled = client.get(status_url).get_json()
+            _, breakdown = api.get_project_quoter("gpt-4.1").quote_project(PROJECT)
+
+        self.assertEqual(polled["status"], "succeeded")
+        self.assertEqual(polled["progress"], {"windows_done": 3, "windows_total": 3})
+        self.assertEqual(polled["result"]["price_breakdown"], json.loads(json.dumps(breakdown)))
+        self.assertEqual(client.get("/jobs/missing").status_code, 404)
+        self.assertEqual(client.post("/jobs", json={**PROJECT, "callback_url": "ftp://x"}).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,230 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+
+from llm_io.response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RECORDINGS_PATH = "llm_recordings.jsonl"
+
+
+class RecordingNotFound(LookupError):
+    """Raised by ReplayBackend when no recording matches a request"""
+
+
+class ModelBackend:
+    """
+    Interface between ModelIO and whatever produces model output.
+
+    Backends are shared between threads, so complete() must be thread-safe.
+    """
+
+    def complete(self, model, instructions, input, text_format=None):
+        """
+        Return the model's text output for a request.
+
+        Args:
+            model (str): Model name
+            instructions (str): System instructions (the prompt)
+            input (str): User input
+            text_format (dict): Optional responses API output format, e.g.
+                {"type": "json_schema", "name": ..., "schema": ..., "strict": True}
+
+        Returns:
+            str: The output text. Errors are raised, not returned.
+        """
+        raise NotImplementedError
+
+    async def acomplete(self, model, instructions, input, text_format=None):
+        """
+        complete() for the async serving path. This default runs complete() on a thread;
+        backends with non-blocking I/O override it.
+        """
+        return await asyncio.to_thread(self.complete, model, instructions, input, text_format)
+
+
+# One client per provider per process. The OpenAI client is thread-safe and owns an httpx
+# connection pool, so sharing it keeps TLS connections alive between requests instead of
+# opening a new pool for every ModelIO.
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(company_name):
+    """Return the process-wide client for company_name, creating it on first use"""
+    client = _clients.get(company_name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(company_name)
+            if client is None:
+                from openai import OpenAI
+                client = OpenAI()
+                _clients[company_name] = client
+    return client
+
+
+# Async clients per event loop: an AsyncOpenAI client's connection pool belongs to the loop
+# that opened its connections, so each loop (one per ASGI worker) gets its own client
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client(company_name):
+    """Return the running event loop's async client for company_name, creating it on first use"""
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(company_name)
+    if client is None:
+        from openai import AsyncOpenAI
+        client = clients[company_name] = AsyncOpenAI()
+    return client
+
+
+class OpenAIBackend(ModelBackend):
+    """
+    The OpenAI responses API. Honours OPENAI_API_KEY and OPENAI_BASE_URL, so pointing
+    OPENAI_BASE_URL at llm_io.stub_server exercises the real client without network.
+    """
+
+    def __init__(self, company_name="openai"):
+        self.company_name = company_name
+
+    @property
+    def client(self):
+        # Created, and openai imported, on the first model call rather than at startup
+        return get_client(self.company_name)
+
+    def complete(self, model, instructions, input, text_format=None):
+        kwargs = {"text": {"format": text_format}} if text_format is not None else {}
+        response = self.client.responses.create(
+            model=model,
+            instructions=instructions,
+            input=input,
+            **kwargs)
+        return response.output_text
+
+    async def acomplete(self, model, instructions, input, text_format=None):
+        kwargs = {"text": {"format": text_format}} if text_format is not None else {}
+        response = await get_async_client(self.company_name).responses.create(
+            model=model,
+            instructions=instructions,
+            input=input,
+            **kwargs)
+        return response.output_text
+
+
+class RecordingBackend(ModelBackend):
+    """
+    Passes requests to another backend and appends every (request, output) pair to a
+    JSONL file that ReplayBackend can serve later.
+    """
+
+    def __init__(self, backend, path=DEFAULT_RECORDINGS_PATH):
+        self.backend = backend
+        self.path = path
+        self._lock = threading.Lock()
+
+    def complete(self, model, instructions, input, text_format=None):
+        output = self.backend.complete(model, instructions, input, text_format=text_format)
+        self.record(model, instructions, input, output)
+        return output
+
+    async def acomplete(self, model, instructions, input, text_format=None):
+        output = await self.backend.acomplete(model, instructions, input, text_format=text_format)
+        self.record(model, instructions, input, output)
+        return output
+
+    def record(self, model, instructions, input, output):
+        record = {
+            "key": ResponseCache.make_key(model, instructions, input),
+            "model": model,
+            "input": input,
+            "output": output,
+        }
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class ReplayBackend(ModelBackend):
+    """
+    Serves recordings made by RecordingBackend, without network.
+
+    Requests are matched on (model, instructions, input), so recordings go stale as soon as
+    the prompt changes. latency_ms (plus up to jitter_ms of uniform noise) is slept before
+    each response to stand in for model latency in benchmarks and load tests.
+    """
+
+    def __init__(self, path=DEFAULT_RECORDINGS_PATH, latency_ms=0.0, jitter_ms=0.0):
+        self.path = path
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.recordings = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    # Later recordings of the same request win
+                    self.recordings[record["key"]] = record["output"]
+        logger.info(f"Loaded {len(self.recordings)} model recordings from {path}")
+
+    def delay_seconds(self):
+        return (self.latency_ms + (random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)) / 1000
+
+    def complete(self, model, instructions, input, text_format=None):
+        delay = self.delay_seconds()
+        if delay > 0:
+            time.sleep(delay)
+        return self.lookup(model, instructions, input)
+
+    async def acomplete(self, model, instructions, input, text_format=None):
+        # Waits without holding a thread, like a real async model call
+        delay = self.delay_seconds()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self.lookup(model, instructions, input)
+
+    def lookup(self, model, instructions, input):
+        output = self.recordings.get(ResponseCache.make_key(model, instructions, input))
+        if output is None:
+            raise RecordingNotFound(f"No recording for model {model} and input {input[:50]!r}")
+        return output
+
+
+_shared_backend = None
+_shared_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """
+    Process-wide backend selected by $LLM_BACKEND:
+
+    - "openai" (default): OpenAIBackend
+    - "record": OpenAIBackend, recording to $LLM_RECORDINGS_PATH
+    - "replay": ReplayBackend over $LLM_RECORDINGS_PATH, sleeping $LLM_REPLAY_LATENCY_MS
+      (+ up to $LLM_REPLAY_JITTER_MS) per call
+    """
+    global _shared_backend
+    if _shared_backend is None:
+        with _shared_backend_lock:
+            if _shared_backend is None:
+                _shared_backend = make_backend(os.environ.get("LLM_BACKEND", "openai"))
+    return _shared_backend
+
+
+def make_backend(name):
+    """Build the backend called name, configured from the environment (see get_backend)"""
+    path = os.environ.get("LLM_RECORDINGS_PATH", DEFAULT_RECORDINGS_PATH)
+    if name == "openai":
+        return OpenAIBackend()
+    if name == "record":
+        return RecordingBackend(OpenAIBackend(), path)
+    if name == "replay":
+        return ReplayBackend(path,
+                             latency_ms=float(os.environ.get("LLM_REPLAY_LATENCY_MS", 0)),
+                             jitter_ms=float(os.environ.get("LLM_REPLAY_JITTER_MS", 0)))
+    raise ValueError(f"Unknown LLM_BACKEND '{name}', expected one of: openai, record, replay")
@@ -1,51 +1,174 @@
-from openai import OpenAI
+from llm_io.backends import ModelBackend, get_backend
+from llm_io.response_cache import ResponseCache, get_response_cache
+from util import metrics
+from typing import Any, Generator, NamedTuple, Union
+import asyncio
 import logging
+import time
 
 # TODO make agnostic to model
 
 logger = logging.getLogger(__name__)
 
 class ModelIO:
-    def __init__(self, company_name, model, prompt = None):
+    def __init__(self, company_name, model, prompt = None, use_cache = True, backend: ModelBackend = None, caller = "unknown", text_format = None):
         """ 
         Authenicate
+
+        backend defaults to the process-wide backend chosen by $LLM_BACKEND (see llm_io.backends).
+        caller labels this ModelIO's call latency metrics, e.g. "config_generator".
+        text_format is sent with every request to constrain the output, e.g. to a JSON schema
+        (see ModelBackend.complete).
         """
         
         self.company_name = company_name
+        self.text_format = text_format
+        self.caller = caller
         self.model = model
-        self.client = self.authenticate()
+        self.backend = backend if backend is not None else self.authenticate()
         self.prompt = prompt
+        self.cache = get_response_cache() if use_cache else None
 
+    @property
+    def client(self):
+        """The OpenAI client, or None for backends that don't use one"""
+        return getattr(self.backend, "client", None)
 
     def authenticate(self):
         """
-        Authenticate the user.
+        Authenticate the user. The backend, and its client, is shared by every ModelIO in the process.
         """
-        # Implement authentication logic here
-        try: # Only show first 5 chars for security
-            client = OpenAI()
-            return client
+        try:
+            return get_backend()
         except Exception as e:
-            logger.error(f"Error initializing OpenAI client. Is OPENAI_API_KEY set? Error: {e}")
-            exit()
+            logger.error(f"Error initializing model backend. Is OPENAI_API_KEY set? Error: {e}")
+            raise
 
 
-    def get_response(self, input):
+    @staticmethod
+    def continuation(input, response, message):
+        """
+        Input that continues the exchange input -> response with a new user message, so the
+        model sees its own previous output. input is a string or an earlier continuation.
+        """
+        messages = list(input) if isinstance(input, list) else [{"role": "user", "content": input}]
+        return messages + [{"role": "assistant", "content": response}, {"role": "user", "content": message}]
+
+    def get_response(self, input, use_cache = True):
         """
         Send a chat completion request to the model.
+
+        input is a string, or a list of {"role", "content"} messages such as continuation() returns.
+
+        With use_cache, a response previously stored with cache_response for the same
+        model, instructions and input is returned without calling the model.
         """
+        if use_cache:
+            cached = self.cached_response(input)
+            if cached is not None:
+                logger.debug("Serving model response from cache")
+                return cached
         # messages = [prompt, {"role": "user", "content": message}] if self.prompt else [{"role": "user", "content": message}]
+        start = time.perf_counter()
         try:
-            response = self.client.responses.create(
-                model = self.model,
-                instructions = self.prompt,
-                input  = input)
-            return response.output_text
+            response = self.backend.complete(self.model, self.prompt, input, text_format=self.text_format)
+            metrics.LLM_LATENCY.labels(self.caller, "ok").observe(time.perf_counter() - start)
+            return response
             # response = self.client.chat.completions.create(
             #     model=self.model_name,
             #     messages=messages,
             # )
             # return response.choices[0].message['content']
         except Exception as e:
+            metrics.LLM_LATENCY.labels(self.caller, "error").observe(time.perf_counter() - start)
             logger.error(f"Error in chat completion: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    async def aget_response(self, input, use_cache = True):
+        """
+        get_response() for the async serving path: the backend call is awaited (see
+        ModelBackend.acomplete), so many requests can wait on the model from one event loop.
+        """
+        if use_cache:
+            cached = await self.acached_response(input)
+            if cached is not None:
+                logger.debug("Serving model response from cache")
+                return cached
+        start = time.perf_counter()
+        try:
+            response = await self.backend.acomplete(self.model, self.prompt, input, text_format=self.text_format)
+            metrics.LLM_LATENCY.labels(self.caller, "ok").observe(time.perf_counter() - start)
+            return response
+        except Exception as e:
+            metrics.LLM_LATENCY.labels(self.caller, "error").observe(time.perf_counter() - start)
+            logger.error(f"Error in chat completion: {e}")
+            return None
+
+    def cached_response(self, input):
+        """The response stored with cache_response for input, or None"""
+        if self.cache is None:
+            return None
+        return self.cache.get(ResponseCache.make_key(self.model, self.prompt, input))
+
+    def cache_response(self, input, response):
+        """
+        Store a response for input. Only call this once the response has been validated.
+        """
+        if self.cache is not None:
+            self.cache.set(ResponseCache.make_key(self.model, self.prompt, input), response, model=self.model)
+
+    async def acached_response(self, input):
+        """cached_response() on a worker thread, so the SQLite read doesn't block the event loop"""
+        if self.cache is None:
+            return None
+        return await asyncio.to_thread(self.cached_response, input)
+
+    async def acache_response(self, input, response):
+        """cache_response() on a worker thread, so the SQLite write doesn't block the event loop"""
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache_response, input, response)
+
+
+class ModelCall(NamedTuple):
+    """A model request yielded by a step generator (see run_steps)"""
+    model: ModelIO
+    input: Any
+    use_cache: bool = True
+
+
+class CacheStore(NamedTuple):
+    """A validated response to store with model.cache_response, yielded by a step generator"""
+    model: ModelIO
+    input: Any
+    response: Any
+
+
+def run_steps(steps: Generator[Union[ModelCall, CacheStore], Any, Any]):
+    """
+    Run a step generator: a generator that yields the ModelCalls it needs, is sent each call's
+    response and returns its result. It yields a CacheStore to cache a response (and is sent
+    None). The generator holds the parsing, validation and retry logic; run_steps and
+    arun_steps only do the I/O, so the same logic serves the synchronous and the async paths.
+    """
+    try:
+        step = next(steps)
+        while True:
+            if isinstance(step, CacheStore):
+                step = steps.send(step.model.cache_response(step.input, step.response))
+            else:
+                step = steps.send(step.model.get_response(step.input, use_cache=step.use_cache))
+    except StopIteration as stop:
+        return stop.value
+
+
+async def arun_steps(steps: Generator[Union[ModelCall, CacheStore], Any, Any]):
+    """run_steps() with each model call awaited and the response cache used from a worker thread"""
+    try:
+        step = next(steps)
+        while True:
+            if isinstance(step, CacheStore):
+                step = steps.send(await step.model.acache_response(step.input, step.response))
+            else:
+                step = steps.send(await step.model.aget_response(step.input, use_cache=step.use_cache))
+    except StopIteration as stop:
+        return stop.value
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from util import metrics
+
+logger = logging.getLogger(__name__)
+
+# Per-user and private (see _private_dir): responses are served back without re-validation,
+# so the database must not live where other users can write it, as the system temp dir is
+DEFAULT_CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "ai_estimator")
+DEFAULT_CACHE_PATH = os.path.join(DEFAULT_CACHE_DIR, "llm_cache.sqlite3")
+
+# Entries older than this are neither served nor kept; the oldest beyond max_rows are dropped
+DEFAULT_MAX_AGE_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_ROWS = 100_000
+# Stores between two prunes of the SQLite tier, per process
+PRUNE_INTERVAL = 256
+
+
+def _private_dir(directory):
+    """Create directory readable by this user only (0700), if it doesn't exist yet"""
+    if not os.path.isdir(directory):
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        # makedirs' mode is subject to the umask
+        os.chmod(directory, 0o700)
+
+
+class ResponseCache:
+    """
+    Two-tier cache of model responses.
+
+    Tier 1 is an in-process LRU. Tier 2 is a SQLite database (WAL mode) that every worker
+    process on the node can share. Keys hash the model name, the full instructions and the
+    input, so any change to the prompt - including window.yaml and custom_context.txt, which
+    are inlined in it - produces new keys and stale entries are never served.
+
+    Callers decide what gets stored; ModelIO only stores responses that passed validation.
+
+    The SQLite tier is pruned when it is opened and every PRUNE_INTERVAL stores: entries older
+    than max_age seconds go, then the oldest written beyond max_rows. Either limit can be
+    turned off with 0 or None.
+    """
+
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, max_entries=1024, max_rows=DEFAULT_MAX_ROWS,
+                 max_age=DEFAULT_MAX_AGE_SECONDS):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stores_since_prune = 0
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "pruned": 0}
+        if self.db_path:
+            try:
+                _private_dir(os.path.dirname(os.path.abspath(self.db_path)))
+                self._connection()
+                self.prune()
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"LLM cache database {self.db_path} unavailable, using in-process cache only: {e}")
+                self.db_path = None
+
+    @staticmethod
+    def make_key(model, instructions, input):
+        """Cache key for a (model, instructions, input) request"""
+        instructions_hash = hashlib.sha256((instructions or "").encode("utf-8")).hexdigest()
+        payload = json.dumps([model, instructions_hash, input], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _connection(self):
+        # sqlite3 connections can't be shared between threads or forked workers, keep one
+        # per thread and reopen after a fork
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.db_path, timeout=5.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT, response TEXT NOT NULL, created_at REAL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS responses_created_at ON responses (created_at)")
+            connection.commit()
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _remember(self, key, response):
+        with self._lock:
+            self._lru[key] = response
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached response for key, or None"""
+        with self._lock:
+            response = self._lru.get(key)
+            if response is not None:
+                self._lru.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                metrics.LLM_CACHE_LOOKUPS.labels("memory_hit").inc()
+                return response
+
+        if self.db_path:
+            try:
+                row = self._connection().execute(
+                    "SELECT response FROM responses WHERE key = ? AND created_at >= ?",
+                    (key, self._oldest_kept())).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache read failed: {e}")
+                row = None
+            if row is not None:
+                self._remember(key, row[0])
+                with self._lock:
+                    self.stats["disk_hits"] += 1
+                metrics.LLM_CACHE_LOOKUPS.labels("disk_hit").inc()
+                return row[0]
+
+        with self._lock:
+            self.stats["misses"] += 1
+        metrics.LLM_CACHE_LOOKUPS.labels("miss").inc()
+        return None
+
+    def set(self, key, response, model=None):
+        """Store a response in both tiers"""
+        if response is None:
+            return
+        self._remember(key, response)
+        if self.db_path:
+            try:
+                connection = self._connection()
+                connection.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, response, created_at) VALUES (?, ?, ?, ?)",
+                    (key, model, response, time.time()))
+                connection.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache write failed: {e}")
+        with self._lock:
+            self.stats["stores"] += 1
+            self._stores_since_prune += 1
+            due = self._stores_since_prune >= PRUNE_INTERVAL
+            if due:
+                self._stores_since_prune = 0
+        if due and self.db_path:
+            self.prune()
+
+    def _oldest_kept(self):
+        """created_at of the oldest entry still within max_age"""
+        return time.time() - self.max_age if self.max_age else 0
+
+    def prune(self):
+        """Drop SQLite entries past max_age and the oldest beyond max_rows; returns how many went"""
+        if not self.db_path:
+            return 0
+        try:
+            connection = self._connection()
+            pruned = connection.execute("DELETE FROM responses WHERE created_at < ?", (self._oldest_kept(),)).rowcount
+            if self.max_rows:
+                pruned += connection.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY created_at DESC LIMIT -1 OFFSET ?)", (self.max_rows,)).rowcount
+            connection.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache prune failed: {e}")
+            return 0
+        if pruned:
+            logger.info(f"Pruned {pruned} entries from LLM cache {self.db_path}")
+            with self._lock:
+                self.stats["pruned"] += pruned
+        return pruned
+
+    def clear(self):
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._lru.clear()
+        if self.db_path:
+            connection = self._connection()
+            connection.execute("DELETE FROM responses")
+            connection.commit()
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """
+    Process-wide ResponseCache.
+
+    The SQLite tier lives at $LLM_CACHE_PATH (default: llm_cache.sqlite3 in a 0700
+    ai_estimator directory under $XDG_CACHE_HOME or ~/.cache); set LLM_CACHE_PATH to an
+    empty string to keep only the in-process tier. LLM_CACHE_MAX_ROWS and
+    LLM_CACHE_MAX_AGE_SECONDS bound the SQLite tier (0 for no limit).
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                db_path = os.environ.get("LLM_CACHE_PATH", DEFAULT_CACHE_PATH)
+                max_entries = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 1024))
+                max_rows = int(os.environ.get("LLM_CACHE_MAX_ROWS", DEFAULT_MAX_ROWS))
+                max_age = float(os.environ.get("LLM_CACHE_MAX_AGE_SECONDS", DEFAULT_MAX_AGE_SECONDS))
+                _shared_cache = ResponseCache(db_path or None, max_entries=max_entries, max_rows=max_rows,
+                                              max_age=max_age)
+    return _shared_cache
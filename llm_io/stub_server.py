@@ -0,0 +1,104 @@
+"""
+Local stand-in for the OpenAI responses API, serving recordings made with LLM_BACKEND=record.
+
+    python -m llm_io.stub_server --recordings llm_recordings.jsonl --port 8001 --latency-ms 800
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=stub python api.py
+
+Only POST /v1/responses is implemented, with just enough of the response object for
+the openai client's output_text. Unrecorded requests get a 404.
+"""
+import argparse
+import json
+import logging
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_io.backends import DEFAULT_RECORDINGS_PATH, ModelBackend, RecordingNotFound, ReplayBackend
+
+logger = logging.getLogger(__name__)
+
+
+def make_response(model, text):
+    """A minimal responses API object whose output_text is text"""
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "status": "completed",
+        "model": model,
+        "output": [{
+            "id": f"msg_{uuid.uuid4().hex}",
+            "type": "message",
+            "role": "assistant",
+            "status": "completed",
+            "content": [{"type": "output_text", "text": text, "annotations": []}],
+        }],
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers /v1/responses from self.server.backend"""
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/responses":
+            self.send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            text = self.server.backend.complete(body.get("model"), body.get("instructions"), body.get("input"),
+                                                text_format=(body.get("text") or {}).get("format"))
+        except RecordingNotFound as e:
+            self.send_json(404, {"error": {"message": str(e), "type": "not_found_error"}})
+            return
+        except Exception as e:
+            logger.error(f"Stub server error: {e}")
+            self.send_json(500, {"error": {"message": str(e), "type": "server_error"}})
+            return
+        self.send_json(200, make_response(body.get("model"), text))
+
+    def send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def make_server(backend: ModelBackend, host="127.0.0.1", port=8001) -> ThreadingHTTPServer:
+    """A threaded server answering /v1/responses from backend; port 0 picks a free port"""
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.backend = backend
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recordings", default=DEFAULT_RECORDINGS_PATH, help="JSONL recordings to serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Synthetic latency per response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Up to this much extra random latency")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    server = make_server(ReplayBackend(args.recordings, args.latency_ms, args.jitter_ms), args.host, args.port)
+    logger.info(f"Serving {args.recordings} on http://{args.host}:{server.server_port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
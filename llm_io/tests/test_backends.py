@@ -0,0 +1,141 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from llm_io.backends import ModelBackend, RecordingBackend, RecordingNotFound, ReplayBackend
+from llm_io.model_io import CacheStore, ModelCall, ModelIO, arun_steps, run_steps
+from llm_io.stub_server import make_server
+
+
+class EchoBackend(ModelBackend):
+    def __init__(self):
+        self.calls = 0
+
+    def complete(self, model, instructions, input, text_format=None):
+        self.calls += 1
+        return f"{model}: {input.upper()}"
+
+
+class TestBackends(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "recordings.jsonl")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def record(self):
+        recorder = RecordingBackend(EchoBackend(), self.path)
+        recorder.complete("gpt-4.1", "prompt", "36 x 48 casement")
+        recorder.complete("gpt-4.1", "prompt", "34 x 34 awning")
+
+    def test_replay_serves_recordings(self):
+        """Recorded outputs replay for identical requests only"""
+        self.record()
+        replay = ReplayBackend(self.path)
+        self.assertEqual(replay.complete("gpt-4.1", "prompt", "36 x 48 casement"), "gpt-4.1: 36 X 48 CASEMENT")
+        with self.assertRaises(RecordingNotFound):
+            replay.complete("gpt-4.1", "changed prompt", "36 x 48 casement")
+
+    def test_replay_latency(self):
+        self.record()
+        replay = ReplayBackend(self.path, latency_ms=50)
+        start = time.perf_counter()
+        replay.complete("gpt-4.1", "prompt", "34 x 34 awning")
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
+
+    def test_model_io_with_backend(self):
+        """ModelIO calls its backend and turns backend errors into None"""
+        self.record()
+        model = ModelIO("openai", "gpt-4.1", "prompt", use_cache=False, backend=ReplayBackend(self.path))
+        self.assertEqual(model.get_response("34 x 34 awning"), "gpt-4.1: 34 X 34 AWNING")
+        self.assertIsNone(model.get_response("unrecorded"))
+        self.assertIsNone(model.client)
+
+    def test_async_replay_waits_without_threads(self):
+        """Concurrent acomplete calls overlap their latency on one event loop"""
+        self.record()
+        model = ModelIO("openai", "gpt-4.1", "prompt", use_cache=False, backend=ReplayBackend(self.path, latency_ms=100))
+
+        async def quote_many():
+            return await asyncio.gather(*(model.aget_response("34 x 34 awning") for _ in range(50)))
+        start = time.perf_counter()
+        responses = asyncio.run(quote_many())
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual(set(responses), {"gpt-4.1: 34 X 34 AWNING"})
+        self.assertIsNone(asyncio.run(model.aget_response("unrecorded")))
+
+    def test_default_acomplete_runs_complete(self):
+        backend = EchoBackend()
+        model = ModelIO("openai", "gpt-4.1", "prompt", use_cache=False, backend=backend)
+        self.assertEqual(asyncio.run(model.aget_response("casement")), "gpt-4.1: CASEMENT")
+        self.assertEqual(backend.calls, 1)
+
+    def test_steps_run_sync_and_async(self):
+        """A step generator gives the same result whichever driver makes its calls"""
+        model = ModelIO("openai", "gpt-4.1", "prompt", use_cache=False, backend=EchoBackend())
+
+        def steps():
+            first = yield ModelCall(model, "casement")
+            second = yield ModelCall(model, first.lower(), use_cache=False)
+            return [first, second]
+        expected = ["gpt-4.1: CASEMENT", "gpt-4.1: GPT-4.1: CASEMENT"]
+        self.assertEqual(run_steps(steps()), expected)
+        self.assertEqual(asyncio.run(arun_steps(steps())), expected)
+
+    def test_async_steps_use_the_cache_off_the_event_loop(self):
+        """arun_steps reads and writes the SQLite response cache from worker threads"""
+        model = ModelIO("openai", "gpt-4.1", "prompt", backend=EchoBackend())
+        model.cache = mock.Mock(get=mock.Mock(return_value=None))
+        threads = []
+        model.cache.get.side_effect = lambda key: threads.append(threading.current_thread())
+        model.cache.set.side_effect = lambda *args, **kwargs: threads.append(threading.current_thread())
+
+        def steps():
+            response = yield ModelCall(model, "casement")
+            yield CacheStore(model, "casement", response)
+            return response
+        self.assertEqual(asyncio.run(arun_steps(steps())), "gpt-4.1: CASEMENT")
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.main_thread(), threads)
+        self.assertEqual(model.cache.set.call_args.args[1], "gpt-4.1: CASEMENT")
+
+        threads.clear()
+        self.assertEqual(run_steps(steps()), "gpt-4.1: CASEMENT")
+        self.assertEqual(threads, [threading.main_thread()] * 2)
+
+    def test_stub_server_with_openai_client(self):
+        """The stub server answers the real openai client's responses.create"""
+        from openai import OpenAI
+
+        self.record()
+        server = make_server(ReplayBackend(self.path), port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        client = OpenAI(api_key="stub", base_url=f"http://127.0.0.1:{server.server_port}/v1", max_retries=0)
+        response = client.responses.create(model="gpt-4.1", instructions="prompt", input="36 x 48 casement")
+        self.assertEqual(response.output_text, "gpt-4.1: 36 X 48 CASEMENT")
+
+    def test_stub_server_with_async_openai_client(self):
+        """OpenAIBackend.acomplete goes through AsyncOpenAI"""
+        self.record()
+        server = make_server(ReplayBackend(self.path), port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        from llm_io.backends import OpenAIBackend
+        env = {"OPENAI_API_KEY": "stub", "OPENAI_BASE_URL": f"http://127.0.0.1:{server.server_port}/v1"}
+        with mock.patch.dict(os.environ, env):
+            model = ModelIO("openai", "gpt-4.1", "prompt", use_cache=False, backend=OpenAIBackend("stub"))
+            self.assertEqual(asyncio.run(model.aget_response("36 x 48 casement")), "gpt-4.1: 36 X 48 CASEMENT")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import stat
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from llm_io import response_cache
+from llm_io.response_cache import ResponseCache
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "cache.sqlite3")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_key_depends_on_model_instructions_and_input(self):
+        """Changing any part of the request (e.g. window.yaml inlined in the prompt) changes the key"""
+        key = ResponseCache.make_key("gpt-4.1", "prompt with window.yaml v1", "36 x 48 casement")
+        self.assertEqual(key, ResponseCache.make_key("gpt-4.1", "prompt with window.yaml v1", "36 x 48 casement"))
+        self.assertNotEqual(key, ResponseCache.make_key("gpt-4.1-mini", "prompt with window.yaml v1", "36 x 48 casement"))
+        self.assertNotEqual(key, ResponseCache.make_key("gpt-4.1", "prompt with window.yaml v2", "36 x 48 casement"))
+        self.assertNotEqual(key, ResponseCache.make_key("gpt-4.1", "prompt with window.yaml v1", "36 x 48 awning"))
+
+    def test_memory_tier_lru(self):
+        """The in-process tier evicts the least recently used entry"""
+        cache = ResponseCache(db_path=None, max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        self.assertEqual(cache.get("a"), "1")
+        cache.set("c", "3")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "1")
+        self.assertEqual(cache.get("c"), "3")
+
+    def test_disk_tier_shared_between_instances(self):
+        """Entries written by one worker are visible to another using the same database"""
+        writer = ResponseCache(db_path=self.db_path)
+        reader = ResponseCache(db_path=self.db_path)
+        self.assertIsNone(reader.get("key"))
+
+        writer.set("key", "width: 36", model="gpt-4.1")
+
+        self.assertEqual(reader.get("key"), "width: 36")
+        self.assertEqual(reader.stats["disk_hits"], 1)
+        self.assertEqual(reader.get("key"), "width: 36")
+        self.assertEqual(reader.stats["memory_hits"], 1)
+
+    def test_none_is_not_stored(self):
+        cache = ResponseCache(db_path=self.db_path)
+        cache.set("key", None)
+        self.assertIsNone(cache.get("key"))
+
+    def test_database_directory_is_private(self):
+        """A missing cache directory is created for this user only, whatever the umask"""
+        db_path = os.path.join(self.tmp_dir.name, "cache", "llm_cache.sqlite3")
+        old_umask = os.umask(0o022)
+        try:
+            ResponseCache(db_path=db_path).set("key", "width: 36")
+        finally:
+            os.umask(old_umask)
+        self.assertEqual(stat.S_IMODE(os.stat(os.path.dirname(db_path)).st_mode), 0o700)
+        self.assertEqual(ResponseCache(db_path=db_path).get("key"), "width: 36")
+
+    def test_expired_entries_not_served_and_pruned(self):
+        writer = ResponseCache(db_path=self.db_path, max_age=60)
+        with mock.patch("time.time", return_value=time.time() - 120):
+            writer.set("old", "width: 36")
+        writer.set("new", "width: 48")
+
+        reader = ResponseCache(db_path=self.db_path, max_age=60)
+        self.assertIsNone(reader.get("old"))
+        self.assertEqual(reader.get("new"), "width: 48")
+        self.assertEqual(reader.stats["pruned"], 1)
+
+    def test_oldest_rows_pruned_beyond_max_rows(self):
+        cache = ResponseCache(db_path=self.db_path, max_entries=0, max_rows=3)
+        now = time.time()
+        with mock.patch.object(response_cache, "PRUNE_INTERVAL", 5):
+            for n in range(5):
+                with mock.patch("time.time", return_value=now - 5 + n):
+                    cache.set(f"key{n}", f"width: {n}")
+        self.assertEqual(cache.stats["pruned"], 2)
+        self.assertEqual([cache.get(f"key{n}") for n in range(5)], [None, None, "width: 2", "width: 3", "width: 4"])
+
+
+if __name__ == '__main__':
+    unittest.main()
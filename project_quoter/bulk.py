@@ -0,0 +1,251 @@
+"""
+Quote many projects offline, e.g. historical or imported quotes.
+
+    python -m project_quoter.bulk projects.jsonl --output quotes.jsonl --workers 8
+    python -m project_quoter.bulk projects.jsonl --output quotes.sqlite --pipeline batched
+
+Each input line is a project as POSTed to /quote_project ({"project_name", "project_description",
+"window_descriptions"}), optionally with an "id" (default: its line number). Projects are
+quoted by ProjectQuoter.quote_project, the same code path as the API, on a pool of worker
+processes. Results are written as they finish, one per project, to JSONL or SQLite (chosen by
+the output extension: .sqlite/.sqlite3/.db for SQLite).
+
+The output doubles as the checkpoint: rerunning with the same output skips projects already
+quoted successfully and retries the ones that raised. Model responses that passed validation
+are also kept in the shared response cache (LLM_CACHE_PATH), so a project interrupted midway
+doesn't pay again for the windows it had finished.
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SQLITE_EXTENSIONS = (".sqlite", ".sqlite3", ".db")
+
+# The worker process's ProjectQuoter, built once by init_worker
+_project_quoter = None
+
+
+def read_projects(path, id_field="id") -> Iterator[Tuple[str, Dict]]:
+    """Yield (project_id, project) for each non-empty line of a JSONL file"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if line.strip():
+                project = json.loads(line)
+                yield str(project.get(id_field, line_number)), project
+
+
+class JsonlResults:
+    """Results appended to a JSONL file, one object per line; later lines for an id win"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "a+", encoding="utf-8")
+        # Start on a new line if an interrupted run left a partial one
+        if self.file.tell() > 0:
+            self.file.seek(self.file.tell() - 1)
+            if self.file.read(1) != "\n":
+                self.file.write("\n")
+
+    def completed_ids(self) -> Set[str]:
+        status = {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # A line cut short by an interrupted run
+                status[record["id"]] = record["status"]
+        return {project_id for project_id, project_status in status.items() if project_status == "ok"}
+
+    def write(self, record: Dict):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class SqliteResults:
+    """Results in a SQLite table keyed by project id"""
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, project_name TEXT, total_cost REAL, "
+            "price_breakdown TEXT, error TEXT, elapsed_s REAL, quoted_at REAL)")
+        self.connection.commit()
+
+    def completed_ids(self) -> Set[str]:
+        return {row[0] for row in self.connection.execute("SELECT id FROM results WHERE status = 'ok'")}
+
+    def write(self, record: Dict):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO results (id, status, project_name, total_cost, price_breakdown, error, "
+            "elapsed_s, quoted_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (record["id"], record["status"], record.get("project_name"), record.get("total_cost"),
+             json.dumps(record["price_breakdown"]) if "price_breakdown" in record else None,
+             record.get("error"), record["elapsed_s"], record["quoted_at"]))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+def open_results(path):
+    if path.lower().endswith(SQLITE_EXTENSIONS):
+        return SqliteResults(path)
+    return JsonlResults(path)
+
+
+def init_worker(model_name, pipeline, output_format, max_concurrency, log_level=logging.WARNING):
+    """Build this process's ProjectQuoter; it is reused for every project the process quotes"""
+    global _project_quoter
+    from project_quoter import ProjectQuoter
+    logging.basicConfig(level=log_level, format='%(asctime)s - %(process)d - %(name)s - %(levelname)s - %(message)s')
+    _project_quoter = ProjectQuoter(model_name, pipeline=pipeline, output_format=output_format,
+                                    max_concurrency=max_concurrency)
+
+
+def _init_pool_worker(worker_initializer, *init_args):
+    if worker_initializer is not None:
+        worker_initializer()
+    init_worker(*init_args)
+
+
+def quote_one(project_id: str, project: Dict) -> Dict:
+    """Quote one project in this worker; exceptions become an "error" record instead of escaping"""
+    start = time.perf_counter()
+    record = {"id": project_id, "project_name": project.get("project_name")}
+    try:
+        total_cost, price_breakdown = _project_quoter.quote_project(project)
+        record.update(status="ok", total_cost=total_cost, price_breakdown=price_breakdown)
+    except Exception as e:
+        logger.error(f"Failed to quote project {project_id}: {e}")
+        record.update(status="error", error=f"{type(e).__name__}: {e}")
+    record["elapsed_s"] = round(time.perf_counter() - start, 3)
+    record["quoted_at"] = time.time()
+    return record
+
+
+class Progress:
+    """Throughput and ETA, printed to stderr at most every interval seconds"""
+
+    def __init__(self, total, interval=5.0, stream=sys.stderr):
+        self.total = total
+        self.interval = interval
+        self.stream = stream
+        self.done = self.errors = 0
+        self.started = self.last_print = time.perf_counter()
+
+    def update(self, record):
+        self.done += 1
+        self.errors += record["status"] != "ok"
+        now = time.perf_counter()
+        if now - self.last_print >= self.interval or self.done == self.total:
+            self.last_print = now
+            print(self.line(now), file=self.stream, flush=True)
+
+    def line(self, now=None):
+        elapsed = (now or time.perf_counter()) - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / rate if rate > 0 else float("inf")
+        return (f"{self.done}/{self.total} projects ({self.done / max(self.total, 1):.0%}), {self.errors} errors, "
+                f"{rate * 60:.1f} projects/min, elapsed {format_seconds(elapsed)}, ETA {format_seconds(eta)}")
+
+
+def format_seconds(seconds):
+    if seconds == float("inf"):
+        return "?"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+def run(input_path, output_path, workers=4, model_name="gpt-4.1", pipeline="per_window", output_format="yaml",
+        max_concurrency=8, id_field="id", limit=None, progress_interval=5.0, mp_context=None,
+        worker_initializer=None) -> Dict:
+    """
+    Quote every project in input_path not already quoted in output_path. With workers <= 1
+    projects are quoted in this process. Returns counts: {"skipped", "quoted", "errors"}.
+
+    mp_context is the multiprocessing context for the worker pool (default: the platform's
+    start method). worker_initializer, a picklable callable, runs first in each worker
+    process: under spawn or forkserver workers inherit nothing set up in this process.
+    """
+    results = open_results(output_path)
+    try:
+        completed = results.completed_ids()
+        todo = [(project_id, project) for project_id, project in read_projects(input_path, id_field)
+                if project_id not in completed]
+        if limit is not None:
+            todo = todo[:limit]
+        logger.info(f"{len(completed)} projects already quoted, {len(todo)} to quote")
+        progress = Progress(len(todo), progress_interval)
+        init_args = (model_name, pipeline, output_format, max_concurrency)
+
+        def record_result(record):
+            results.write(record)
+            progress.update(record)
+
+        if workers <= 1:
+            init_worker(*init_args, logging.getLogger().level or logging.WARNING)
+            for project_id, project in todo:
+                record_result(quote_one(project_id, project))
+        else:
+            # Keep a bounded number of projects queued so results are written as they finish
+            # and an interrupt loses at most the projects in flight
+            with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context, initializer=_init_pool_worker,
+                                     initargs=(worker_initializer, *init_args)) as executor:
+                pending = set()
+                projects = iter(todo)
+                for project_id, project in projects:
+                    pending.add(executor.submit(quote_one, project_id, project))
+                    if len(pending) >= workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            record_result(future.result())
+                for future in wait(pending).done:
+                    record_result(future.result())
+        return {"skipped": len(completed), "quoted": progress.done - progress.errors, "errors": progress.errors}
+    finally:
+        results.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL file of projects")
+    parser.add_argument("--output", required=True, help="Results file: .jsonl, or .sqlite/.sqlite3/.db")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (default: CPUs)")
+    parser.add_argument("--model", default="gpt-4.1")
+    parser.add_argument("--pipeline", default="per_window", choices=["per_window", "batched", "single_call"])
+    parser.add_argument("--output-format", default="yaml", choices=["yaml", "json"], help="Model output format")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="Model calls in flight per project")
+    parser.add_argument("--id-field", default="id", help="Project field used as its id (default: line number)")
+    parser.add_argument("--limit", type=int, help="Quote at most this many projects this run")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="Seconds between progress lines")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    try:
+        counts = run(args.input, args.output, workers=args.workers, model_name=args.model, pipeline=args.pipeline,
+                     output_format=args.output_format, max_concurrency=args.max_concurrency,
+                     id_field=args.id_field, limit=args.limit, progress_interval=args.progress_interval)
+    except KeyboardInterrupt:
+        print("Interrupted; rerun the same command to resume", file=sys.stderr)
+        return 130
+    print(f"Done: {counts['quoted']} quoted, {counts['errors']} errors, {counts['skipped']} already quoted",
+          file=sys.stderr)
+    return 1 if counts["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+from llm_io.model_io import CacheStore, ModelCall, ModelIO, arun_steps, run_steps
+from valid_config_generator.config_model import WindowConfig
+from valid_config_generator.config_validator import ConfigValidator
+from valid_config_generator.valid_config_generator import ValidConfigGenerator
+from valid_config_generator import schema
+from util import metrics
+from util.timing import NULL_TIMINGS
+from typing import Dict, List, Optional, Tuple
+import json
+import yaml
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ProjectConfigGenerator:
+    """
+    Splits a project's window descriptions and generates every window's config in one model
+    call, instead of a WindowDescriptionParser call followed by a ValidConfigGenerator call
+    per window. Windows whose configs don't validate are repaired together in one follow-up
+    call, so a project takes one or two model calls whatever its size.
+    """
+
+    prompt_instructions = """The input is a free-text quote for a window replacement project. Split it into its windows and return:
+windows:
+  window_<N>: # N = 1, 2, ... in the order the windows appear
+    quantity: # number of identical windows, integer @Required
+    description: # the text describing this window @Required
+    config: # this window's config as specified below; width and height are this window's @Required
+Settings after "Project description:" apply to every window, but only where the window's own text doesn't set them.
+
+Instructions for each window's config:
+"""
+
+    json_output_instructions = """
+For the project, respond with JSON matching the response schema instead of YAML. windows is a list;
+window is N (1, 2, ...) in the order the windows appear, and repaired windows keep their N.
+"""
+
+    repair_message = ("These windows were invalid. Return only these windows, with the errors fixed and everything "
+                      "else the same, in the same format: {errors}")
+
+    OUTPUT_FORMATS = ValidConfigGenerator.OUTPUT_FORMATS
+
+    def __init__(self, model_name, output_format="yaml"):
+        """
+        output_format: "yaml" (default) asks for YAML text; "json" constrains the model to
+        json_schema() with structured output.
+        """
+        if output_format not in self.OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output_format '{output_format}', expected one of {self.OUTPUT_FORMATS}")
+        self.output_format = output_format
+        text_format = None
+        if output_format == "json":
+            text_format = {"type": "json_schema", "name": "project_configs", "schema": self.json_schema(),
+                           "strict": True}
+        self.model = ModelIO("openai", model_name, self.generate_prompt(), caller="project_config_generator",
+                             text_format=text_format)
+        self.config_validator = ConfigValidator()
+
+    def generate_prompt(self):
+        prompt = self.prompt_instructions + ValidConfigGenerator.default_prompt("compact", self.output_format)
+        if self.output_format == "json":
+            prompt += self.json_output_instructions
+        return prompt
+
+    @staticmethod
+    def json_schema():
+        """Strict structured output schema: a list of numbered windows, each with its config"""
+        window = {
+            "type": "object",
+            "properties": {
+                "window": {"type": "integer"},
+                "quantity": {"type": "integer"},
+                "description": {"type": "string"},
+                "config": schema.config_json_schema(),
+            },
+            "required": ["window", "quantity", "description", "config"],
+            "additionalProperties": False,
+        }
+        return {
+            "type": "object",
+            "properties": {"windows": {"type": "array", "items": window}},
+            "required": ["windows"],
+            "additionalProperties": False,
+        }
+
+    def format_input(self, window_descriptions: str, project_description: str = None) -> str:
+        if project_description:
+            return f"{window_descriptions}\n\nProject description: {project_description}"
+        return window_descriptions
+
+    def parse_response(self, response):
+        """
+        Parse a response into {window_N: window}, converting json output to the yaml shape.
+
+        Returns:
+            tuple: (windows, error), error being None or a message fit to send back to the model
+        """
+        if response is None:
+            return None, "No response was received, return every window"
+        try:
+            if self.output_format == "json":
+                data = json.loads(response)
+                windows = data.get("windows") if isinstance(data, dict) else None
+                if not isinstance(windows, list):
+                    return None, "Missing required top-level list 'windows'"
+                return {f"window_{window.get('window')}": {**window, "config": schema.config_from_json(window.get("config"))}
+                        for window in windows if isinstance(window, dict)}, None
+            data = yaml.safe_load(response)
+        except yaml.YAMLError as e:
+            metrics.VALIDATION_FAILURES.labels("yaml_parse").inc()
+            return None, f"Could not create dict using yaml.safe_load(), reconstruct response to be in yaml format: {e}"
+        except ValueError as e:
+            metrics.VALIDATION_FAILURES.labels("json_parse").inc()
+            return None, f"Could not parse the response as JSON, return only JSON matching the schema: {e}"
+        windows = data.get("windows") if isinstance(data, dict) else None
+        if not isinstance(windows, dict):
+            return None, "Missing required top-level key 'windows', a dictionary of window_<N> keys"
+        return windows, None
+
+    def validate_window(self, window) -> Tuple[Optional[WindowConfig], List[str]]:
+        """
+        (window_config, errors) for one window's quantity, description and config, window_config
+        being the WindowConfig built while validating its config (None if that is invalid)
+        """
+        if not isinstance(window, dict):
+            return None, ["Window must be a dictionary with quantity, description and config"]
+        errors = []
+        quantity = window.get("quantity")
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity <= 0:
+            errors.append(f"quantity must be a positive integer, got {quantity!r}")
+        if not isinstance(window.get("description"), str):
+            errors.append("Required key missing: 'description'")
+        window_config, config_errors = self.config_validator.parse(window.get("config"))
+        for error in config_errors:
+            metrics.VALIDATION_FAILURES.labels(ConfigValidator.error_type(error)).inc()
+        return window_config, errors + config_errors
+
+    def validate_windows(self, windows: Dict) -> Tuple[Dict[str, WindowConfig], Dict[str, List[str]]]:
+        """(window_configs, errors), both keyed on window; only valid windows have a config"""
+        window_configs, errors = {}, {}
+        for key, window in windows.items():
+            window_config, window_errors = self.validate_window(window)
+            if not key.startswith("window_") or not key[len("window_"):].isdigit():
+                window_errors.insert(0, f"Window key '{key}' does not follow 'window_N' convention")
+            if window_errors:
+                errors[key] = window_errors
+            else:
+                window_configs[key] = window_config
+        return window_configs, errors
+
+    def generate_project_configs(self, window_descriptions: str, project_description: str = None,
+                                 timings=NULL_TIMINGS) -> Tuple[Dict, Dict]:
+        """
+        Split window_descriptions into windows and generate their configs.
+
+        Returns:
+            tuple: (windows, failed), windows being {window_N: {"quantity", "width", "height",
+            "description", "config"}} in window order, "config" being the validated WindowConfig,
+            or None for windows that failed, and failed being {window_N: errors}. ({}, {}) if the project couldn't be
+            split at all.
+        """
+        return run_steps(self.project_config_steps(window_descriptions, project_description, timings))
+
+    async def agenerate_project_configs(self, window_descriptions: str, project_description: str = None,
+                                        timings=NULL_TIMINGS) -> Tuple[Dict, Dict]:
+        """generate_project_configs() with the model calls awaited"""
+        return await arun_steps(self.project_config_steps(window_descriptions, project_description, timings))
+
+    def project_config_steps(self, window_descriptions: str, project_description: str = None, timings=NULL_TIMINGS):
+        """generate_project_configs() as a step generator (see llm_io.model_io.run_steps)"""
+        input = self.format_input(window_descriptions, project_description)
+        with timings.stage("llm"):
+            response = yield ModelCall(self.model, input)
+        with timings.stage("validate"):
+            windows, error = self.parse_response(response)
+            window_configs, errors = self.validate_windows(windows) if windows is not None else ({}, {"response": [error]})
+
+        if errors:
+            timings.increment("repairs")
+            logger.debug(f"Repairing {len(errors)} windows: {errors}")
+            repair_errors = yaml.safe_dump(errors, sort_keys=False)
+            if response is not None:
+                input = ModelIO.continuation(input, response, self.repair_message.format(errors=repair_errors))
+            with timings.stage("llm"):
+                repair_response = yield ModelCall(self.model, input, use_cache=False)
+            with timings.stage("validate"):
+                repaired, repair_error = self.parse_response(repair_response)
+                if repaired is None:
+                    logger.warning(f"Could not parse the repair response: {repair_error}")
+                    repaired = {}
+                # Repaired windows replace the invalid ones; without a usable first response they are all there is
+                windows = {**(windows or {}), **repaired}
+                window_configs, errors = self.validate_windows(windows)
+        elif response is not None:
+            # Only fully valid first responses are cached, keyed on the project text
+            yield CacheStore(self.model, input, response)
+
+        if not windows:
+            logger.error("Failed to split the project into windows")
+            return {}, {}
+        result, failed = {}, {}
+        for key in sorted(windows, key=lambda key: int(key[len("window_"):]) if key[len("window_"):].isdigit() else 0):
+            window = windows[key] if isinstance(windows[key], dict) else {}
+            config = window.get("config") if isinstance(window.get("config"), dict) else {}
+            quantity = window.get("quantity")
+            result[key] = {
+                "quantity": quantity if isinstance(quantity, int) and quantity > 0 else 1,
+                "width": config.get("width"),
+                "height": config.get("height"),
+                "description": window.get("description", ""),
+                "config": window_configs.get(key),
+            }
+            if key in errors:
+                logger.error(f"Failed to generate a valid config for {key}: {errors[key]}")
+                failed[key] = errors[key]
+        return result, failed
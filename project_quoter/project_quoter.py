@@ -1,22 +1,81 @@
+from window_quoter.pricing_catalog import DEFAULT_PRICING_CONFIG_PATH
 from window_quoter.window_quoter import WindowQuoter
+from valid_config_generator.config_model import WindowConfig
 from valid_config_generator.valid_config_generator import ValidConfigGenerator
 from .window_description_parser import WindowDescriptionParser
-from typing import List, Dict, Tuple, Union
+from .project_config_generator import ProjectConfigGenerator
+from util import metrics
+from util.timing import NULL_TIMINGS, StageTimings
+from typing import AsyncIterator, Iterator, List, Dict, Optional, Tuple, Union
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
 import json
 import os
 import logging
+import threading
+import time
 
-# TODO combine valid_config_generator/window_description_parser
 # TODO add width/height bounds
 
 logger = logging.getLogger(__name__)
 
 class ProjectQuoter:
-    def __init__(self, model_name: str, pricing_config_path: str = "valid_config_generator/pricing.yaml", debug = False):
+    PIPELINES = ("per_window", "batched", "single_call")
+
+    def __init__(self, model_name: str, pricing_config_path: str = DEFAULT_PRICING_CONFIG_PATH, debug = False, max_concurrency: int = 8,
+                 output_format: str = "yaml", pipeline: str = "per_window"):
+        """
+        pipeline: "per_window" (default) splits the project with one model call and then generates
+        each window's config with its own call (the shorthand fast path first); "batched" does the
+        same but deduplicates the windows and configures several per call (see
+        ValidConfigGenerator.generate_configs); "single_call" splits
+        and configures every window in one call, plus one repair call if any window is invalid
+        (see ProjectConfigGenerator).
+        """
+        if pipeline not in self.PIPELINES:
+            raise ValueError(f"Unknown pipeline '{pipeline}', expected one of {self.PIPELINES}")
         self.pricing_config_path = pricing_config_path
         self.model_name = model_name
         self.debug = debug
+        # Max windows whose configs are generated (LLM calls in flight) at once per project
+        self.max_concurrency = max_concurrency
+        # "yaml" or "json" (structured output), for both the description parser and config generator
+        self.output_format = output_format
+        self.pipeline = pipeline
+        # Built on first use and reused by every project quoted with this instance. Both are
+        # safe to share between threads; their ModelIOs share the process-wide OpenAI client.
+        self._description_parser = None
+        self._config_generator = None
+        self._project_config_generator = None
+        self._init_lock = threading.Lock()
+
+    def get_description_parser(self) -> WindowDescriptionParser:
+        """The WindowDescriptionParser shared by every project quoted with this instance"""
+        if self._description_parser is None:
+            with self._init_lock:
+                if self._description_parser is None:
+                    self._description_parser = WindowDescriptionParser(
+                        self.model_name, debug=self.debug, output_format=self.output_format)
+        return self._description_parser
+
+    def get_config_generator(self) -> ValidConfigGenerator:
+        """The ValidConfigGenerator shared by every project quoted with this instance"""
+        if self._config_generator is None:
+            with self._init_lock:
+                if self._config_generator is None:
+                    self._config_generator = ValidConfigGenerator(
+                        self.model_name, debug=self.debug, output_format=self.output_format)
+        return self._config_generator
+
+    def get_project_config_generator(self) -> ProjectConfigGenerator:
+        """The ProjectConfigGenerator for the single_call pipeline, shared like the others"""
+        if self._project_config_generator is None:
+            with self._init_lock:
+                if self._project_config_generator is None:
+                    self._project_config_generator = ProjectConfigGenerator(
+                        self.model_name, output_format=self.output_format)
+        return self._project_config_generator
     
     def format_window_description(self, window_data: Dict, project_description: str = None) -> str:
         """Format window data into a description string for config generation"""
@@ -42,70 +101,270 @@ class ProjectQuoter:
                 except:
                     pass  # Ignore cleanup errors
             
-    def quote_project(self, project_dict: Dict, debug_file_prefix: str = "") -> Tuple[float, Dict]:
-        """Quote all windows in the project and return total cost and breakdown"""
-        failed_configs = []
-        project_breakdown = {}
-        total_cost = 0.0
-        successful_window_num = 0
-        labour_sum = 0
+    def generate_window_config(self, config_generator: ValidConfigGenerator, job: Tuple, timings: StageTimings = NULL_TIMINGS) -> Optional[WindowConfig]:
+        """Generate the config for one (window_num, description, quantity, debug_file) job"""
+        i, description, _, config_file = job
+        window_timings = timings.window(f"Window {i}")
+        with window_timings.stage("config_generation"):
+            return config_generator.generate_config(description, debug_file_path=config_file, timings=window_timings)
+
+    def iter_generated_configs(self, config_generator: ValidConfigGenerator, jobs: List[Tuple], timings: StageTimings = NULL_TIMINGS) -> Iterator[Tuple[Tuple, Optional[WindowConfig]]]:
+        """
+        Generate configs for (window_num, description, quantity, debug_file) jobs on a thread pool,
+        with at most max_concurrency LLM conversations in flight. Yields (job, config) as each
+        window finishes, so the order is completion order rather than window order.
+        """
+        if self.max_concurrency <= 1 or len(jobs) <= 1:
+            for job in jobs:
+                yield job, self.generate_window_config(config_generator, job, timings)
+            return
+
+        executor = ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(jobs)))
+        finished = False
+        try:
+            futures = {executor.submit(self.generate_window_config, config_generator, job, timings): job for job in jobs}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+            finished = True
+        finally:
+            # If the consumer went away (a streaming client disconnected) or a window raised, drop
+            # the queued windows instead of waiting for them; calls already in flight finish alone
+            executor.shutdown(wait=finished, cancel_futures=not finished)
+
+    def generate_configs(self, config_generator: ValidConfigGenerator, jobs: List[Tuple], timings: StageTimings = NULL_TIMINGS) -> List[Optional[WindowConfig]]:
+        """Generate configs concurrently (see iter_generated_configs) and return them in job order"""
+        configs = {job[0]: config for job, config in self.iter_generated_configs(config_generator, jobs, timings)}
+        return [configs[job[0]] for job in jobs]
+
+    def quote_window_config(self, i: int, formatted_description: str, quantity: int, config: Optional[WindowConfig], timings: StageTimings = NULL_TIMINGS) -> Tuple[Union[Dict, None], Union[Tuple, None]]:
+        """
+        Price one generated window config.
+
+        Returns (window_entry, None) on success, where window_entry holds cost, breakdown and
+        quantity, or (None, failure) with failure being (window_num, description, error).
+        """
+        if not config:
+            logger.error(f"Failed to generate valid config for window {i}")
+            return None, (i, formatted_description, "Config generation failed")
+        try:
+            # Create window quoter with generated config
+            with timings.window(f"Window {i}").stage("quote_window"):
+                window_cost, window_breakdown = WindowQuoter(config, self.pricing_config_path).quote_window()
+            if 'Error' in window_breakdown.keys():
+                logger.error(f"Failed to generate price breakdown for window {i}")
+                return None, (i, formatted_description, "Price breakdown generation failed")
+            logger.info(f"Successfully created quote for window {i}")
+            return {
+                'cost': window_cost,
+                'breakdown': window_breakdown,
+                'quantity': quantity
+            }, None
+        except Exception as e:
+            logger.error(f"Failed to create quote for window {i}: {e}")
+            return None, (i, formatted_description, str(e))
+
+    def stream_project(self, project_dict: Dict, debug_file_prefix: str = "", stats: Optional[Dict] = None,
+                       timings: StageTimings = NULL_TIMINGS) -> Iterator[Dict]:
+        """
+        Quote a project, yielding events as results become available:
+
+        - {"event": "windows", "windows": {...}}: the separated window descriptions
+        - {"event": "window", "window": "Window N", "quote": {...}}: a priced window, formatted as in format_json
+        - {"event": "window_failed", "window": "Window N", "error": "..."}: a window that could not be quoted
+        - {"event": "totals", "total_cost": float, "price_breakdown": {...}}: the full format_json breakdown, always last
+
+        If the descriptions can't be separated a single {"event": "error", "price_breakdown": {...}} is yielded instead.
+
+        If stats is given, stats["pre_llm_ms"] is set to the time spent before the first model call,
+        including building the generators on first use, measured from stats["request_start"] (a
+        time.perf_counter() value) if present, otherwise from the start of this call.
+
+        timings (util.timing.StageTimings) records the description_parser and format_json stages,
+        and per window the config_generation (with its llm, yaml_parse, validate and shorthand
+        sub-stages and retries) and quote_window stages. The single_call pipeline records
+        project_config_generation (with llm and validate sub-stages and repairs) instead of
+        description_parser and config_generation. The batched pipeline records one
+        config_generation stage for all windows, with the deduplicated count.
+        """
+        started = time.perf_counter()
         logger.debug(f"Project dict: {project_dict}")
+        project_description = project_dict.get('project_description')
+        if self.pipeline == "single_call":
+            project_config_generator = self.get_project_config_generator()
+        else:
+            description_parser, config_generator = self.get_description_parser(), self.get_config_generator()
+        self.record_pre_llm(stats, started)
 
-        # Initialize description parser
-        description_parser = WindowDescriptionParser(self.model_name, debug=self.debug)
-        
-        # Extract window descriptions and project description
-        description_debug_path = f"{debug_file_prefix}_window_descriptions.yaml" if debug_file_prefix else "window_descriptions.yaml"
-        window_descriptions = description_parser.generate_window_descriptions(project_dict['window_descriptions'], debug_file_path=description_debug_path)
+        if self.pipeline == "single_call":
+            # Descriptions and configs both come from one call (plus a repair call if needed)
+            with timings.stage("project_config_generation"):
+                windows, _ = project_config_generator.generate_project_configs(
+                    project_dict['window_descriptions'], project_description, timings=timings)
+            window_descriptions = self.descriptions_from_project_configs(windows)
+        else:
+            # Extract window descriptions
+            description_debug_path = f"{debug_file_prefix}_window_descriptions.yaml" if debug_file_prefix else "window_descriptions.yaml"
+            with timings.stage("description_parser"):
+                window_descriptions = description_parser.generate_window_descriptions(project_dict['window_descriptions'], debug_file_path=description_debug_path, timings=timings)
         if not window_descriptions:
-            project_breakdown["Error"] = "Unable to separate text description into separate window descriptions. Please add spaces or heading to demonstrate separate windows."
-            return 0, project_breakdown
+            yield self.separation_error_event()
+            return
+        metrics.WINDOWS_PER_PROJECT.observe(len(window_descriptions["windows"]))
+        yield {"event": "windows", "windows": window_descriptions["windows"]}
+
+        jobs = self.window_jobs(window_descriptions, project_description, debug_file_prefix)
+        if self.pipeline == "single_call":
+            generated = ((job, windows[window_key]["config"]) for job, window_key in zip(jobs, windows))
+        elif self.pipeline == "batched":
+            with timings.stage("config_generation"):
+                configs = config_generator.generate_configs(
+                    [job[1] for job in jobs], max_concurrency=self.max_concurrency, timings=timings)
+            generated = zip(jobs, configs)
+        else:
+            # Generate and validate configs concurrently, pricing each window as soon as its config is ready
+            generated = self.iter_generated_configs(config_generator, jobs, timings)
+        window_entries, failed_configs = {}, []
+        try:
+            for job, config in generated:
+                yield self.window_event(job, config, window_entries, failed_configs, timings)
+        finally:
+            # Stop generating configs as soon as this stream is closed (see iter_generated_configs)
+            if hasattr(generated, "close"):
+                generated.close()
+        yield self.totals_event(window_descriptions, window_entries, failed_configs, timings)
 
+    async def astream_project(self, project_dict: Dict, debug_file_prefix: str = "", stats: Optional[Dict] = None,
+                              timings: StageTimings = NULL_TIMINGS) -> AsyncIterator[Dict]:
+        """
+        stream_project() for the async serving path: the same events, with every model call
+        awaited instead of blocking a thread, so one event loop can quote many projects at once.
+        """
+        started = time.perf_counter()
+        logger.debug(f"Project dict: {project_dict}")
         project_description = project_dict.get('project_description')
-        
-        # Initialize the config generator
-        config_generator = ValidConfigGenerator(self.model_name, debug=self.debug)
-        
-        # Process each window description with quantity
+        if self.pipeline == "single_call":
+            project_config_generator = self.get_project_config_generator()
+        else:
+            description_parser, config_generator = self.get_description_parser(), self.get_config_generator()
+        self.record_pre_llm(stats, started)
+
+        if self.pipeline == "single_call":
+            with timings.stage("project_config_generation"):
+                windows, _ = await project_config_generator.agenerate_project_configs(
+                    project_dict['window_descriptions'], project_description, timings=timings)
+            window_descriptions = self.descriptions_from_project_configs(windows)
+        else:
+            description_debug_path = f"{debug_file_prefix}_window_descriptions.yaml" if debug_file_prefix else "window_descriptions.yaml"
+            with timings.stage("description_parser"):
+                window_descriptions = await description_parser.agenerate_window_descriptions(
+                    project_dict['window_descriptions'], debug_file_path=description_debug_path, timings=timings)
+        if not window_descriptions:
+            yield self.separation_error_event()
+            return
+        metrics.WINDOWS_PER_PROJECT.observe(len(window_descriptions["windows"]))
+        yield {"event": "windows", "windows": window_descriptions["windows"]}
+
+        jobs = self.window_jobs(window_descriptions, project_description, debug_file_prefix)
+        window_entries, failed_configs = {}, []
+        if self.pipeline == "per_window":
+            generated = self.aiter_generated_configs(config_generator, jobs, timings)
+            try:
+                async for job, config in generated:
+                    yield self.window_event(job, config, window_entries, failed_configs, timings)
+            finally:
+                await generated.aclose()
+        else:
+            if self.pipeline == "single_call":
+                configs = [windows[window_key]["config"] for window_key in windows]
+            else:
+                with timings.stage("config_generation"):
+                    configs = await config_generator.agenerate_configs(
+                        [job[1] for job in jobs], max_concurrency=self.max_concurrency, timings=timings)
+            for job, config in zip(jobs, configs):
+                yield self.window_event(job, config, window_entries, failed_configs, timings)
+        yield self.totals_event(window_descriptions, window_entries, failed_configs, timings)
+
+    async def aiter_generated_configs(self, config_generator: ValidConfigGenerator, jobs: List[Tuple],
+                                      timings: StageTimings = NULL_TIMINGS) -> AsyncIterator[Tuple[Tuple, Optional[WindowConfig]]]:
+        """iter_generated_configs() as tasks on the running event loop, at most max_concurrency at once"""
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+
+        async def generate(job):
+            i, description, _, config_file = job
+            window_timings = timings.window(f"Window {i}")
+            async with semaphore:
+                with window_timings.stage("config_generation"):
+                    return job, await config_generator.agenerate_config(
+                        description, debug_file_path=config_file, timings=window_timings)
+
+        tasks = [asyncio.ensure_future(generate(job)) for job in jobs]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # The client went away, or an earlier window raised: don't leave model calls running
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    def record_pre_llm(stats: Optional[Dict], started: float):
+        if stats is not None:
+            stats["pre_llm_ms"] = (time.perf_counter() - stats.get("request_start", started)) * 1000
+            logger.debug(f"Pre-LLM overhead: {stats['pre_llm_ms']:.2f}ms")
+
+    @staticmethod
+    def descriptions_from_project_configs(windows: Dict) -> Dict:
+        """The description parser's {"windows": ...} shape from ProjectConfigGenerator output"""
+        if not windows:
+            return {}
+        return {"windows": {
+            window_key: {key: window[key] for key in ("quantity", "width", "height", "description")}
+            for window_key, window in windows.items()}}
+
+    @staticmethod
+    def separation_error_event() -> Dict:
+        project_breakdown = {"Error": "Unable to separate text description into separate window descriptions. Please add spaces or heading to demonstrate separate windows."}
+        return {"event": "error", "price_breakdown": project_breakdown}
+
+    def window_jobs(self, window_descriptions: Dict, project_description: str = None,
+                    debug_file_prefix: str = "") -> List[Tuple]:
+        """(window_num, formatted description, quantity, debug_file) for each window"""
+        jobs = []
         for i, (window_key, window_data) in enumerate(window_descriptions["windows"].items(), 1):
             quantity = int(window_data['quantity'])
-            
-            # Format the window description with width, height, and project description
             formatted_description = self.format_window_description(window_data, project_description)
-            
             config_file = f"{debug_file_prefix}_temp_window_{i}.yaml" if debug_file_prefix else f"temp_window_{i}.yaml"
             logger.info(f"Processing window {i}: {formatted_description} (Quantity: {quantity})")
-            
-            # Generate and validate config
-            config = config_generator.generate_config(formatted_description, debug_file_path=config_file)
-            if config:
-                try:
-                    # Create window quoter with generated config
-                    window_cost, window_breakdown = WindowQuoter(config, self.pricing_config_path).quote_window()
-                    if 'Error' in window_breakdown.keys():
-                        logger.error(f"Failed to generate price breakdown for window {i}")
-                        failed_configs.append((i, formatted_description, "Price breakdown generation failed"))
-                    else:
-                        window_key = f"Window {i}"
-                        project_breakdown[window_key] = {
-                            'cost': window_cost,
-                            'breakdown': window_breakdown,
-                            'quantity': quantity
-                        }
-                        labour_sum += window_breakdown["labour"]
-                        # Add total cost for this window type (unit cost * quantity)
-                        total_window_cost = window_cost * quantity
-                        total_cost += total_window_cost
-                        successful_window_num += 1
-                        logger.info(f"Successfully created quote for window {i}")
-                except Exception as e:
-                    logger.error(f"Failed to create quote for window {i}: {e}")
-                    failed_configs.append((i, formatted_description, str(e)))
-            else:
-                logger.error(f"Failed to generate valid config for window {i}")
-                failed_configs.append((i, formatted_description, "Config generation failed"))
-        
-        
+            jobs.append((i, formatted_description, quantity, config_file))
+        return jobs
+
+    def window_event(self, job: Tuple, config: Optional[WindowConfig], window_entries: Dict, failed_configs: List,
+                     timings: StageTimings = NULL_TIMINGS) -> Dict:
+        """Price one window's config, adding it to window_entries or failed_configs, and return its event"""
+        i, formatted_description, quantity, _ = job
+        window_entry, failure = self.quote_window_config(i, formatted_description, quantity, config, timings)
+        if window_entry is None:
+            failed_configs.append(failure)
+            return {"event": "window_failed", "window": f"Window {i}", "error": failure[2]}
+        window_entries[i] = window_entry
+        with timings.stage("format_json"):
+            quote = self.format_window(window_entry)
+        return {"event": "window", "window": f"Window {i}", "quote": quote}
+
+    def totals_event(self, window_descriptions: Dict, window_entries: Dict, failed_configs: List,
+                     timings: StageTimings = NULL_TIMINGS) -> Dict:
+        """The final "totals" event, summing window_entries"""
+        project_breakdown = {}
+        total_cost = 0.0
+        labour_sum = 0
+        # Sum in window order so totals don't depend on which LLM call finished first
+        for i in sorted(window_entries):
+            window_entry = window_entries[i]
+            project_breakdown[f"Window {i}"] = window_entry
+            labour_sum += window_entry['breakdown']["labour"]
+            # Add total cost for this window type (unit cost * quantity)
+            total_cost += window_entry['cost'] * window_entry['quantity']
+        failed_configs = sorted(failed_configs, key=lambda failure: failure[0])
 
         # Add failed configs info
         if failed_configs:
@@ -118,7 +377,73 @@ class ProjectQuoter:
         project_breakdown['Labour'] = labour_sum
         project_breakdown['Total Project Cost'] = total_cost + labour_sum
         
-        return total_cost, self.format_json(project_breakdown)
+        with timings.stage("format_json"):
+            price_breakdown = self.format_json(project_breakdown)
+        return {"event": "totals", "total_cost": total_cost, "price_breakdown": price_breakdown}
+
+    def quote_project(self, project_dict: Dict, debug_file_prefix: str = "", stats: Optional[Dict] = None,
+                      timings: StageTimings = NULL_TIMINGS) -> Tuple[float, Dict]:
+        """Quote all windows in the project and return total cost and breakdown"""
+        for event in self.stream_project(project_dict, debug_file_prefix, stats, timings):
+            if event["event"] == "error":
+                return 0, event["price_breakdown"]
+            if event["event"] == "totals":
+                return event["total_cost"], event["price_breakdown"]
+
+    async def aquote_project(self, project_dict: Dict, debug_file_prefix: str = "", stats: Optional[Dict] = None,
+                             timings: StageTimings = NULL_TIMINGS) -> Tuple[float, Dict]:
+        """quote_project() on the async path (see astream_project)"""
+        async for event in self.astream_project(project_dict, debug_file_prefix, stats, timings):
+            if event["event"] == "error":
+                return 0, event["price_breakdown"]
+            if event["event"] == "totals":
+                return event["total_cost"], event["price_breakdown"]
+
+    def format_window(self, window_data: Dict) -> OrderedDict:
+        """Format one window's cost, breakdown and quantity for the project JSON"""
+        formatted_window = OrderedDict()
+        
+        # Add quantity first, then sf, lf
+        quantity = window_data.get('quantity', 1)
+        formatted_window['Quantity'] = quantity
+        
+        breakdown = window_data['breakdown']
+        formatted_window['Square Feet'] = f"{breakdown['sf']:.2f}"
+        formatted_window['Linear Feet'] = f"{breakdown['lf']:.2f}"
+        
+        formatted_breakdown = OrderedDict()
+        
+        # Handle new nested unit structure with proper formatting
+        for key, value in breakdown.items():
+            if key in ['sf', 'lf', 'labour']:
+                continue  # Skip these, already handled above
+            elif isinstance(value, dict):
+                # This is a unit breakdown (e.g., "unit_1 - casement")
+                unit_breakdown = OrderedDict()
+                formatted_key = key.replace('_', ' ').title()
+                for unit_key, unit_value in value.items():
+                    if isinstance(unit_value, (int, float)):
+                        unit_breakdown[unit_key] = f"${unit_value:.2f}"
+                    else:
+                        unit_breakdown[unit_key] = unit_value
+                formatted_breakdown[formatted_key] = unit_breakdown
+            elif isinstance(value, (int, float)):
+                # This is a window-level cost (brickmould, casing, etc.)
+                formatted_breakdown[key] = f"${value:.2f}"
+            else:
+                formatted_breakdown[key] = value
+        
+        formatted_window['Cost Breakdown'] = formatted_breakdown
+        
+        formatted_window['Window Cost (Single)'] = f"${window_data['cost']:.2f}"
+        
+        # Add Total (Quantity: N) line if quantity > 1
+        quantity = window_data.get('quantity', 1)
+        if quantity > 1:
+            total_cost = window_data['cost'] * quantity
+            formatted_window[f'Window Cost (Quantity: {quantity})'] = f"${total_cost:.2f}"
+        
+        return formatted_window
 
     def format_json(self, project_breakdown: Dict) -> OrderedDict:
         """Format project breakdown with ordered keys, starting with 'Quoted Windows'"""
@@ -132,51 +457,8 @@ class ProjectQuoter:
         window_keys = sorted([k for k in project_breakdown.keys() if k.startswith('Window ')], 
                            key=lambda x: int(x.split()[1]))
         for window_key in window_keys:
-            window_data = project_breakdown[window_key]
-            formatted_window = OrderedDict()
-            
-            # Add quantity first, then sf, lf
-            quantity = window_data.get('quantity', 1)
-            formatted_window['Quantity'] = quantity
-            
-            breakdown = window_data['breakdown']
-            formatted_window['Square Feet'] = f"{breakdown['sf']:.2f}"
-            formatted_window['Linear Feet'] = f"{breakdown['lf']:.2f}"
-            
-            formatted_breakdown = OrderedDict()
-            
-            # Handle new nested unit structure with proper formatting
-            for key, value in breakdown.items():
-                if key in ['sf', 'lf', 'labour']:
-                    continue  # Skip these, already handled above
-                elif isinstance(value, dict):
-                    # This is a unit breakdown (e.g., "unit_1 - casement")
-                    unit_breakdown = OrderedDict()
-                    formatted_key = key.replace('_', ' ').title()
-                    for unit_key, unit_value in value.items():
-                        if isinstance(unit_value, (int, float)):
-                            unit_breakdown[unit_key] = f"${unit_value:.2f}"
-                        else:
-                            unit_breakdown[unit_key] = unit_value
-                    formatted_breakdown[formatted_key] = unit_breakdown
-                elif isinstance(value, (int, float)):
-                    # This is a window-level cost (brickmould, casing, etc.)
-                    formatted_breakdown[key] = f"${value:.2f}"
-                else:
-                    formatted_breakdown[key] = value
-            
-            formatted_window['Cost Breakdown'] = formatted_breakdown
-            
-            formatted_window['Window Cost (Single)'] = f"${window_data['cost']:.2f}"
-            
-            # Add Total (Quantity: N) line if quantity > 1
-            quantity = window_data.get('quantity', 1)
-            if quantity > 1:
-                total_cost = window_data['cost'] * quantity
-                formatted_window[f'Window Cost (Quantity: {quantity})'] = f"${total_cost:.2f}"
-            
-            formatted[window_key] = formatted_window
-            logger.debug(f"Formatted window {window_key}: {formatted}")
+            formatted[window_key] = self.format_window(project_breakdown[window_key])
+            logger.debug(f"Formatted window {window_key}: {formatted[window_key]}")
 
         
         # Add Failed Windows if it exists
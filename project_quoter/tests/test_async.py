@@ -0,0 +1,146 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+from project_quoter import ProjectQuoter
+from project_quoter.tests.test_project_quoter import PROJECT, WINDOW_DESCRIPTIONS
+
+
+def get_response(model_io, input, use_cache=True):
+    return WINDOW_DESCRIPTIONS if input == PROJECT["window_descriptions"] else "width: [unclosed"
+
+
+async def aget_response(model_io, input, use_cache=True):
+    await asyncio.sleep(0.05)
+    return get_response(model_io, input, use_cache)
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+def call_asgi(app, method, path, body=b"", query_string=b"", headers=None):
+    """Run one request through an ASGI app; returns (status, headers, body)"""
+    headers = {"content-type": "application/json", **(headers or {})}
+    scope = {"type": "http", "method": method, "path": path, "query_string": query_string,
+             "headers": [(name.encode(), value.encode()) for name, value in headers.items()]}
+    messages = []
+    request = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        if request:
+            return request.pop()
+        await asyncio.sleep(3600)  # The client never disconnects
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    headers = {name.decode(): value.decode() for name, value in messages[0]["headers"]}
+    return messages[0]["status"], headers, b"".join(message.get("body", b"") for message in messages[1:])
+
+
+@mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test", "LLM_CACHE_PATH": ""})
+class TestAsyncProjectQuoter(unittest.TestCase):
+    def setUp(self):
+        for name, method in (("get_response", get_response), ("aget_response", aget_response)):
+            patcher = mock.patch(f"llm_io.model_io.ModelIO.{name}", method)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_same_quote_as_sync_path(self):
+        for pipeline in ("per_window", "batched"):
+            with self.subTest(pipeline=pipeline):
+                project_quoter = ProjectQuoter("model", pipeline=pipeline)
+                self.assertEqual(asyncio.run(project_quoter.aquote_project(PROJECT)),
+                                 project_quoter.quote_project(PROJECT))
+
+    def test_event_order(self):
+        events = asyncio.run(collect(ProjectQuoter("model").astream_project(PROJECT)))
+        self.assertEqual(events[0]["event"], "windows")
+        self.assertEqual(sorted(event["window"] for event in events[1:-1]), ["Window 1", "Window 2", "Window 3"])
+        self.assertEqual(events[-1]["event"], "totals")
+
+    def test_concurrent_projects_share_one_loop(self):
+        """Model waits overlap across projects, without a thread each"""
+        project_quoter = ProjectQuoter("model")
+
+        async def quote_many():
+            return await asyncio.gather(*(project_quoter.aquote_project(PROJECT) for _ in range(40)))
+        start = time.perf_counter()
+        quotes = asyncio.run(quote_many())
+        # Each project waits on four sequential 50ms model calls (descriptions, then window 2 and
+        # its two retries), 8s for 40 projects one after another
+        self.assertLess(time.perf_counter() - start, 2.0)
+        self.assertEqual(len({json.dumps(quote) for quote in quotes}), 1)
+
+
+@mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test", "LLM_CACHE_PATH": ""})
+class TestAsgiApp(unittest.TestCase):
+    """The ASGI app returns the same bytes as the Flask app"""
+
+    def setUp(self):
+        for name, method in (("get_response", get_response), ("aget_response", aget_response)):
+            patcher = mock.patch(f"llm_io.model_io.ModelIO.{name}", method)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_quote_project_matches_flask(self):
+        import api
+        import asgi
+        flask_response = api.app.test_client().post("/quote_project", json=PROJECT)
+        status, headers, body = call_asgi(asgi.app, "POST", "/quote_project", json.dumps(PROJECT).encode())
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body, flask_response.data)
+        self.assertEqual(headers["content-type"], flask_response.headers["Content-Type"])
+        self.assertIn("x-pre-llm-ms", headers)
+
+    def test_stream_matches_flask(self):
+        import api
+        import asgi
+        flask_lines = api.app.test_client().post("/quote_project/stream", json=PROJECT).data.splitlines()
+        status, headers, body = call_asgi(asgi.app, "POST", "/quote_project/stream", json.dumps(PROJECT).encode())
+
+        self.assertEqual(headers["content-type"], "application/x-ndjson")
+        lines = body.splitlines()
+        # Windows finish in a different order on each path; the first and last lines are identical
+        self.assertEqual(lines[0], flask_lines[0])
+        self.assertEqual(sorted(lines[1:-1]), sorted(flask_lines[1:-1]))
+        self.assertEqual(lines[-1], flask_lines[-1])
+
+    def test_timings_and_errors(self):
+        import asgi
+        _, headers, body = call_asgi(asgi.app, "POST", "/quote_project", json.dumps(PROJECT).encode(), b"timings=1")
+        self.assertIn("timings", json.loads(body))
+        self.assertIn("server-timing", headers)
+
+        self.assertEqual(call_asgi(asgi.app, "GET", "/quote_project")[0], 405)
+        self.assertEqual(call_asgi(asgi.app, "GET", "/nowhere")[0], 404)
+        self.assertEqual(call_asgi(asgi.app, "POST", "/quote_project", b"not json")[0], 400)
+
+    def test_job_callback_resolved_off_the_event_loop(self):
+        """POST /jobs resolves the callback host on a worker thread, and answers as api.py does"""
+        import api
+        import asgi
+        resolved_on = []
+
+        def getaddrinfo(host, port, *args, **kwargs):
+            resolved_on.append(threading.current_thread())
+            return [(None, None, None, "", ("127.0.0.1", port))]
+        body = {**PROJECT, "callback_url": "http://hooks.example.com/quote"}
+        with mock.patch("jobs.job_manager.socket.getaddrinfo", getaddrinfo):
+            flask_response = api.app.test_client().post("/jobs", json=body)
+            status, _, asgi_body = call_asgi(asgi.app, "POST", "/jobs", json.dumps(body).encode())
+
+        self.assertEqual(status, 400)
+        self.assertEqual(asgi_body, flask_response.data)
+        self.assertIsNot(resolved_on[1], threading.main_thread())
+
+
+if __name__ == '__main__':
+    unittest.main()
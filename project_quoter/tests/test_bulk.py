@@ -0,0 +1,92 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from project_quoter import ProjectQuoter
+from project_quoter import bulk
+from project_quoter.tests.test_project_quoter import PROJECT, WINDOW_DESCRIPTIONS
+
+PROJECTS = [
+    {**PROJECT, "id": "p1"},
+    {**PROJECT, "id": "p2", "project_description": "white white"},
+    {"id": "broken", "project_name": "No windows"},
+]
+
+
+def get_response(model_io, input, use_cache=True):
+    return WINDOW_DESCRIPTIONS if input == PROJECT["window_descriptions"] else "width: [unclosed"
+
+
+def patch_model_calls():
+    """Worker initializer: the test's patches aren't inherited by spawned worker processes"""
+    os.environ.update({"OPENAI_API_KEY": "test", "LLM_CACHE_PATH": ""})
+    mock.patch("llm_io.model_io.ModelIO.get_response", get_response).start()
+
+
+@mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test", "LLM_CACHE_PATH": ""})
+@mock.patch("llm_io.model_io.ModelIO.get_response", get_response)
+class TestBulk(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.input = os.path.join(self.tmp_dir.name, "projects.jsonl")
+        with open(self.input, "w") as f:
+            f.writelines(json.dumps(project) + "\n" for project in PROJECTS)
+
+    def read_jsonl(self, path):
+        records = []
+        with open(path) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    pass
+        return records
+
+    def test_jsonl_results_and_resume(self):
+        """Prices match quote_project; a rerun only retries the project that raised"""
+        output = os.path.join(self.tmp_dir.name, "quotes.jsonl")
+        counts = bulk.run(self.input, output, workers=1, progress_interval=0)
+        self.assertEqual(counts, {"skipped": 0, "quoted": 2, "errors": 1})
+
+        records = {record["id"]: record for record in self.read_jsonl(output)}
+        total_cost, breakdown = ProjectQuoter("gpt-4.1").quote_project(PROJECTS[0])
+        self.assertEqual(records["p1"]["total_cost"], total_cost)
+        self.assertEqual(records["p1"]["price_breakdown"], json.loads(json.dumps(breakdown)))
+        self.assertEqual(records["broken"]["status"], "error")
+        self.assertIn("KeyError", records["broken"]["error"])
+
+        counts = bulk.run(self.input, output, workers=1, progress_interval=0)
+        self.assertEqual(counts, {"skipped": 2, "quoted": 0, "errors": 1})
+        self.assertEqual(len(self.read_jsonl(output)), 4)
+
+    def test_sqlite_with_process_pool(self):
+        output = os.path.join(self.tmp_dir.name, "quotes.sqlite")
+        # spawn, so the workers can't see this process's patches (as on macOS, or forkserver on 3.14+)
+        pool = {"mp_context": multiprocessing.get_context("spawn"), "worker_initializer": patch_model_calls}
+        counts = bulk.run(self.input, output, workers=2, progress_interval=0, **pool)
+        self.assertEqual(counts, {"skipped": 0, "quoted": 2, "errors": 1})
+
+        with sqlite3.connect(output) as connection:
+            rows = dict(connection.execute("SELECT id, status FROM results"))
+            total_cost = connection.execute("SELECT total_cost FROM results WHERE id = 'p1'").fetchone()[0]
+        self.assertEqual(rows, {"p1": "ok", "p2": "ok", "broken": "error"})
+        # Priced from the patched model responses, not a real (failing) model call
+        self.assertEqual(total_cost, ProjectQuoter("gpt-4.1").quote_project(PROJECTS[0])[0])
+        self.assertEqual(bulk.run(self.input, output, workers=2, progress_interval=0, **pool)["skipped"], 2)
+
+    def test_partial_line_from_interrupted_run(self):
+        output = os.path.join(self.tmp_dir.name, "quotes.jsonl")
+        with open(output, "w") as f:
+            f.write('{"id": "p1", "status": "ok"}\n{"id": "p2", "sta')
+        counts = bulk.run(self.input, output, workers=1, progress_interval=0)
+        self.assertEqual(counts["skipped"], 1)
+        self.assertEqual([record["id"] for record in self.read_jsonl(output)], ["p1", "p2", "broken"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Cumulative `python -X importtime` budget, generous enough for a loaded CI machine: a
+# regression such as importing openai or reading files at import time costs far more
+IMPORT_TIME_BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", 500))
+
+# Only needed once a model is actually called
+LAZY_MODULES = ("openai", "httpx")
+
+
+def run_python(*args):
+    """Run python outside the repo root, as a deployment or another project would"""
+    env = {key: value for key, value in os.environ.items() if key not in ("OPENAI_API_KEY", "LLM_BACKEND")}
+    env["PYTHONPATH"] = REPO_ROOT
+    with tempfile.TemporaryDirectory() as cwd:
+        return subprocess.run([sys.executable, *args], cwd=cwd, env=env, capture_output=True, text=True, check=True)
+
+
+def import_time_ms(module):
+    """Cumulative import time of module in a fresh interpreter, best of 3 (the first also writes .pyc files)"""
+    timings = []
+    for _ in range(3):
+        stderr = run_python("-X", "importtime", "-c", f"import {module}").stderr
+        # import time: <self us> | <cumulative us> | <indented module name>
+        for line in stderr.splitlines():
+            fields = line.split("|")
+            if len(fields) == 3 and fields[2].strip() == module:
+                timings.append(int(fields[1]) / 1000)
+    return min(timings)
+
+
+class TestImportTime(unittest.TestCase):
+    def test_import_budget(self):
+        for module in ("project_quoter", "window_quoter.window_quoter"):
+            elapsed = import_time_ms(module)
+            self.assertLess(elapsed, IMPORT_TIME_BUDGET_MS, f"import {module} took {elapsed:.0f}ms")
+
+    def test_openai_imported_on_first_model_call(self):
+        script = (
+            "import json, sys\n"
+            "from project_quoter import ProjectQuoter\n"
+            "from window_quoter.window_quoter import WindowQuoter\n"
+            "quoter = ProjectQuoter('gpt-4.1')\n"
+            "WindowQuoter({'width': 36, 'height': 48, 'units': {'unit_1': {'unit_type': 'picture_window',\n"
+            "    'window_area_frac': 1.0, 'glass': {'type': 'double', 'subtype': 'lowe_180', 'thickness_mm': 4}}}},\n"
+            "    quoter.pricing_config_path).quote_window()\n"
+            f"print(json.dumps(sorted(m for m in sys.modules if m.split('.')[0] in {LAZY_MODULES!r})))\n"
+        )
+        self.assertEqual(json.loads(run_python("-c", script).stdout), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
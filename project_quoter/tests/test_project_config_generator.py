@@ -0,0 +1,116 @@
+import copy
+import json
+import os
+import unittest
+from unittest import mock
+
+import yaml
+
+from project_quoter import ProjectQuoter
+from project_quoter.project_config_generator import ProjectConfigGenerator
+from util.timing import StageTimings
+from valid_config_generator.config_model import WindowConfig
+
+
+def unit(unit_type, frac=1.0, **extra):
+    return {"unit_type": unit_type, "window_area_frac": frac, "exterior": "colour",
+            "glass": {"type": "double", "subtype": "lowe_180", "thickness_mm": 4}, **extra}
+
+
+WINDOWS = {
+    "window_1": {"quantity": 3, "description": "casement",
+                 "config": {"width": 36, "height": 48, "units": {"unit_1": unit("casement", interior="colour")}}},
+    "window_2": {"quantity": 1, "description": "double hung",
+                 "config": {"width": 34, "height": 34, "units": {"unit_1": unit("double_hung")}}},
+    "window_3": {"quantity": 2, "description": "CA/A",
+                 "config": {"width": 60, "height": 40, "units": {"unit_1": unit("casement", 0.5, interior="colour"),
+                                                                  "unit_2": unit("awning", 0.5, interior="colour")}}},
+}
+
+PROJECT = {
+    "project_name": "123 Main Street",
+    "project_description": "black black 180/clear",
+    "window_descriptions": "3x 36 x 48 casement, 34x34 double hung, 2x 60x40 CA/A",
+}
+
+
+def with_invalid_window_2():
+    windows = copy.deepcopy(WINDOWS)
+    windows["window_2"]["config"]["units"]["unit_1"]["unit_type"] = "double_hunk"
+    return windows
+
+
+@mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test", "LLM_CACHE_PATH": ""})
+class TestProjectConfigGenerator(unittest.TestCase):
+    def generate(self, *responses, output_format="yaml"):
+        generator = ProjectConfigGenerator("gpt-4.1", output_format=output_format)
+        with mock.patch.object(generator.model, "get_response", side_effect=list(responses)) as get_response:
+            result = generator.generate_project_configs(PROJECT["window_descriptions"], PROJECT["project_description"])
+        return result, [call.args[0] for call in get_response.call_args_list]
+
+    def test_one_call_when_valid(self):
+        (windows, failed), inputs = self.generate(yaml.safe_dump({"windows": WINDOWS}))
+        self.assertEqual(len(inputs), 1)
+        self.assertIn("Project description: black black 180/clear", inputs[0])
+        self.assertEqual(failed, {})
+        self.assertEqual(list(windows), ["window_1", "window_2", "window_3"])
+        self.assertEqual(windows["window_3"]["config"], WindowConfig.from_dict(WINDOWS["window_3"]["config"]))
+        self.assertEqual((windows["window_1"]["quantity"], windows["window_1"]["width"]), (3, 36))
+
+    def test_invalid_windows_repaired_in_one_call(self):
+        """Only the invalid window is sent back, in a continuation of the first exchange"""
+        first = yaml.safe_dump({"windows": with_invalid_window_2()})
+        repair = yaml.safe_dump({"windows": {"window_2": WINDOWS["window_2"]}})
+        (windows, failed), inputs = self.generate(first, repair)
+        self.assertEqual(len(inputs), 2)
+        self.assertEqual(inputs[1][1], {"role": "assistant", "content": first})
+        self.assertIn("window_2", inputs[1][2]["content"])
+        self.assertNotIn("window_1", inputs[1][2]["content"])
+        self.assertEqual(failed, {})
+        self.assertEqual(windows["window_2"]["config"], WindowConfig.from_dict(WINDOWS["window_2"]["config"]))
+
+    def test_failed_after_repair(self):
+        first = yaml.safe_dump({"windows": with_invalid_window_2()})
+        (windows, failed), _ = self.generate(first, "windows: [unclosed")
+        self.assertEqual(list(failed), ["window_2"])
+        self.assertIsNone(windows["window_2"]["config"])
+        self.assertEqual(windows["window_1"]["config"], WindowConfig.from_dict(WINDOWS["window_1"]["config"]))
+
+    def test_json_output(self):
+        def as_json(key, window):
+            config = {**window["config"], "units": list(window["config"]["units"].values()),
+                      "brickmould": None, "casing_extension": None}
+            return {"window": int(key.split("_")[1]), "quantity": window["quantity"],
+                    "description": window["description"], "config": config}
+        response = json.dumps({"windows": [as_json(key, window) for key, window in WINDOWS.items()]})
+        (windows, failed), inputs = self.generate(response, output_format="json")
+        self.assertEqual(failed, {})
+        self.assertEqual(windows["window_3"]["config"], WindowConfig.from_dict(WINDOWS["window_3"]["config"]))
+
+
+@mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test", "LLM_CACHE_PATH": ""})
+class TestSingleCallPipeline(unittest.TestCase):
+    def test_quote_project(self):
+        """Two model calls for the whole project: the split-and-configure call and one repair"""
+        responses = [yaml.safe_dump({"windows": with_invalid_window_2()}), "windows: {}"]
+        project_quoter = ProjectQuoter("gpt-4.1", pipeline="single_call")
+        timings = StageTimings()
+        with mock.patch("llm_io.model_io.ModelIO.get_response", side_effect=responses) as get_response:
+            total_cost, breakdown = project_quoter.quote_project(PROJECT, timings=timings)
+
+        self.assertEqual(get_response.call_count, 2)
+        self.assertEqual(breakdown["Failed Windows"]["count"], 1)
+        self.assertEqual(breakdown["Window 1"]["Quantity"], 3)
+        self.assertIn("Window 3", breakdown)
+        self.assertGreater(total_cost, 0)
+        result = timings.as_dict()
+        self.assertEqual(result["stages"]["project_config_generation"]["count"], 1)
+        self.assertEqual(result["counters"], {"repairs": 1})
+
+    def test_unknown_pipeline(self):
+        with self.assertRaises(ValueError):
+            ProjectQuoter("gpt-4.1", pipeline="per_project")
+
+
+if __name__ == '__main__':
+    unittest.main()
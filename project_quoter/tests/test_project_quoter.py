@@ -0,0 +1,212 @@
+import json
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+from project_quoter import ProjectQuoter
+from util.timing import StageTimings
+
+WINDOW_DESCRIPTIONS = """
+windows:
+    window_1:
+        quantity: 3
+        width: 36
+        height: 48
+        description: casement
+    window_2:
+        quantity: 1
+        width: 34
+        height: 34
+        description: white white awning with grilles
+    window_3:
+        quantity: 2
+        width: 60
+        height: 40
+        description: CA/A
+"""
+
+PROJECT = {
+    "project_name": "123 Main Street",
+    "project_description": "black black 180/clear",
+    "window_descriptions": "3x 36 x 48 casement, 34x34 white white awning with grilles, 2x 60x40 CA/A",
+}
+
+
+class FakeConfigGenerator:
+    """Stands in for ValidConfigGenerator, sleeping to mimic LLM latency"""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.started = []
+        self.lock = threading.Lock()
+
+    def generate_config(self, free_text, debug_file_path="", timings=None):
+        with self.lock:
+            self.started.append(free_text)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delays[free_text])
+        with self.lock:
+            self.in_flight -= 1
+        return {} if free_text == "bad" else {"description": free_text}
+
+
+class TestGenerateConfigs(unittest.TestCase):
+    def test_results_in_window_order(self):
+        """Configs come back in job order even when later windows finish first"""
+        delays = {"slow": 0.2, "medium": 0.1, "bad": 0.0, "fast": 0.05}
+        generator = FakeConfigGenerator(delays)
+        jobs = [(i, desc, 1, "") for i, desc in enumerate(delays, 1)]
+
+        start = time.perf_counter()
+        configs = ProjectQuoter("model", max_concurrency=8).generate_configs(generator, jobs)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(configs, [{"description": "slow"}, {"description": "medium"}, {}, {"description": "fast"}])
+        # Latency approaches the slowest window rather than the sum of all windows
+        self.assertLess(elapsed, 0.3)
+
+    def test_concurrency_limit(self):
+        """No more than max_concurrency configs are generated at once"""
+        delays = {f"window {i}": 0.02 for i in range(10)}
+        generator = FakeConfigGenerator(delays)
+        jobs = [(i, desc, 1, "") for i, desc in enumerate(delays, 1)]
+
+        ProjectQuoter("model", max_concurrency=3).generate_configs(generator, jobs)
+        self.assertLessEqual(generator.max_in_flight, 3)
+
+        generator = FakeConfigGenerator(delays)
+        ProjectQuoter("model", max_concurrency=1).generate_configs(generator, jobs)
+        self.assertEqual(generator.max_in_flight, 1)
+
+    def test_closing_stops_queued_windows(self):
+        """A consumer that stops early (a disconnected stream) doesn't wait for, or start, the queued windows"""
+        delays = {f"window {i}": 0.1 for i in range(20)}
+        generator = FakeConfigGenerator(delays)
+        jobs = [(i, desc, 1, "") for i, desc in enumerate(delays, 1)]
+
+        generated = ProjectQuoter("model", max_concurrency=2).iter_generated_configs(generator, jobs)
+        next(generated)
+        start = time.perf_counter()
+        generated.close()
+        self.assertLess(time.perf_counter() - start, 0.05)
+        time.sleep(0.3)
+        self.assertLessEqual(len(generator.started), 5)
+
+
+@mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test", "LLM_CACHE_PATH": ""})
+class TestStreamProject(unittest.TestCase):
+    """The description parser call is mocked; window configs come from the shorthand fast path
+    except window 2, whose model responses never parse"""
+
+    def setUp(self):
+        def get_response(model_io, input, use_cache=True):
+            return WINDOW_DESCRIPTIONS if input == PROJECT["window_descriptions"] else "width: [unclosed"
+        patcher = mock.patch("llm_io.model_io.ModelIO.get_response", get_response)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_event_order(self):
+        """Window list first, one event per window, totals last"""
+        events = list(ProjectQuoter("model", max_concurrency=1).stream_project(PROJECT))
+
+        self.assertEqual(events[0]["event"], "windows")
+        self.assertEqual(list(events[0]["windows"]), ["window_1", "window_2", "window_3"])
+        window_events = {event["window"]: event for event in events[1:-1]}
+        self.assertEqual(window_events["Window 1"]["event"], "window")
+        self.assertEqual(window_events["Window 1"]["quote"]["Quantity"], 3)
+        self.assertEqual(window_events["Window 2"], {"event": "window_failed", "window": "Window 2",
+                                                     "error": "Config generation failed"})
+        self.assertEqual(events[-1]["event"], "totals")
+
+    def test_quote_project_matches_stream(self):
+        """quote_project returns the final streamed breakdown, with per-window quotes identical"""
+        events = list(ProjectQuoter("model").stream_project(PROJECT))
+        total_cost, breakdown = ProjectQuoter("model").quote_project(PROJECT)
+
+        self.assertEqual(total_cost, events[-1]["total_cost"])
+        self.assertEqual(breakdown, events[-1]["price_breakdown"])
+        for event in events:
+            if event["event"] == "window":
+                self.assertEqual(breakdown[event["window"]], event["quote"])
+        self.assertEqual(breakdown["Failed Windows"]["count"], 1)
+
+    def test_timings(self):
+        """Stage timings and retry counts are recorded per window"""
+        timings = StageTimings()
+        ProjectQuoter("model").quote_project(PROJECT, timings=timings)
+        result = timings.as_dict()
+
+        self.assertEqual(result["stages"]["description_parser"]["count"], 1)
+        self.assertEqual(result["stages"]["format_json"]["count"], 3)
+        self.assertEqual(result["stages"]["quote_window"]["count"], 2)
+        self.assertIn("shorthand", result["windows"]["Window 1"]["stages"])
+        self.assertNotIn("llm", result["windows"]["Window 1"]["stages"])
+        # Window 2's description isn't shorthand and the model never returns valid YAML
+        self.assertEqual(result["windows"]["Window 2"]["stages"]["llm"]["count"], 3)
+        self.assertEqual(result["windows"]["Window 2"]["counters"], {"retries": 2})
+        self.assertEqual(result["counters"], {"retries": 2})
+
+    def test_pre_llm_includes_building_generators(self):
+        """pre_llm_ms is recorded before the first model call and covers building the generators"""
+        stats, stats_at_calls = {}, []
+        build_config_generator = ProjectQuoter.get_config_generator
+
+        def slow_config_generator(project_quoter):
+            time.sleep(0.05)
+            return build_config_generator(project_quoter)
+
+        def get_response(model_io, input, use_cache=True):
+            stats_at_calls.append(dict(stats))
+            return WINDOW_DESCRIPTIONS if input == PROJECT["window_descriptions"] else "width: [unclosed"
+        with mock.patch.object(ProjectQuoter, "get_config_generator", slow_config_generator), \
+                mock.patch("llm_io.model_io.ModelIO.get_response", get_response):
+            ProjectQuoter("model").quote_project(PROJECT, stats=stats)
+
+        self.assertGreaterEqual(stats_at_calls[0]["pre_llm_ms"], 50)
+
+    def test_batched_pipeline_matches_per_window(self):
+        total_cost, breakdown = ProjectQuoter("model").quote_project(PROJECT)
+        batched_total, batched_breakdown = ProjectQuoter("model", pipeline="batched").quote_project(PROJECT)
+
+        self.assertEqual(batched_total, total_cost)
+        self.assertEqual(batched_breakdown, breakdown)
+
+    def test_json_output_format(self):
+        """With output_format="json" the parser and generator read structured output"""
+        windows = [{"quantity": 3, "width": 36, "height": 48, "description": "casement"},
+                   {"quantity": 1, "width": 34, "height": 34, "description": "white white awning with grilles"},
+                   {"quantity": 2, "width": 60, "height": 40, "description": "CA/A"}]
+
+        def get_response(model_io, input, use_cache=True):
+            return json.dumps({"windows": windows}) if input == PROJECT["window_descriptions"] else "{"
+        project_quoter = ProjectQuoter("model", output_format="json")
+        with mock.patch("llm_io.model_io.ModelIO.get_response", get_response):
+            events = list(project_quoter.stream_project(PROJECT))
+
+        self.assertEqual(project_quoter.get_description_parser().model.text_format["name"], "window_descriptions")
+        self.assertEqual(events[0]["windows"]["window_3"]["quantity"], 2)
+        self.assertEqual([event["event"] for event in events[1:-1]].count("window"), 2)
+        self.assertEqual(events[-1]["price_breakdown"]["Failed Windows"]["count"], 1)
+
+    def test_generators_and_clients_reused(self):
+        """Projects quoted with one instance share parser, generator and the OpenAI client"""
+        project_quoter = ProjectQuoter("model")
+        stats = {}
+        project_quoter.quote_project(PROJECT, stats=stats)
+        parser, generator = project_quoter.get_description_parser(), project_quoter.get_config_generator()
+        project_quoter.quote_project(PROJECT)
+
+        self.assertIs(project_quoter.get_description_parser(), parser)
+        self.assertIs(project_quoter.get_config_generator(), generator)
+        self.assertIs(parser.model.client, generator.model.client)
+        self.assertIs(ProjectQuoter("model").get_config_generator().model.client, generator.model.client)
+        self.assertGreaterEqual(stats["pre_llm_ms"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,6 @@
-from llm_io.model_io import ModelIO
+from llm_io.model_io import CacheStore, ModelCall, ModelIO, arun_steps, run_steps
+from util.timing import NULL_TIMINGS
+import json
 import yaml
 import logging
 
@@ -19,43 +21,119 @@ class WindowDescriptionParser:
     
 
     """
-    
-    def __init__(self, model_name, debug=False, num_retries=2):
-        self.model = ModelIO("openai", model_name, self.generate_prompt())
+
+    json_output_instructions = """
+    Respond with JSON matching the response schema instead of YAML. windows is a list in the order the windows appear.
+    """
+
+    # Strict structured output schema; windows is a list because strict schemas can't have
+    # window_<N> keys. descriptions_from_json() converts a response back.
+    json_schema = {
+        "type": "object",
+        "properties": {
+            "windows": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "quantity": {"type": "integer"},
+                        "width": {"type": "number"},
+                        "height": {"type": "number"},
+                        "description": {"type": "string"},
+                    },
+                    "required": ["quantity", "width", "height", "description"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["windows"],
+        "additionalProperties": False,
+    }
+
+    # Sent as a follow-up to an invalid response
+    retry_message = "That was invalid. Fix only these errors, keep everything else the same and return the full config: {warnings}"
+
+    OUTPUT_FORMATS = ("yaml", "json")
+
+    def __init__(self, model_name, debug=False, num_retries=2, output_format="yaml"):
+        """
+        output_format: "yaml" (default) asks for YAML text; "json" constrains the model to
+        json_schema with structured output, so responses always parse.
+        """
+        if output_format not in self.OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output_format '{output_format}', expected one of {self.OUTPUT_FORMATS}")
+        self.output_format = output_format
+        text_format = None
+        if output_format == "json":
+            text_format = {"type": "json_schema", "name": "window_descriptions", "schema": self.json_schema,
+                           "strict": True}
+        self.model = ModelIO("openai", model_name, self.generate_prompt(), caller="description_parser",
+                             text_format=text_format)
         self.debug = debug
         self.num_retries = num_retries
 
     def generate_prompt(self):
+        if self.output_format == "json":
+            return self.prompt_instructions + self.json_output_instructions
         return self.prompt_instructions
-    
-    def generate_window_descriptions(self, free_text, debug_file_path = ""):
-        response = self.model.get_response(free_text)
-        if self.debug:
-            self.write_yaml_to_file(response, debug_file_path)
+
+    @staticmethod
+    def descriptions_from_json(data):
+        """Convert a response following json_schema to the {'windows': {'window_1': ...}} dict"""
+        if isinstance(data, dict) and isinstance(data.get("windows"), list):
+            data["windows"] = {f"window_{i}": window for i, window in enumerate(data["windows"], start=1)}
+        return data
+
+    def parse_response(self, response):
+        """
+        Parse a model response in this parser's output format and validate it.
+
+        Returns:
+            tuple: (config, errors_exist, warnings), with warnings fit to send back to the model
+        """
+        if response is None:
+            return None, True, ["No response was received, return the full config"]
         try:
-            config = yaml.safe_load(response)
-            errs, warnings = self.validate_config(config)
+            if self.output_format == "json":
+                config = self.descriptions_from_json(json.loads(response))
+            else:
+                config = yaml.safe_load(response)
         except yaml.YAMLError as e:
-            errs = True
-            warnings = [f"Could not create dict using yaml.safe_load(), reconstruct response to be in yaml format: {e}"] 
-        free_window_config = free_text
+            return None, True, [f"Could not create dict using yaml.safe_load(), reconstruct response to be in yaml format: {e}"]
+        except ValueError as e:
+            return None, True, [f"Could not parse the response as JSON, return only JSON matching the schema: {e}"]
+        errs, warnings = self.validate_config(config)
+        return config, errs, warnings
+    
+    def generate_window_descriptions(self, free_text, debug_file_path = "", timings=NULL_TIMINGS):
+        """Split free_text into window descriptions; timings (util.timing.StageTimings) counts retries"""
+        return run_steps(self.description_steps(free_text, debug_file_path, timings))
+
+    async def agenerate_window_descriptions(self, free_text, debug_file_path = "", timings=NULL_TIMINGS):
+        """generate_window_descriptions() with the model calls awaited"""
+        return await arun_steps(self.description_steps(free_text, debug_file_path, timings))
+
+    def description_steps(self, free_text, debug_file_path = "", timings=NULL_TIMINGS):
+        """generate_window_descriptions() as a step generator (see llm_io.model_io.run_steps)"""
+        response = yield ModelCall(self.model, free_text)
+        if self.debug and response is not None:
+            self.write_yaml_to_file(response, debug_file_path)
+        config, errs, warnings = self.parse_response(response)
+        conversation = free_text
         i = 0
         while errs and i < self.num_retries:
-            free_window_config = f"The config {free_text} was provided but the following was invalid. Fix the errors and return the full config: {warnings}"
-            logger.debug(f"Sending retry prompt: {free_window_config}")
-            response = self.model.get_response(free_window_config)
+            timings.increment("description_retries")
+            if response is not None:
+                # Continue the exchange rather than starting over: the model fixes its own previous
+                # output, and the unchanged prefix can be served from the provider's prompt cache
+                conversation = ModelIO.continuation(conversation, response, self.retry_message.format(warnings=warnings))
+            logger.debug(f"Sending retry for errors: {warnings}")
+            response = yield ModelCall(self.model, conversation, use_cache=False)
             if response is None:
                 logger.warning("Did not receive a response from model")
-                errs = True
-            else:
-                if self.debug:
-                    self.write_yaml_to_file(response, debug_file_path)
-                try:
-                    config = yaml.safe_load(response)
-                    errs, warnings = self.validate_config(config)
-                except yaml.YAMLError as e:
-                    errs = True
-                    warnings = [f"Could not create dict using yaml.safe_load(), reconstruct response to be in yaml format: {e}"]         
+            elif self.debug:
+                self.write_yaml_to_file(response, debug_file_path)
+            config, errs, warnings = self.parse_response(response)
             i += 1
         
         if errs:
@@ -63,6 +141,8 @@ class WindowDescriptionParser:
             logger.error(f"Errors: {errs}")
             logger.error(f"Warnings: {warnings}")
             return {}
+        # Only validated responses are cached, keyed on the original description
+        yield CacheStore(self.model, free_text, response)
         return config
         
     
@@ -82,7 +162,7 @@ class WindowDescriptionParser:
         warnings = []
 
         # Check if 'windows' is top level key
-        if 'windows' not in config:
+        if not isinstance(config, dict) or 'windows' not in config:
             errors.append("Missing required top-level key 'windows'")
             return True, errors
 
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from util import metrics
+
+
+class QuoteCache:
+    """
+    Bounded in-process TTL cache of /quote_project response bodies, keyed by strong ETag.
+
+    The ETag hashes the canonical request body (keys sorted, insignificant whitespace
+    dropped) together with the pricing catalog version, the model and the pipeline settings,
+    so editing pricing.yaml or switching model changes every ETag and stale quotes are never
+    served. Only successful quotes should be stored (see cacheable), so resubmitting a
+    project that failed runs it again.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # etag -> (expires_at, body)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_etag(request_body: Dict, pricing_version: str, model: str, variant: str = "") -> str:
+        """Strong ETag (quoted) for a quote request; variant covers server settings such as the pipeline"""
+        canonical = json.dumps(request_body, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        payload = json.dumps([canonical, pricing_version, model, variant], ensure_ascii=False)
+        return '"' + hashlib.sha256(payload.encode("utf-8")).hexdigest() + '"'
+
+    @staticmethod
+    def if_none_match(header: Optional[str], etag: str) -> bool:
+        """Whether an If-None-Match header value matches etag (weak comparison, as RFC 9110 asks)"""
+        if not header:
+            return False
+        # "*" is not honoured: it would answer 304 for a project that was never quoted
+        tags = [tag.strip() for tag in header.split(",")]
+        return any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in tags)
+
+    @staticmethod
+    def cacheable(price_breakdown: Dict) -> bool:
+        """Only quotes where every window was priced are cached"""
+        return "Error" not in price_breakdown and "Failed Windows" not in price_breakdown
+
+    def get(self, etag: str) -> Optional[bytes]:
+        """The stored body for etag, or None if it's missing or expired"""
+        body = self._get(etag)
+        metrics.QUOTE_CACHE_LOOKUPS.labels("hit" if body is not None else "miss").inc()
+        return body
+
+    def lookup(self, etag: str, if_none_match: Optional[str] = None) -> Tuple[str, Optional[bytes]]:
+        """
+        Look up a /quote_project request: ("not_modified", body) if its If-None-Match header
+        names etag, ("hit", body) otherwise, or ("miss", None) if etag isn't stored. A 304 is
+        only answered for a quote this worker served and still holds; the web page relies on it
+        when resubmitting a project (POST has no standard 304, see README).
+        """
+        body = self._get(etag)
+        if body is None:
+            result = "miss"
+        else:
+            result = "not_modified" if self.if_none_match(if_none_match, etag) else "hit"
+        metrics.QUOTE_CACHE_LOOKUPS.labels(result).inc()
+        return result, body
+
+    def _get(self, etag: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(etag)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[etag]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(etag)
+        return entry[1] if entry is not None else None
+
+    def set(self, etag: str, body: bytes):
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[etag] = (time.monotonic() + self.ttl_seconds, body)
+            self._entries.move_to_end(etag)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,96 @@
+"""
+Prometheus metrics for the quoting service.
+
+prometheus_client is optional: without it every metric is a no-op and render() reports
+that metrics are unavailable. To aggregate across worker processes (gunicorn/uvicorn
+workers), set PROMETHEUS_MULTIPROC_DIR to an empty, writable directory before the
+workers start; each worker then writes its samples there and /metrics sums them.
+"""
+import logging
+import os
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+except ImportError:  # pragma: no cover - exercised only without prometheus_client
+    prometheus_client = None
+
+logger = logging.getLogger(__name__)
+
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+class _NoopMetric:
+    """Accepts the prometheus_client metric calls and records nothing"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def observe(self, value):
+        pass
+
+
+def _metric(cls_name, name, documentation, labelnames=(), **kwargs):
+    if prometheus_client is None:
+        return _NoopMetric()
+    cls = {"Counter": Counter, "Gauge": Gauge, "Histogram": Histogram}[cls_name]
+    if cls_name == "Gauge" and MULTIPROCESS:
+        # Sum the gauge over live workers only, so a restarted worker doesn't leave stale values
+        kwargs.setdefault("multiprocess_mode", "livesum")
+    return cls(name, documentation, labelnames, **kwargs)
+
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+REQUEST_LATENCY = _metric(
+    "Histogram", "quote_request_duration_seconds", "HTTP request latency, until the response body is sent",
+    ["endpoint", "method", "status"], buckets=LATENCY_BUCKETS)
+REQUESTS_IN_FLIGHT = _metric(
+    "Gauge", "quote_requests_in_flight", "HTTP requests currently being handled", ["endpoint"])
+LLM_LATENCY = _metric(
+    "Histogram", "llm_call_duration_seconds", "Model call latency by caller, excluding cache hits",
+    ["caller", "outcome"], buckets=LATENCY_BUCKETS)
+CONFIG_RETRIES = _metric(
+    "Histogram", "config_retries_per_window", "Model retries needed per window config that went to the model",
+    buckets=(0, 1, 2, 3, 5))
+VALIDATION_FAILURES = _metric(
+    "Counter", "config_validation_failures_total", "Config validation errors in model responses, by error type",
+    ["error_type"])
+WINDOWS_PER_PROJECT = _metric(
+    "Histogram", "project_windows", "Windows per quoted project", buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500))
+LLM_CACHE_LOOKUPS = _metric(
+    "Counter", "llm_cache_lookups_total", "Model response cache lookups by result (memory_hit, disk_hit, miss)",
+    ["result"])
+QUOTE_CACHE_LOOKUPS = _metric(
+    "Counter", "quote_cache_lookups_total", "/quote_project response cache lookups by result (hit, miss, not_modified)",
+    ["result"])
+SHORTHAND_PARSES = _metric(
+    "Counter", "shorthand_parses_total", "Descriptions tried on the rule-based fast path by result (hit, miss)",
+    ["result"])
+
+
+def render():
+    """Return (body, content_type) for the /metrics endpoint, or (None, None) without prometheus_client"""
+    if prometheus_client is None:
+        return None, None
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid):
+    """Call from the process manager's worker-exit hook (e.g. gunicorn child_exit) in multiprocess mode"""
+    if prometheus_client is not None and MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,148 @@
+import json
+import os
+import time
+import unittest
+from unittest import mock
+
+import yaml
+
+from util.http_cache import QuoteCache
+
+PROJECT = {"project_name": "123 Main Street", "project_description": "black black",
+           "window_descriptions": "36 x 48 casement"}
+
+
+class TestQuoteCache(unittest.TestCase):
+    def test_etag_is_canonical(self):
+        """Key order and whitespace don't change the ETag; content, pricing version and model do"""
+        etag = QuoteCache.make_etag(PROJECT, "v1", "gpt-4.1")
+        reordered = dict(reversed(list(PROJECT.items())))
+
+        self.assertEqual(QuoteCache.make_etag(reordered, "v1", "gpt-4.1"), etag)
+        self.assertTrue(etag.startswith('"') and etag.endswith('"'))
+        self.assertNotEqual(QuoteCache.make_etag({**PROJECT, "project_description": "white"}, "v1", "gpt-4.1"), etag)
+        self.assertNotEqual(QuoteCache.make_etag(PROJECT, "v2", "gpt-4.1"), etag)
+        self.assertNotEqual(QuoteCache.make_etag(PROJECT, "v1", "gpt-4.1-mini"), etag)
+        self.assertNotEqual(QuoteCache.make_etag(PROJECT, "v1", "gpt-4.1", "single_call/yaml"), etag)
+
+    def test_if_none_match(self):
+        etag = '"abc"'
+        self.assertTrue(QuoteCache.if_none_match('"abc"', etag))
+        self.assertTrue(QuoteCache.if_none_match('"x", W/"abc"', etag))
+        self.assertFalse(QuoteCache.if_none_match("*", etag))
+        self.assertFalse(QuoteCache.if_none_match('"abcd"', etag))
+        self.assertFalse(QuoteCache.if_none_match(None, etag))
+
+    def test_ttl_and_bound(self):
+        cache = QuoteCache(max_entries=2, ttl_seconds=0.05)
+        cache.set('"a"', b"a")
+        cache.set('"b"', b"b")
+        self.assertEqual(cache.get('"a"'), b"a")
+        cache.set('"c"', b"c")  # Evicts "b", the least recently used
+        self.assertIsNone(cache.get('"b"'))
+        time.sleep(0.06)
+        self.assertIsNone(cache.get('"a"'))
+
+        disabled = QuoteCache(ttl_seconds=0)
+        disabled.set('"a"', b"a")
+        self.assertIsNone(disabled.get('"a"'))
+
+    def test_only_complete_quotes_are_cacheable(self):
+        self.assertTrue(QuoteCache.cacheable({"Window 1": {}, "Total Project Cost": "$1.00"}))
+        self.assertFalse(QuoteCache.cacheable({"Error": "Unable to separate text description"}))
+        self.assertFalse(QuoteCache.cacheable({"Window 1": {}, "Failed Windows": {"count": 1}}))
+
+
+CONFIG = {
+    "width": 36, "height": 48,
+    "units": {"unit_1": {"unit_type": "casement", "window_area_frac": 1.0, "interior": "white", "exterior": "colour",
+                         "glass": {"type": "double", "subtype": "lowe_180", "thickness_mm": 4}}},
+}
+DESCRIPTIONS = yaml.safe_dump({"windows": {"window_1": {"quantity": 1, "width": 36, "height": 48,
+                                                        "description": "casement"}}})
+
+
+@mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test", "LLM_CACHE_PATH": ""})
+class TestQuoteProjectCaching(unittest.TestCase):
+    def setUp(self):
+        import api
+        self.api = api
+        self.calls = 0
+
+        def get_response(model_io, input, use_cache=True):
+            self.calls += 1
+            return DESCRIPTIONS if input == PROJECT["window_descriptions"] else yaml.safe_dump(CONFIG)
+        for patcher in (mock.patch("llm_io.model_io.ModelIO.get_response", get_response),
+                        mock.patch.object(api, "_quote_cache", QuoteCache())):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = api.app.test_client()
+
+    def test_resubmission_served_from_cache(self):
+        first = self.client.post("/quote_project", json=PROJECT)
+        calls = self.calls
+        second = self.client.post("/quote_project", json=dict(reversed(list(PROJECT.items()))))
+
+        self.assertEqual(first.headers["X-Quote-Cache"], "miss")
+        self.assertEqual(second.headers["X-Quote-Cache"], "hit")
+        self.assertEqual(second.headers["ETag"], first.headers["ETag"])
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(self.calls, calls)
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.post("/quote_project", json=PROJECT).headers["ETag"]
+        calls = self.calls
+        response = self.client.post("/quote_project", json=PROJECT, headers={"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertEqual(response.data, b"")
+        self.assertEqual(self.calls, calls)
+
+    def test_304_only_for_cached_quotes(self):
+        """'*' or the ETag of a quote this worker doesn't hold runs the quote instead of answering 304"""
+        etag = self.client.post("/quote_project", json=PROJECT).headers["ETag"]
+        self.api.get_quote_cache().clear()
+        for header in (etag, "*"):
+            with self.subTest(header=header):
+                response = self.client.post("/quote_project", json=PROJECT, headers={"If-None-Match": header})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.headers["ETag"], etag)
+                self.api.get_quote_cache().clear()
+        unquoted = {**PROJECT, "project_name": "never quoted"}
+        self.assertEqual(self.client.post("/quote_project", json=unquoted, headers={"If-None-Match": "*"}).status_code,
+                         200)
+
+    def test_pricing_change_invalidates(self):
+        etag = self.client.post("/quote_project", json=PROJECT).headers["ETag"]
+        with mock.patch("window_quoter.pricing_catalog.PricingCatalog.version", "new version"):
+            response = self.client.post("/quote_project", json=PROJECT, headers={"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["X-Quote-Cache"], "miss")
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_asgi_app_shares_etags(self):
+        import asgi
+        from project_quoter.tests.test_async import call_asgi
+        flask_response = self.client.post("/quote_project", json=PROJECT)
+        calls = self.calls
+        body = json.dumps(PROJECT).encode()
+
+        status, headers, cached = call_asgi(asgi.app, "POST", "/quote_project", body)
+        self.assertEqual((status, headers["etag"], cached), (200, flask_response.headers["ETag"], flask_response.data))
+        status, headers, _ = call_asgi(asgi.app, "POST", "/quote_project", body,
+                                       headers={"if-none-match": flask_response.headers["ETag"]})
+        self.assertEqual(status, 304)
+        self.assertNotIn("content-length", headers)
+        self.assertEqual(self.calls, calls)
+
+    def test_failed_quotes_and_timings_not_cached(self):
+        failing = {**PROJECT, "window_descriptions": "unparseable"}
+        response = self.client.post("/quote_project", json=failing)
+        self.assertNotIn("ETag", response.headers)
+        self.assertNotIn("ETag", self.client.post("/quote_project?timings=1", json=PROJECT).headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from util import metrics
+from valid_config_generator.config_validator import ConfigValidator
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@unittest.skipIf(metrics.prometheus_client is None, "prometheus_client is not installed")
+class TestMetrics(unittest.TestCase):
+    def run_python(self, code, env):
+        return subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, env=env,
+                              capture_output=True, text=True, check=True).stdout
+
+    def test_multiprocess_aggregation(self):
+        """Samples written by separate worker processes are summed by render()"""
+        with tempfile.TemporaryDirectory() as multiproc_dir:
+            env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=multiproc_dir)
+            for _ in range(2):
+                self.run_python("from util import metrics; metrics.SHORTHAND_PARSES.labels('hit').inc(3)", env)
+            body = self.run_python("from util import metrics; print(metrics.render()[0].decode())", env)
+        self.assertIn('shorthand_parses_total{result="hit"} 6.0', body)
+
+    def test_render(self):
+        metrics.WINDOWS_PER_PROJECT.observe(3)
+        body, content_type = metrics.render()
+        self.assertIn(b"project_windows_count", body)
+        self.assertTrue(content_type.startswith("text/plain"))
+
+
+class TestErrorTypes(unittest.TestCase):
+    def test_validator_errors_are_categorised(self):
+        _, errors = ConfigValidator().validate({"width": -3, "units": {"unit_1": {"unit_type": "casment"}}})
+        self.assertTrue(errors)
+        types = {ConfigValidator.error_type(error) for error in errors}
+        self.assertNotIn("other", types)
+        self.assertTrue({"missing_key", "out_of_range", "invalid_value"} <= types)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import threading
+import time
+import unittest
+
+from util.timing import NULL_TIMINGS, StageTimings
+
+
+class TestStageTimings(unittest.TestCase):
+    def test_stages_accumulate(self):
+        timings = StageTimings()
+        for _ in range(2):
+            with timings.stage("llm"):
+                time.sleep(0.01)
+        timings.increment("retries")
+
+        result = timings.as_dict()
+        self.assertEqual(result["stages"]["llm"]["count"], 2)
+        self.assertGreaterEqual(result["stages"]["llm"]["ms"], 20)
+        self.assertEqual(result["counters"], {"retries": 1})
+        self.assertGreaterEqual(result["total_ms"], result["stages"]["llm"]["ms"])
+
+    def test_windows_sum_into_totals(self):
+        """Window children recorded on separate threads are summed by stage name"""
+        timings = StageTimings()
+
+        def work(label):
+            window = timings.window(label)
+            window.add("llm", 0.5)
+            window.increment("retries")
+
+        threads = [threading.Thread(target=work, args=(f"Window {i}",)) for i in range(1, 4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        result = timings.as_dict()
+        self.assertEqual(result["stages"]["llm"], {"ms": 1500.0, "count": 3})
+        self.assertEqual(result["counters"], {"retries": 3})
+        self.assertEqual(result["windows"]["Window 2"]["stages"]["llm"], {"ms": 500.0, "count": 1})
+        self.assertIn("llm;dur=1500.0", timings.server_timing())
+
+    def test_null_timings(self):
+        """Disabled timings accept the same calls and record nothing"""
+        self.assertFalse(NULL_TIMINGS.enabled)
+        with NULL_TIMINGS.window("Window 1").stage("llm"):
+            pass
+        NULL_TIMINGS.increment("retries")
+        self.assertIs(NULL_TIMINGS.window("Window 1"), NULL_TIMINGS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict
+
+
+class StageTimings:
+    """
+    Wall-clock time spent in each named stage of a quote, plus counters such as retries.
+
+    Stages can be entered repeatedly; their durations and counts accumulate. Per-window
+    timings are kept in child StageTimings from window(), so each window's stages can be
+    recorded on its own worker thread while the parent sums them for the totals.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = OrderedDict()  # name -> [total seconds, count]
+        self.counters = OrderedDict()
+        self.windows = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """Time the body of a with block as one entry of stage name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        with self._lock:
+            entry = self.stages.get(name)
+            if entry is None:
+                self.stages[name] = [seconds, 1]
+            else:
+                entry[0] += seconds
+                entry[1] += 1
+
+    def increment(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def window(self, label):
+        """The child StageTimings for one window, created on first use"""
+        with self._lock:
+            child = self.windows.get(label)
+            if child is None:
+                child = self.windows[label] = StageTimings()
+            return child
+
+    def totals(self) -> Dict[str, list]:
+        """This object's stages plus every window's stages, summed by name"""
+        with self._lock:
+            totals = OrderedDict((name, list(entry)) for name, entry in self.stages.items())
+            windows = list(self.windows.values())
+        for child in windows:
+            for name, (seconds, count) in child.totals().items():
+                entry = totals.setdefault(name, [0.0, 0])
+                entry[0] += seconds
+                entry[1] += count
+        return totals
+
+    def as_dict(self) -> Dict:
+        """
+        JSON-ready timings in milliseconds:
+        {"total_ms": ..., "stages": {name: {"ms": ..., "count": ...}}, "counters": {...}, "windows": {label: {...}}}
+
+        Window stages run concurrently, so their summed stage times can exceed total_ms.
+        """
+        result = OrderedDict()
+        result["total_ms"] = round((time.perf_counter() - self.started) * 1000, 3)
+        result["stages"] = OrderedDict(
+            (name, {"ms": round(seconds * 1000, 3), "count": count}) for name, (seconds, count) in self.totals().items())
+        counters = OrderedDict(self.counters)
+        for child in list(self.windows.values()):
+            for name, n in child.counters.items():
+                counters[name] = counters.get(name, 0) + n
+        if counters:
+            result["counters"] = counters
+        if self.windows:
+            result["windows"] = OrderedDict((label, child.as_dict()) for label, child in list(self.windows.items()))
+        return result
+
+    def server_timing(self) -> str:
+        """The totals as a Server-Timing header value, e.g. 'description_parser;dur=812.4, llm;dur=1630.2'"""
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, (seconds, count) in self.totals().items()]
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullTimings:
+    """StageTimings stand-in that records nothing, used when timings are off"""
+
+    enabled = False
+
+    def stage(self, name):
+        # A shared no-op context manager, so disabled timings allocate nothing
+        return _NULL_STAGE
+
+    def add(self, name, seconds):
+        pass
+
+    def increment(self, name, n=1):
+        pass
+
+    def window(self, label):
+        return self
+
+
+NULL_TIMINGS = NullTimings()
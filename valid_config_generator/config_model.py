@@ -0,0 +1,130 @@
+"""
+Typed, immutable in-memory model of a window config.
+
+Model output is parsed into a dict and validated by ConfigValidator.parse, which builds the
+WindowConfig in the same walk over the dict. From there the generators hand the model on:
+WindowQuoter and quote_many price it through attribute access instead of repeating the same
+key lookups. Dicts remain the wire format (model output, the response caches, the API), and
+from_dict builds the model from one that was not validated here. The classes are
+NamedTuples, so they're slotted (no per-instance __dict__), immutable and, when their
+values are, hashable for use as cache keys.
+
+from_dict doesn't validate: missing keys become None so the quoter can report them as it
+always has, while a section that isn't a dict raises.
+"""
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+# from_dict builds the tuples directly, skipping the Python-level NamedTuple.__new__: it's
+# called several times per window and this halves the cost of parsing a config
+_new = tuple.__new__
+
+
+class GlassSpec(NamedTuple):
+    type: Optional[str] = None
+    subtype: Optional[str] = None
+    thickness_mm: Optional[float] = None
+
+
+class ShapeSpec(NamedTuple):
+    type: Optional[str] = None
+    extras: Tuple[Tuple[str, Any], ...] = ()  # (extra, included) in config order
+
+
+class UnitConfig(NamedTuple):
+    key: str  # unit_1, unit_2, ...
+    unit_type: Optional[str] = None
+    window_area_frac: Optional[float] = None
+    interior: Optional[str] = None
+    exterior: Optional[str] = None
+    hardware: Tuple[Tuple[str, Any], ...] = ()  # (flag, included) in config order
+    shape: Optional[ShapeSpec] = None
+    glass: Optional[GlassSpec] = None
+
+    @classmethod
+    def from_dict(cls, key: str, unit: Dict) -> "UnitConfig":
+        get = unit.get
+        hardware = get('hardware')
+        shapes = get('shapes')
+        glass = get('glass')
+        if shapes is not None:
+            extras = shapes.get('extras')
+            shapes = _new(ShapeSpec, (shapes.get('type'), tuple(extras.items()) if extras else ()))
+        if glass is not None:
+            glass = _new(GlassSpec, (glass.get('type'), glass.get('subtype'), glass.get('thickness_mm')))
+        return _new(cls, (key, get('unit_type'), get('window_area_frac'), get('interior'), get('exterior'),
+                          tuple(hardware.items()) if hardware else (), shapes, glass))
+
+    def to_dict(self) -> Dict:
+        unit = _without_nulls(unit_type=self.unit_type, window_area_frac=self.window_area_frac,
+                              interior=self.interior, exterior=self.exterior)
+        if self.hardware:
+            unit['hardware'] = dict(self.hardware)
+        if self.shape is not None:
+            unit['shapes'] = _without_nulls(type=self.shape.type)
+            if self.shape.extras:
+                unit['shapes']['extras'] = dict(self.shape.extras)
+        if self.glass is not None:
+            unit['glass'] = _without_nulls(**self.glass._asdict())
+        return unit
+
+
+class BrickmouldSpec(NamedTuple):
+    include: Optional[bool] = None
+    size: Optional[str] = None
+    finish: Optional[str] = None
+    include_bay_bow_coupler: Optional[bool] = None
+    include_bay_bow_add_on: Optional[bool] = None
+
+    @classmethod
+    def from_dict(cls, brickmould: Dict) -> "BrickmouldSpec":
+        return _new(cls, map(brickmould.get, cls._fields))
+
+
+class CasingExtensionSpec(NamedTuple):
+    type: Optional[str] = None
+    finish: Optional[str] = None
+    include_bay_bow_extension: Optional[bool] = None
+    include_bay_bow_plywood: Optional[bool] = None
+
+    @classmethod
+    def from_dict(cls, casing_extension: Dict) -> "CasingExtensionSpec":
+        return _new(cls, map(casing_extension.get, cls._fields))
+
+
+class WindowConfig(NamedTuple):
+    width: Optional[float] = None
+    height: Optional[float] = None
+    units: Optional[Tuple[UnitConfig, ...]] = None  # None if the config has no units section
+    brickmould: Optional[BrickmouldSpec] = None
+    casing_extension: Optional[CasingExtensionSpec] = None
+
+    @classmethod
+    def from_dict(cls, config: Dict) -> "WindowConfig":
+        """Build the model from a config dict, e.g. as returned by ValidConfigGenerator"""
+        get = config.get
+        units = get('units')
+        brickmould = get('brickmould')
+        casing_extension = get('casing_extension')
+        if units is not None:
+            unit_from_dict = UnitConfig.from_dict
+            units = tuple([unit_from_dict(key, unit) for key, unit in units.items() if key.startswith('unit_')])
+        if brickmould is not None:
+            brickmould = BrickmouldSpec.from_dict(brickmould)
+        if casing_extension is not None:
+            casing_extension = CasingExtensionSpec.from_dict(casing_extension)
+        return _new(cls, (get('width'), get('height'), units, brickmould, casing_extension))
+
+    def to_dict(self) -> Dict:
+        """The config as a dict, without the keys that are None"""
+        config = _without_nulls(width=self.width, height=self.height)
+        if self.units is not None:
+            config['units'] = {unit.key: unit.to_dict() for unit in self.units}
+        if self.brickmould is not None:
+            config['brickmould'] = _without_nulls(**self.brickmould._asdict())
+        if self.casing_extension is not None:
+            config['casing_extension'] = _without_nulls(**self.casing_extension._asdict())
+        return config
+
+
+def _without_nulls(**values) -> Dict:
+    return {key: value for key, value in values.items() if value is not None}
@@ -1,419 +1,341 @@
-import re
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+from valid_config_generator import schema
+from valid_config_generator.config_model import BrickmouldSpec, CasingExtensionSpec, UnitConfig, WindowConfig
 
-from typing import Any, List, Optional, Set, Union, Tuple # Removed Dict, added Tuple
-from util.yaml_util import getOrReturnNoneYaml
+# Rule kinds: ENUM checks membership, TYPE checks isinstance
+_ENUM, _TYPE = range(2)
+_NUMBER = (int, float)
 
-class ConfigValidator:
-    """
-    Validates a window configuration represented as a YAML dict
-    object against a predefined keyspace and rules.
-    """
 
-    # --- Enums and Allowed Values (remain the same) ---
+class _Rule(NamedTuple):
+    """One precompiled check on a key of a config section, with its error messages pre-rendered"""
+    key: str
+    kind: int
+    allowed: Any  # frozenset for ENUM, type or tuple of types for TYPE
+    optional: bool
+    missing: str  # Reported when a required key is absent or None
+    invalid: str  # Message prefix for a value that's not allowed / of the wrong type
+    suffix: str  # ENUM: message suffix listing the allowed values; TYPE: positive check prefix, or ""
 
-    WINDOW_TYPES: Set[str] = {
-        'casement', 'awning', 'picture_window', 'fixed_casement',
-        'single_slider', 'single_hung', 'double_end_slider',
-        'double_hung', 'double_slider'
-    }
-    # ... (keep all other enum/set definitions from the previous version) ...
-    INTERIOR_OPTIONS: Set[str] = {"white", "colour", "stain"}
-    EXTERIOR_OPTIONS: Set[str] = {"white", "colour", "custom_colour", "stain"}
-    BOOLEAN_OPTIONS: Set[bool] = {True, False}
 
-    SHAPES_TYPES: Set[Optional[str]] = {
-        None, "half_circle", "quarter_circle", "ellipse", "true_ellipse",
-        "triangle", "trapezoid", "extended_arch"
-    }
+class _Section(NamedTuple):
+    """The rules for one config section: presence of the required keys, then each value rule in order"""
+    required: Tuple[Tuple[str, str], ...]  # (key, missing message)
+    rules: Tuple[_Rule, ...]
 
-    GLASS_TYPES: Set[str] = {"double", "triple"}
-    GLASS_DOUBLE_SUBTYPES: Set[str] = {
-        "lowe_180", "lowe_272", "lowe_366", "lowe_180_pinhead",
-        "lowe_272_pinhead", "lowe_180_neat", "lowe_272_neat",
-        "lowe_180_privacy", "lowe_272_privacy", "lowe_180_i89",
-        "tinted_clear", "tinted_lowe_180", "tinted_lowe_272",
-        "frosted_clear", "laminated_clear", "laminated_lowe_180",
-        "laminated_lowe_272", "laminated_laminated",
-        "tempered_lowe_180", "tempered_lowe_272"
-    }
-    GLASS_TRIPLE_SUBTYPES: Set[str] = {
-        "clear_clear_clear", "frosted_clear_clear",
-        "lowe_180_clear_clear", "lowe_272_clear_clear", "lowe_366_clear_clear",
-        "lowe_180_clear_lowe_366", "lowe_180_clear_lowe_180",
-        "lowe_272_clear_lowe_272", "lowe_180_lowe_180_i89",
-        "lowe_272_clear_frosted", "lowe_180_clear_frosted",
-        "lowe_272_clear_delta_frost", "lowe_180_clear_delta_frost",
-        "lowe_272_clear_taffeta", "lowe_180_clear_taffeta",
-        "lowe_272_clear_everglade", "lowe_180_clear_everglade",
-        "lowe_272_clear_acid_edge", "lowe_180_clear_acid_edge",
-        "lowe_272_tint_various", "lowe_180_tint_various"
-    }
 
-    BRICKMOULD_SIZES: Set[str] = {"0", "5_8", "1_1_4", "1_5_8", "2"}
-    BRICKMOULD_FINISHES: Set[str] = {"white", "colour", "stain"}
-
-    CASING_EXTENSION_TYPES: Set[Optional[str]] = {
-        None, "wood_return", "vinyl_pkg_1_3_8_casing_2_3_4",
-        "vinyl_pkg_2_3_8_casing_2_3_4", "vinyl_pkg_3_3_8_casing_2_3_4",
-        "vinyl_pkg_4_5_8_casing_2_3_4", "vinyl_pkg_1_3_8_casing_3_1_2",
-        "vinyl_pkg_2_3_8_casing_3_1_2", "vinyl_pkg_3_3_8_casing_3_1_2",
-        "vinyl_pkg_4_5_8_casing_3_1_2", "vinyl_ext_1_3_8",
-        "vinyl_ext_2_3_8", "vinyl_ext_3_3_8", "vinyl_ext_4_5_8",
-        "vinyl_ext_no_groove_2_1_2", "vinyl_ext_no_groove_3_1_2",
-        "vinyl_ext_no_groove_4_1_2", "vinyl_casing_2_3_4",
-        "vinyl_casing_3_1_2", "vinyl_casing_solid_2_3_4",
-        "vinyl_casing_solid_3_1_2", "vinyl_pkg_1_3_8_casing_step_2_3_4",
-        "vinyl_pkg_2_3_8_casing_step_2_3_4", "vinyl_pkg_3_3_8_casing_step_2_3_4",
-        "vinyl_pkg_4_5_8_casing_step_2_3_4", "vinyl_pkg_1_3_8_casing_step_3_1_2",
-        "vinyl_pkg_2_3_8_casing_step_3_1_2", "vinyl_pkg_3_3_8_casing_step_3_1_2",
-        "vinyl_pkg_4_5_8_casing_step_3_1_2"
-    }
-    CASING_EXTENSION_FINISHES: Set[str] = {"white", "stain", "colour"}
+def _missing(key: str) -> str:
+    return f"Required key missing: '{key}'"
 
 
-    # --- Main Validation Method ---
+def _section(required: Tuple[str, ...] = (), rules: Tuple[_Rule, ...] = ()) -> _Section:
+    return _Section(tuple((key, _missing(key)) for key in required), tuple(rules))
 
-    def validate(self, config: dict) -> tuple[bool, List[str]]: # Changed Dict to dict
-        """
-        Validates the entire configuration dictionary.
 
-        Args:
-            config: The config dictionary to validate.
+def _enum(key: str, allowed: Set, optional: bool = False) -> _Rule:
+    allowed_str = [str(v) if v is not None else "None" for v in allowed]
+    return _Rule(key, _ENUM, frozenset(allowed), optional, _missing(key),
+                 f"Invalid value for '{key}': '", f"'. Allowed: {sorted(allowed_str)}")
 
-        Returns:
-            A tuple containing:
-                - bool: True if there are errors (invalid), False if no errors (valid).
-                - list[str]: A list of error messages if validation fails.
-        """
-        errors: List[str] = []
-        if not isinstance(config, dict):
-             return True, ["Input must be a dictionary."]
 
-        # --- 1. Validate Top-Level Required Fields ---
-        self._validate_required(config, 'width', errors)
-        self._validate_required(config, 'height', errors)
-        self._validate_required(config, 'units', errors) # units section is required
+def _typed(key: str, expected_type, optional: bool = False, force_positive: bool = False) -> _Rule:
+    positive = f"Value for '{key}' must be positive and non-zero: Got " if force_positive else ""
+    return _Rule(key, _TYPE, expected_type, optional, _missing(key),
+                 f"Invalid type for '{key}': Expected {expected_type}, got ", positive)
 
-        # Check top-level types
-        self._validate_type(config, 'width', (int, float), errors, force_positive=True)
-        self._validate_type(config, 'height', (int, float), errors, force_positive=True)
 
-        # --- 2. Validate Units Section ---
-        units_data = getOrReturnNoneYaml(config, 'units')
-        if units_data is not None:
-            self._validate_units(units_data, errors)
+def _boolean(key: str) -> _Rule:
+    return _typed(key, bool, optional=True)
 
-        # --- 3. Validate Window-Scoped Sections (Brickmould, Casing) ---
-        self._validate_brickmould(getOrReturnNoneYaml(config, 'brickmould'), errors)
-        self._validate_casing_extension(getOrReturnNoneYaml(config, 'casing_extension'), errors)
 
-        return bool(errors), errors
+def _unit_type_rules(interior_options: Set, exterior_options: Set) -> Dict[str, Tuple[Tuple[_Section, ...], _Section]]:
+    """unit_type -> (finish sections, hardware section); interior is only chosen for some types"""
+    interior = _section(('interior',), (_enum('interior', interior_options),))
+    exterior = _section(('exterior',), (_enum('exterior', exterior_options),))
+    return {
+        unit_type: (
+            (interior, exterior) if unit_type in schema.INTERIOR_UNIT_TYPES else (exterior,),
+            _section(rules=tuple(_boolean(flag) for flag in schema.UNIT_HARDWARE.get(unit_type, ()))),
+        )
+        for unit_type in schema.WINDOW_TYPES
+    }
 
-    # --- Helper Validation Methods ---
-    # Update type hints for 'data' parameter to dict where applicable
 
-    def _validate_required(self, data: Optional[dict], key: str, errors: List[str]):
-        """Checks if a required key exists in the dict."""
-        # data could be None if a parent optional section was missing
-        if data is None or data.get(key) is None: # Use .get() for check
-             errors.append(f"Required key missing: '{key}'")
+def _check(data: dict, section: _Section, errors: List[str]):
+    """Applies a section's rules to data in order, appending an error for each failed check"""
+    get = data.get
+    required, rules = section
+    for key, missing in required:
+        if get(key) is None:
+            errors.append(missing)
+    for key, kind, allowed, optional, missing, invalid, suffix in rules:
+        value = get(key)
+        if value is None:
+            if not optional:
+                errors.append(missing)
+        elif kind is _ENUM:
+            if value not in allowed:
+                errors.append(f"{invalid}{value}{suffix}")
+        elif not isinstance(value, allowed):
+            errors.append(f"{invalid}{type(value)}")
+        elif suffix and value <= 0:
+            errors.append(f"{suffix}{value}")
 
-    def _validate_optional(self, data: Optional[dict], key: str, errors: List[str]) -> bool:
-        """Checks if an optional key exists. Returns True if present, False otherwise."""
-        return data is not None and data.get(key) is not None # Check presence via .get()
 
-    def _validate_enum(self, data: Optional[dict], key: str, allowed_values: Set, errors: List[str], optional: bool = False):
-        """Checks if a key's value is within the allowed set."""
-        if data is None:
-            if not optional:
-                 # This case might indicate a missing required parent section
-                 errors.append(f"Cannot check key '{key}', parent structure missing.")
-            return
+class ConfigValidator:
+    """
+    Validates a window configuration represented as a YAML dict
+    object against a predefined keyspace and rules.
 
-        value = getOrReturnNoneYaml(data, key)
+    The rules are compiled once into tables of _Rule tuples (per section, and per unit type
+    for the unit fields), so validate() is a single pass over the config with no per-call
+    set building or message formatting beyond the values that failed.
+    """
 
-        if value is None:
-            if not optional:
-                 errors.append(f"Required key missing: '{key}'")
-            return # Don't check value if key is missing (and allowed to be)
+    # --- Enums and Allowed Values (defined in schema.py, shared with the prompt) ---
 
-        if value not in allowed_values:
-            # Convert None to string for display
-            allowed_str = [str(v) if v is not None else "None" for v in allowed_values]
-            errors.append(f"Invalid value for '{key}': '{value}'. Allowed: {sorted(allowed_str)}")
+    WINDOW_TYPES: Set[str] = set(schema.WINDOW_TYPES)
+    INTERIOR_OPTIONS: Set[str] = set(schema.INTERIOR_OPTIONS)
+    EXTERIOR_OPTIONS: Set[str] = set(schema.EXTERIOR_OPTIONS)
+    BOOLEAN_OPTIONS: Set[bool] = {True, False}
 
-    def _validate_type(self, data: Optional[dict], key: str, expected_type: Union[type, tuple], errors: List[str], optional: bool = False, force_positive: bool = False):
-        """Checks if a key's value has the expected type."""
-        if data is None:
-             if not optional:
-                  errors.append(f"Cannot check key '{key}', parent structure missing.")
-             return
+    SHAPES_TYPES: Set[Optional[str]] = {None, *schema.SHAPES_TYPES}
+
+    GLASS_TYPES: Set[str] = set(schema.GLASS_TYPES)
+    GLASS_DOUBLE_SUBTYPES: Set[str] = set(schema.GLASS_DOUBLE_SUBTYPES)
+    GLASS_TRIPLE_SUBTYPES: Set[str] = set(schema.GLASS_TRIPLE_SUBTYPES)
+
+    BRICKMOULD_SIZES: Set[str] = set(schema.BRICKMOULD_SIZES)
+    BRICKMOULD_FINISHES: Set[str] = set(schema.BRICKMOULD_FINISHES)
+
+    CASING_EXTENSION_TYPES: Set[Optional[str]] = {None, *schema.CASING_EXTENSION_TYPES}
+    CASING_EXTENSION_FINISHES: Set[str] = set(schema.CASING_EXTENSION_FINISHES)
+
+
+    # Error message prefixes/fragments -> error type, checked in order (see error_type)
+    ERROR_TYPES: List[Tuple[str, str]] = [
+        ("Required", "missing_key"),
+        ("Cannot check key", "missing_key"),
+        ("is missing data", "missing_key"),
+        ("Invalid value", "invalid_value"),
+        ("Cannot validate glass subtype", "invalid_value"),
+        ("Invalid type", "invalid_type"),
+        ("must be a dict", "invalid_type"),
+        ("Input must be a dictionary", "invalid_type"),
+        ("must be positive", "out_of_range"),
+        ("must be between", "out_of_range"),
+        ("must sum to", "out_of_range"),
+        ("must contain at least one unit", "out_of_range"),
+    ]
+
+    # --- Precompiled Rule Tables ---
+    # A missing required key is reported by the section's required list and again by its value
+    # rule, as the validator always has, so repair prompts built from the errors are unchanged.
+
+    _WINDOW_RULES = _section(
+        ('width', 'height', 'units'),
+        (_typed('width', _NUMBER, force_positive=True), _typed('height', _NUMBER, force_positive=True)),
+    )
+    _UNIT_RULES = _section(
+        ('unit_type', 'window_area_frac'),
+        (_enum('unit_type', WINDOW_TYPES), _typed('window_area_frac', _NUMBER, force_positive=True)),
+    )
+    _UNIT_TYPE_RULES = _unit_type_rules(INTERIOR_OPTIONS, EXTERIOR_OPTIONS)
+    _GLASS_RULES = _section(
+        ('type', 'subtype', 'thickness_mm'),
+        (_enum('type', GLASS_TYPES), _typed('thickness_mm', _NUMBER, force_positive=True)),
+    )
+    _GLASS_SUBTYPE_RULES = {
+        'double': _section(rules=(_enum('subtype', GLASS_DOUBLE_SUBTYPES),)),
+        'triple': _section(rules=(_enum('subtype', GLASS_TRIPLE_SUBTYPES),)),
+    }
+    _SHAPES_RULES = _section(rules=(_enum('type', SHAPES_TYPES, optional=True),))
+    _SHAPE_EXTRAS_RULES = _section(rules=tuple(_boolean(extra) for extra in schema.SHAPE_EXTRAS))
+    _BRICKMOULD_RULES = _section(rules=(
+        _boolean('include'),
+        _enum('size', BRICKMOULD_SIZES, optional=True),
+        _enum('finish', BRICKMOULD_FINISHES, optional=True),
+        _boolean('include_bay_bow_coupler'),
+        _boolean('include_bay_bow_add_on'),
+    ))
+    _CASING_EXTENSION_RULES = _section(rules=(
+        _enum('type', CASING_EXTENSION_TYPES, optional=True),
+        _enum('finish', CASING_EXTENSION_FINISHES, optional=True),
+        *(_boolean(flag) for flag in schema.CASING_EXTENSION_FLAGS),
+    ))
+
+    @classmethod
+    def error_type(cls, message: str) -> str:
+        """Coarse category of a validate() error message, e.g. 'missing_key', for metrics"""
+        for fragment, error_type in cls.ERROR_TYPES:
+            if fragment in message:
+                return error_type
+        return "other"
 
-        value = getOrReturnNoneYaml(data, key)
+    # --- Main Validation Method ---
 
-        if value is None:
-             if not optional:
-                  errors.append(f"Required key missing: '{key}'")
-             return # Don't check type if key is missing (and allowed to be)
+    def validate(self, config: dict) -> tuple[bool, List[str]]:
+        """
+        Validates the entire configuration dictionary.
 
-        # Allow optional fields to be explicitly None/null
-        # This check seems redundant now given the previous check, but kept for clarity
-        # if optional and value is None:
-        #     return
+        Args:
+            config: The config dictionary to validate.
 
-        if not isinstance(value, expected_type):
-             errors.append(f"Invalid type for '{key}': Expected {expected_type}, got {type(value)}")
-             return # Don't do further checks if type is wrong
+        Returns:
+            A tuple containing:
+                - bool: True if there are errors (invalid), False if no errors (valid).
+                - list[str]: A list of error messages if validation fails.
+        """
+        _, errors = self.parse(config)
+        return bool(errors), errors
 
-        if force_positive and isinstance(value, (int, float)) and value <= 0:
-             errors.append(f"Value for '{key}' must be positive and non-zero: Got {value}")
+    def parse(self, config: dict) -> Tuple[Optional[WindowConfig], List[str]]:
+        """
+        Validates config and, if it's valid, returns its WindowConfig. Each section's model is
+        built from the section dict as soon as it has been checked, so the config is walked
+        once; validate() is this walk with the model dropped.
 
+        Returns:
+            A tuple (window_config, errors); window_config is None if validation fails.
+        """
+        errors: List[str] = []
+        if not isinstance(config, dict):
+            return None, ["Input must be a dictionary."]
 
-    def _validate_boolean(self, data: Optional[dict], key: str, errors: List[str], optional: bool = False):
-         """Specific validation for boolean fields."""
-         self._validate_type(data, key, bool, errors, optional=optional)
+        # --- 1. Top-Level Required Fields and Types ---
+        _check(config, self._WINDOW_RULES, errors)
 
+        # --- 2. Units Section ---
+        units = None
+        units_data = config.get('units')
+        if units_data is not None:
+            units = self._validate_units(units_data, errors)
+
+        # --- 3. Window-Scoped Sections (Brickmould, Casing) ---
+        brickmould = casing_extension = None
+        bm_data = config.get('brickmould')
+        if bm_data is not None:
+            if isinstance(bm_data, dict):
+                _check(bm_data, self._BRICKMOULD_RULES, errors)
+                brickmould = BrickmouldSpec.from_dict(bm_data)
+            else:
+                errors.append("'brickmould' section must be a dict if present.")
+        ce_data = config.get('casing_extension')
+        if ce_data is not None:
+            if isinstance(ce_data, dict):
+                _check(ce_data, self._CASING_EXTENSION_RULES, errors)
+                casing_extension = CasingExtensionSpec.from_dict(ce_data)
+            else:
+                errors.append("'casing_extension' section must be a dict if present.")
+
+        if errors:
+            return None, errors
+        return WindowConfig(config.get('width'), config.get('height'), units, brickmould, casing_extension), errors
 
     # --- Units Section Validator ---
-    
-    def _validate_units(self, units_data: Optional[dict], errors: List[str]):
-        """Validates the 'units' section containing all window units."""
-        if units_data is None:
-            errors.append("Required section 'units' is missing.")
-            return
+
+    def _validate_units(self, units_data: dict, errors: List[str]) -> Optional[Tuple[UnitConfig, ...]]:
+        """Validates the 'units' section containing all window units; returns the units that passed."""
         if not isinstance(units_data, dict):
             errors.append("'units' section must be a dict.")
-            return
-        
+            return None
+
         # Check that there's at least one unit
-        unit_keys = [key for key in units_data.keys() if key.startswith('unit_')]
+        unit_keys = [key for key in units_data if isinstance(key, str) and key.startswith('unit_')]
         if not unit_keys:
             errors.append("'units' section must contain at least one unit (unit_1, unit_2, etc.)")
-            return
-        
-        # Validate each unit
+            return None
+
+        # Validate each unit, tracking area fractions to ensure they sum to 1.0
+        units = []
         total_area_frac = 0.0
         for unit_key in unit_keys:
-            unit_data = units_data.get(unit_key)
-            if unit_data is not None:
-                self._validate_unit(unit_data, unit_key, errors)
-                # Track area fractions to ensure they sum to 1.0
-                area_frac = unit_data.get('window_area_frac', 0.0)
-                if isinstance(area_frac, (int, float)):
-                    total_area_frac += area_frac
-        
-        # Validate that area fractions sum to approximately 1.0
+            unit_data = units_data[unit_key]
+            if unit_data is None:
+                continue
+            if not isinstance(unit_data, dict):
+                errors.append(f"Unit '{unit_key}' must be a dict.")
+                continue
+            area_frac = unit_data.get('window_area_frac')
+            if isinstance(area_frac, (int, float)):
+                total_area_frac += area_frac
+            unit = self._validate_unit(unit_data, unit_key, errors)
+            if unit is not None:
+                units.append(unit)
+
         if abs(total_area_frac - 1.0) > 0.001:  # Allow small floating point errors
             errors.append(f"Unit area fractions must sum to 1.0, got {total_area_frac}")
+        return tuple(units)
+
+    def _validate_unit(self, unit_data: dict, unit_key: str, errors: List[str]) -> Optional[UnitConfig]:
+        """Validates an individual unit within the units section; returns its UnitConfig if it passed."""
+        n_errors = len(errors)
+        _check(unit_data, self._UNIT_RULES, errors)
 
-    def _validate_unit(self, unit_data: Optional[dict], unit_key: str, errors: List[str]):
-        """Validates an individual unit within the units section."""
-        if unit_data is None:
-            errors.append(f"Unit '{unit_key}' is missing data.")
-            return
-        if not isinstance(unit_data, dict):
-            errors.append(f"Unit '{unit_key}' must be a dict.")
-            return
-        
-        # Validate required unit fields
-        self._validate_required(unit_data, 'unit_type', errors)
-        self._validate_required(unit_data, 'window_area_frac', errors)
-        
-        # Validate unit_type enum
-        self._validate_enum(unit_data, 'unit_type', self.WINDOW_TYPES, errors, optional=False)
-        
-        # Validate window_area_frac type and range
-        self._validate_type(unit_data, 'window_area_frac', (int, float), errors, force_positive=True)
         area_frac = unit_data.get('window_area_frac')
         if isinstance(area_frac, (int, float)) and (area_frac <= 0 or area_frac > 1):
             errors.append(f"Unit '{unit_key}' window_area_frac must be between 0 and 1, got {area_frac}")
-        
-        # Validate unit-type specific sections
-        unit_type = unit_data.get('unit_type')
-        if unit_type in self.WINDOW_TYPES:
-            if unit_type == 'casement':
-                self._validate_unit_casement(unit_data, unit_key, errors)
-            elif unit_type == 'awning':
-                self._validate_unit_awning(unit_data, unit_key, errors)
-            elif unit_type == 'fixed_casement':
-                self._validate_unit_fixed_casement(unit_data, unit_key, errors)
-            elif unit_type == 'picture_window':
-                self._validate_unit_picture_window(unit_data, unit_key, errors)
-            elif unit_type == 'single_slider':
-                self._validate_unit_single_slider(unit_data, unit_key, errors)
-            elif unit_type == 'single_hung':
-                self._validate_unit_single_hung(unit_data, unit_key, errors)
-            elif unit_type == 'double_end_slider':
-                self._validate_unit_double_end_slider(unit_data, unit_key, errors)
-            elif unit_type == 'double_hung':
-                self._validate_unit_double_hung(unit_data, unit_key, errors)
-            elif unit_type == 'double_slider':
-                self._validate_unit_double_slider(unit_data, unit_key, errors)
-        
-        # Validate unit-scoped sections (glass is required, shapes is optional)
-        self._validate_unit_glass(getOrReturnNoneYaml(unit_data, 'glass'), unit_key, errors)
-        self._validate_unit_shapes(getOrReturnNoneYaml(unit_data, 'shapes'), unit_key, errors)
-
-    # --- Unit Type Specific Validators ---
-    # Update type hints and checks for dict
-
-    def _validate_unit_casement(self, unit_data: Optional[dict], unit_key: str, errors: List[str]):
-        """Validates casement-specific fields for a unit."""
-        self._validate_required(unit_data, 'interior', errors)
-        self._validate_enum(unit_data, 'interior', self.INTERIOR_OPTIONS, errors, optional=False)
-        self._validate_required(unit_data, 'exterior', errors)
-        self._validate_enum(unit_data, 'exterior', self.EXTERIOR_OPTIONS, errors, optional=False)
-
-        hardware_data = getOrReturnNoneYaml(unit_data, 'hardware')
-        if hardware_data is not None:
-             if not isinstance(hardware_data, dict):
-                 errors.append(f"Unit '{unit_key}' hardware section must be a dict.")
-             else:
-                 self._validate_boolean(hardware_data, 'rotto_corner_drive_1_corner', errors, optional=True)
-                 self._validate_boolean(hardware_data, 'rotto_corner_drive_2_corners', errors, optional=True)
-                 self._validate_boolean(hardware_data, 'egress_hardware', errors, optional=True)
-                 self._validate_boolean(hardware_data, 'hinges_add_over_30', errors, optional=True)
-                 self._validate_boolean(hardware_data, 'limiters', errors, optional=True)
-                 self._validate_boolean(hardware_data, 'encore_system', errors, optional=True)
-
-
-    def _validate_unit_awning(self, unit_data: Optional[dict], unit_key: str, errors: List[str]):
-        """Validates awning-specific fields for a unit."""
-        self._validate_required(unit_data, 'interior', errors)
-        self._validate_enum(unit_data, 'interior', self.INTERIOR_OPTIONS, errors, optional=False)
-        self._validate_required(unit_data, 'exterior', errors)
-        self._validate_enum(unit_data, 'exterior', self.EXTERIOR_OPTIONS, errors, optional=False)
-
-        hardware_data = getOrReturnNoneYaml(unit_data, 'hardware')
-        if hardware_data is not None:
-             if not isinstance(hardware_data, dict):
-                 errors.append(f"Unit '{unit_key}' hardware section must be a dict.")
-             else:
-                 self._validate_boolean(hardware_data, 'encore_system', errors, optional=True)
-                 self._validate_boolean(hardware_data, 'limiters', errors, optional=True)
-
-
-    def _validate_unit_fixed_casement(self, unit_data: Optional[dict], unit_key: str, errors: List[str]):
-        """Validates fixed_casement-specific fields for a unit."""
-        self._validate_required(unit_data, 'interior', errors)
-        self._validate_enum(unit_data, 'interior', self.INTERIOR_OPTIONS, errors, optional=False)
-        self._validate_required(unit_data, 'exterior', errors)
-        self._validate_enum(unit_data, 'exterior', self.EXTERIOR_OPTIONS, errors, optional=False)
-
-    def _validate_unit_picture_window(self, unit_data: Optional[dict], unit_key: str, errors: List[str]):
-        """Validates picture_window-specific fields for a unit."""
-        self._validate_required(unit_data, 'interior', errors)
-        self._validate_enum(unit_data, 'interior', self.INTERIOR_OPTIONS, errors, optional=False)
-        self._validate_required(unit_data, 'exterior', errors)
-        self._validate_enum(unit_data, 'exterior', self.EXTERIOR_OPTIONS, errors, optional=False)
-
-    def _validate_unit_single_slider(self, unit_data: Optional[dict], unit_key: str, errors: List[str]):
-        """Validates single_slider-specific fields for a unit."""
-        self._validate_required(unit_data, 'exterior', errors)
-        self._validate_enum(unit_data, 'exterior', self.EXTERIOR_OPTIONS, errors, optional=False)
-
-    def _validate_unit_single_hung(self, unit_data: Optional[dict], unit_key: str, errors: List[str]):
-        """Validates single_hung-specific fields for a unit."""
-        # Fixed interior colour: white only (Implicitly handled by absence of interior colour option)
-        # Interior stain not available
-        self._validate_required(unit_data, 'exterior', errors)
-        self._validate_enum(unit_data, 'exterior', self.EXTERIOR_OPTIONS, errors, optional=False)
-
-    def _validate_unit_double_end_slider(self, unit_data: Optional[dict], unit_key: str, errors: List[str]):
-        """Validates double_end_slider-specific fields for a unit."""
-        self._validate_required(unit_data, 'exterior', errors)
-        self._validate_enum(unit_data, 'exterior', self.EXTERIOR_OPTIONS, errors, optional=False)
-
-    def _validate_unit_double_hung(self, unit_data: Optional[dict], unit_key: str, errors: List[str]):
-        """Validates double_hung-specific fields for a unit."""
-        self._validate_required(unit_data, 'exterior', errors)
-        self._validate_enum(unit_data, 'exterior', self.EXTERIOR_OPTIONS, errors, optional=False)
-
-    def _validate_unit_double_slider(self, unit_data: Optional[dict], unit_key: str, errors: List[str]):
-        """Validates double_slider-specific fields for a unit."""
-        self._validate_required(unit_data, 'exterior', errors)
-        self._validate_enum(unit_data, 'exterior', self.EXTERIOR_OPTIONS, errors, optional=False)
 
+        # Unit-type specific fields (an unknown unit_type was reported by _UNIT_RULES)
+        hardware_data = unit_data.get('hardware')
+        type_rules = self._UNIT_TYPE_RULES.get(unit_data.get('unit_type'))
+        if type_rules is not None:
+            finish_sections, hardware_rules = type_rules
+            for section in finish_sections:
+                _check(unit_data, section, errors)
+            if hardware_rules.rules and hardware_data is not None:
+                if isinstance(hardware_data, dict):
+                    _check(hardware_data, hardware_rules, errors)
+                else:
+                    errors.append(f"Unit '{unit_key}' hardware section must be a dict.")
+
+        # Unit-scoped sections (glass is required, shapes is optional)
+        self._validate_unit_glass(unit_data.get('glass'), unit_key, errors)
+        shapes_data = unit_data.get('shapes')
+        if shapes_data is not None:
+            self._validate_unit_shapes(shapes_data, unit_key, errors)
+        if len(errors) > n_errors:
+            return None
+        if hardware_data is not None and not isinstance(hardware_data, dict):
+            # Unit types without hardware flags ignore the section, whatever it holds
+            unit_data = {**unit_data, 'hardware': None}
+        return UnitConfig.from_dict(unit_key, unit_data)
 
     # --- Unit-Scoped Section Validators ---
-    
+
     def _validate_unit_glass(self, glass_data: Optional[dict], unit_key: str, errors: List[str]):
         """Validates the 'glass' section for a unit."""
         if glass_data is None:
-             errors.append(f"Required section 'glass' is missing for unit '{unit_key}'.")
-             return
+            errors.append(f"Required section 'glass' is missing for unit '{unit_key}'.")
+            return
         if not isinstance(glass_data, dict):
-             errors.append(f"Unit '{unit_key}' glass section must be a dict.")
-             return
-
-        self._validate_required(glass_data, 'type', errors)
-        self._validate_required(glass_data, 'subtype', errors)
-        self._validate_required(glass_data, 'thickness_mm', errors)
-
-        self._validate_enum(glass_data, 'type', self.GLASS_TYPES, errors)
-        self._validate_type(glass_data, 'thickness_mm', (int, float), errors, force_positive=True)
+            errors.append(f"Unit '{unit_key}' glass section must be a dict.")
+            return
 
-        glass_type = glass_data.get('type')
-        subtype = glass_data.get('subtype')
+        _check(glass_data, self._GLASS_RULES, errors)
 
-        if subtype is not None: # Only validate subtype if it exists
-            if glass_type == 'double':
-                self._validate_enum(glass_data, 'subtype', self.GLASS_DOUBLE_SUBTYPES, errors)
-            elif glass_type == 'triple':
-                self._validate_enum(glass_data, 'subtype', self.GLASS_TRIPLE_SUBTYPES, errors)
-            elif glass_type is not None: # Error only if type exists but isn't double/triple
+        if glass_data.get('subtype') is not None:  # Only validate subtype if it exists
+            glass_type = glass_data.get('type')
+            subtype_rules = self._GLASS_SUBTYPE_RULES.get(glass_type)
+            if subtype_rules is not None:
+                _check(glass_data, subtype_rules, errors)
+            elif glass_type is not None:  # Error only if type exists but isn't double/triple
                 errors.append(f"Cannot validate glass subtype for unit '{unit_key}' because glass type ('{glass_type}') is not 'double' or 'triple'.")
 
-    def _validate_unit_shapes(self, shapes_data: Optional[dict], unit_key: str, errors: List[str]):
+    def _validate_unit_shapes(self, shapes_data: dict, unit_key: str, errors: List[str]):
         """Validates the 'shapes' section for a unit (optional section)."""
-        if shapes_data is None:
-             return # Optional section, None is valid
         if not isinstance(shapes_data, dict):
             errors.append(f"Unit '{unit_key}' shapes section must be a dict if present.")
             return
 
-        self._validate_enum(shapes_data, 'type', self.SHAPES_TYPES, errors, optional=True)
+        _check(shapes_data, self._SHAPES_RULES, errors)
 
-        extras_data = getOrReturnNoneYaml(shapes_data, 'extras')
+        extras_data = shapes_data.get('extras')
         if extras_data is not None:
-             if not isinstance(extras_data, dict):
-                 errors.append(f"Unit '{unit_key}' shapes.extras must be a dict.")
-             else:
-                 self._validate_boolean(extras_data, 'brickmould', errors, optional=True)
-                 self._validate_boolean(extras_data, 'inside_casing_all_around', errors, optional=True)
-                 self._validate_boolean(extras_data, 'extension', errors, optional=True)
-
-    # --- Window-Scoped Section Validators ---
-    # Update type hints and checks for dict
-
-
-
-    def _validate_brickmould(self, bm_data: Optional[dict], errors: List[str]):
-        """Validates the 'brickmould' section (optional section)."""
-        if bm_data is None:
-             return # Optional section
-        if not isinstance(bm_data, dict):
-            errors.append("'brickmould' section must be a dict if present.")
-            return
-
-        self._validate_boolean(bm_data, 'include', errors, optional=True)
-        self._validate_enum(bm_data, 'size', self.BRICKMOULD_SIZES, errors, optional=True)
-        self._validate_enum(bm_data, 'finish', self.BRICKMOULD_FINISHES, errors, optional=True)
-        self._validate_boolean(bm_data, 'include_bay_bow_coupler', errors, optional=True)
-        self._validate_boolean(bm_data, 'include_bay_bow_add_on', errors, optional=True)
-
-    def _validate_casing_extension(self, ce_data: Optional[dict], errors: List[str]):
-        """Validates the 'casing_extension' section (optional section)."""
-        if ce_data is None:
-             return # Optional section
-        if not isinstance(ce_data, dict):
-            errors.append("'casing_extension' section must be a dict if present.")
-            return
-
-        self._validate_enum(ce_data, 'type', self.CASING_EXTENSION_TYPES, errors, optional=True)
-        self._validate_enum(ce_data, 'finish', self.CASING_EXTENSION_FINISHES, errors, optional=True)
-        self._validate_boolean(ce_data, 'include_bay_bow_extension', errors, optional=True)
-        self._validate_boolean(ce_data, 'include_bay_pow_plywood', errors, optional=True)
+            if isinstance(extras_data, dict):
+                _check(extras_data, self._SHAPE_EXTRAS_RULES, errors)
+            else:
+                errors.append(f"Unit '{unit_key}' shapes.extras must be a dict.")
 
 
 # --- Example Usage ---
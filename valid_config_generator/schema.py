@@ -0,0 +1,199 @@
+"""
+Machine-readable schema for window configs.
+
+This is the single source of truth for the allowed values: ConfigValidator's enums are built
+from it, render_compact_schema() turns it into the compact prompt and config_json_schema()
+into the JSON schema for structured model output. Option tuples are ordered with the
+default first.
+"""
+from typing import Any, Dict, Tuple
+
+WINDOW_TYPES: Tuple[str, ...] = (
+    "casement", "awning", "picture_window", "fixed_casement", "single_slider",
+    "single_hung", "double_end_slider", "double_hung", "double_slider",
+)
+# Unit types with a selectable interior finish; the others are white inside only
+INTERIOR_UNIT_TYPES: Tuple[str, ...] = ("casement", "awning", "fixed_casement", "picture_window")
+INTERIOR_OPTIONS: Tuple[str, ...] = ("white", "colour", "stain")
+EXTERIOR_OPTIONS: Tuple[str, ...] = ("white", "colour", "custom_colour", "stain")
+
+# Optional boolean hardware flags by unit type, all default false
+UNIT_HARDWARE: Dict[str, Tuple[str, ...]] = {
+    "casement": ("rotto_corner_drive_1_corner", "rotto_corner_drive_2_corners", "egress_hardware",
+                 "hinges_add_over_30", "limiters", "encore_system"),
+    "awning": ("encore_system", "limiters"),
+}
+
+SHAPES_TYPES: Tuple[str, ...] = (
+    "half_circle", "quarter_circle", "ellipse", "true_ellipse", "triangle", "trapezoid", "extended_arch",
+)
+SHAPE_EXTRAS: Tuple[str, ...] = ("brickmould", "inside_casing_all_around", "extension")
+
+GLASS_TYPES: Tuple[str, ...] = ("double", "triple")
+GLASS_DOUBLE_SUBTYPES: Tuple[str, ...] = (
+    "lowe_180", "lowe_272", "lowe_366", "lowe_180_pinhead", "lowe_272_pinhead", "lowe_180_neat",
+    "lowe_272_neat", "lowe_180_privacy", "lowe_272_privacy", "lowe_180_i89", "tinted_clear",
+    "tinted_lowe_180", "tinted_lowe_272", "frosted_clear", "laminated_clear", "laminated_lowe_180",
+    "laminated_lowe_272", "laminated_laminated", "tempered_lowe_180", "tempered_lowe_272",
+)
+GLASS_TRIPLE_SUBTYPES: Tuple[str, ...] = (
+    "lowe_180_clear_clear", "clear_clear_clear", "frosted_clear_clear", "lowe_272_clear_clear",
+    "lowe_366_clear_clear", "lowe_180_clear_lowe_366", "lowe_180_clear_lowe_180",
+    "lowe_272_clear_lowe_272", "lowe_180_lowe_180_i89", "lowe_272_clear_frosted",
+    "lowe_180_clear_frosted", "lowe_272_clear_delta_frost", "lowe_180_clear_delta_frost",
+    "lowe_272_clear_taffeta", "lowe_180_clear_taffeta", "lowe_272_clear_everglade",
+    "lowe_180_clear_everglade", "lowe_272_clear_acid_edge", "lowe_180_clear_acid_edge",
+    "lowe_272_tint_various", "lowe_180_tint_various",
+)
+DEFAULT_GLASS_THICKNESS_MM = 4
+
+BRICKMOULD_SIZES: Tuple[str, ...] = ("1_5_8", "0", "5_8", "1_1_4", "2")
+BRICKMOULD_FINISHES: Tuple[str, ...] = ("white", "colour", "stain")
+BRICKMOULD_FLAGS: Tuple[str, ...] = ("include", "include_bay_bow_coupler", "include_bay_bow_add_on")
+
+CASING_EXTENSION_TYPES: Tuple[str, ...] = (
+    "wood_return",
+    "vinyl_pkg_1_3_8_casing_2_3_4", "vinyl_pkg_2_3_8_casing_2_3_4", "vinyl_pkg_3_3_8_casing_2_3_4",
+    "vinyl_pkg_4_5_8_casing_2_3_4", "vinyl_pkg_1_3_8_casing_3_1_2", "vinyl_pkg_2_3_8_casing_3_1_2",
+    "vinyl_pkg_3_3_8_casing_3_1_2", "vinyl_pkg_4_5_8_casing_3_1_2",
+    "vinyl_ext_1_3_8", "vinyl_ext_2_3_8", "vinyl_ext_3_3_8", "vinyl_ext_4_5_8",
+    "vinyl_ext_no_groove_2_1_2", "vinyl_ext_no_groove_3_1_2", "vinyl_ext_no_groove_4_1_2",
+    "vinyl_casing_2_3_4", "vinyl_casing_3_1_2", "vinyl_casing_solid_2_3_4", "vinyl_casing_solid_3_1_2",
+    "vinyl_pkg_1_3_8_casing_step_2_3_4", "vinyl_pkg_2_3_8_casing_step_2_3_4",
+    "vinyl_pkg_3_3_8_casing_step_2_3_4", "vinyl_pkg_4_5_8_casing_step_2_3_4",
+    "vinyl_pkg_1_3_8_casing_step_3_1_2", "vinyl_pkg_2_3_8_casing_step_3_1_2",
+    "vinyl_pkg_3_3_8_casing_step_3_1_2", "vinyl_pkg_4_5_8_casing_step_3_1_2",
+)
+CASING_EXTENSION_FINISHES: Tuple[str, ...] = ("white", "stain", "colour")
+CASING_EXTENSION_FLAGS: Tuple[str, ...] = ("include_bay_bow_extension", "include_bay_bow_plywood")
+
+# Shorthand seen on quote sheets (from custom_context.txt)
+ACRONYMS: Dict[str, str] = {
+    "CA": "casement", "C": "casement", "A": "awning", "DS": "double_slider", "SS": "single_slider",
+    "DH": "double_hung", "SH": "single_hung", "VF": "fixed_casement", "F": "fixed_casement", "W": "white",
+}
+
+
+def _options(values):
+    return "|".join(values)
+
+
+def render_compact_schema() -> str:
+    """
+    The config schema in the densest form the model reliably follows: one line per key,
+    'key: a|b|c' with the default first, '*' marking required keys and '#' notes for scoping rules.
+    """
+    acronyms = ", ".join(f"{acronym}={value}" for acronym, value in ACRONYMS.items())
+    hardware = "; ".join(f"{unit_type}: {', '.join(flags)}" for unit_type, flags in UNIT_HARDWARE.items())
+    lines = [
+        "width*: number # inches",
+        "height*: number # inches",
+        "units*:",
+        "  unit_<N>*: # N = 1, 2, ...; one per unit",
+        f"    unit_type*: {_options(WINDOW_TYPES)}",
+        "    window_area_frac*: number # share of the window area; units sum to 1",
+        f"    interior*: {_options(INTERIOR_OPTIONS)} # only for {', '.join(INTERIOR_UNIT_TYPES)}; omit for other types",
+        f"    exterior*: {_options(EXTERIOR_OPTIONS)}",
+        f"    hardware: # bool flags, default false; {hardware}; omit for other types",
+        "    shapes: # omit if the unit has no shape",
+        f"      type: {_options(SHAPES_TYPES)}",
+        f"      extras: {{{', '.join(f'{extra}: bool' for extra in SHAPE_EXTRAS)}}}",
+        "    glass*: # required on every unit; one glass mentioned applies to all units",
+        f"      type*: {_options(GLASS_TYPES)}",
+        f"      subtype*: double: {_options(GLASS_DOUBLE_SUBTYPES)}",
+        f"               triple: {_options(GLASS_TRIPLE_SUBTYPES)}",
+        f"      thickness_mm*: number # default {DEFAULT_GLASS_THICKNESS_MM}",
+        "brickmould: # whole window; omit unless mentioned; finish follows exterior",
+        f"  {BRICKMOULD_FLAGS[0]}: bool # true when brickmould is mentioned",
+        f"  size: {_options(BRICKMOULD_SIZES)}",
+        f"  finish: {_options(BRICKMOULD_FINISHES)}",
+        *(f"  {flag}: bool" for flag in BRICKMOULD_FLAGS[1:]),
+        "casing_extension: # whole window; omit unless casing/jamb mentioned",
+        f"  type: {_options(CASING_EXTENSION_TYPES)}",
+        f"  finish: {_options(CASING_EXTENSION_FINISHES)}",
+        *(f"  {flag}: bool" for flag in CASING_EXTENSION_FLAGS),
+        "",
+        f"Acronyms: {acronyms}.",
+    ]
+    return "\n".join(lines)
+
+
+# --- Structured (JSON schema) output ---
+#
+# Strict structured output needs every property listed as required and no additional
+# properties, so optional keys are nullable instead, and units is a list rather than an
+# object with unit_<N> keys. config_from_json() converts a response back to the config dict.
+
+def _nullable(spec: Dict[str, Any]) -> Dict[str, Any]:
+    spec = dict(spec)
+    spec["type"] = [spec["type"], "null"]
+    if "enum" in spec:
+        spec["enum"] = [*spec["enum"], None]
+    return spec
+
+
+def _object(properties: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": "object", "properties": properties, "required": list(properties), "additionalProperties": False}
+
+
+def _flags(names) -> Dict[str, Any]:
+    return _object({name: {"type": ["boolean", "null"]} for name in names})
+
+
+def config_json_schema() -> Dict[str, Any]:
+    """JSON schema for one window config, in the strict form the responses API accepts"""
+    hardware_flags = [flag for flags in UNIT_HARDWARE.values() for flag in flags]
+    unit = _object({
+        "unit_type": {"type": "string", "enum": list(WINDOW_TYPES)},
+        "window_area_frac": {"type": "number"},
+        "interior": _nullable({"type": "string", "enum": list(INTERIOR_OPTIONS)}),
+        "exterior": {"type": "string", "enum": list(EXTERIOR_OPTIONS)},
+        "hardware": _nullable(_flags(dict.fromkeys(hardware_flags))),
+        "shapes": _nullable(_object({
+            "type": {"type": "string", "enum": list(SHAPES_TYPES)},
+            "extras": _nullable(_flags(SHAPE_EXTRAS)),
+        })),
+        "glass": _object({
+            "type": {"type": "string", "enum": list(GLASS_TYPES)},
+            "subtype": {"type": "string", "enum": list(dict.fromkeys(GLASS_DOUBLE_SUBTYPES + GLASS_TRIPLE_SUBTYPES))},
+            "thickness_mm": {"type": "number"},
+        }),
+    })
+    brickmould = _object({
+        "include": {"type": ["boolean", "null"]},
+        "size": _nullable({"type": "string", "enum": list(BRICKMOULD_SIZES)}),
+        "finish": _nullable({"type": "string", "enum": list(BRICKMOULD_FINISHES)}),
+        **_flags(BRICKMOULD_FLAGS[1:])["properties"],
+    })
+    casing_extension = _object({
+        "type": _nullable({"type": "string", "enum": list(CASING_EXTENSION_TYPES)}),
+        "finish": _nullable({"type": "string", "enum": list(CASING_EXTENSION_FINISHES)}),
+        **_flags(CASING_EXTENSION_FLAGS)["properties"],
+    })
+    return _object({
+        "width": {"type": "number"},
+        "height": {"type": "number"},
+        "units": {"type": "array", "items": unit},
+        "brickmould": _nullable(brickmould),
+        "casing_extension": _nullable(casing_extension),
+    })
+
+
+def _drop_nulls(value):
+    if isinstance(value, dict):
+        return {key: _drop_nulls(item) for key, item in value.items() if item is not None}
+    if isinstance(value, list):
+        return [_drop_nulls(item) for item in value]
+    return value
+
+
+def config_from_json(data: Any) -> Any:
+    """
+    Convert a response following config_json_schema() to the config dict ConfigValidator and
+    WindowQuoter expect: nulls are dropped and the units list becomes unit_1, unit_2, ...
+    Anything that isn't shaped like the schema is returned as is for the validator to report.
+    """
+    data = _drop_nulls(data)
+    if isinstance(data, dict) and isinstance(data.get("units"), list):
+        data["units"] = {f"unit_{i}": unit for i, unit in enumerate(data["units"], start=1)}
+    return data
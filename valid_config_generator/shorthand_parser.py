@@ -0,0 +1,338 @@
+import re
+import threading
+import logging
+
+from typing import Dict, List, Optional, Tuple
+from valid_config_generator.config_model import WindowConfig
+from valid_config_generator.config_validator import ConfigValidator
+from util import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class _Unparsed(Exception):
+    """Raised when a description contains anything the grammar doesn't fully understand."""
+
+
+class ShorthandParser:
+    """
+    Deterministic parser for common window shorthand, e.g.
+    "36 x 48 casement, W/W, lowe 180" or "CA/A white/black triple 5mm".
+
+    It only understands window types (including the acronyms in custom_context.txt),
+    interior/exterior finishes and glass. If any part of a description is not recognised,
+    or is ambiguous, parse() returns None and the caller should fall back to the model.
+    The resulting config always passes ConfigValidator.validate.
+    """
+
+    # Full names are matched case-insensitively, acronyms only when written in capitals
+    WINDOW_TYPE_NAMES = {
+        "casement": "casement", "awning": "awning", "picture_window": "picture_window",
+        "picture": "picture_window", "fixed_casement": "fixed_casement", "fixed": "fixed_casement",
+        "single_slider": "single_slider", "single_hung": "single_hung",
+        "double_end_slider": "double_end_slider", "double_hung": "double_hung",
+        "double_slider": "double_slider",
+    }
+    WINDOW_TYPE_ACRONYMS = {
+        "DS": "double_slider", "CA": "casement", "SS": "single_slider", "DH": "double_hung",
+        "A": "awning", "SH": "single_hung", "VF": "fixed_casement", "C": "casement",
+        "F": "fixed_casement",
+    }
+    # Unit types that only take an exterior finish (interior is fixed white)
+    EXTERIOR_ONLY_TYPES = {"single_slider", "single_hung", "double_end_slider", "double_hung", "double_slider"}
+
+    # Any colour that isn't white is classified as 'colour'
+    COLOUR_WORDS = {
+        "black", "brown", "bronze", "red", "grey", "gray", "charcoal", "beige", "tan", "sandstone",
+        "cream", "ivory", "almond", "clay", "green", "blue", "yellow", "commercial_brown", "colour", "color",
+    }
+    WHITE_WORDS = {"white", "w", "wht"}
+    STAIN_WORDS = {"stain", "stained"}
+    INTERIOR_MARKERS = {"in", "int", "interior", "inside"}
+    EXTERIOR_MARKERS = {"out", "ext", "exterior", "outside"}
+    FILLER_WORDS = {"window", "windows", "unit", "units", "glass", "glazing", "pane", "vinyl", "frame", "and", "with"}
+
+    COATINGS = {"180", "272", "366"}
+    DEFAULT_THICKNESS_MM = 4
+
+    # Multi-word phrases collapsed to single tokens before tokenising
+    PHRASES = [
+        (r"\blow[\s-]?e\s*[-_]?\s*(180|272|366)\b", r"lowe_\1"),
+        (r"\blow[\s-]?e\b", "lowe"),
+        (r"\bpicture\s+window\b", "picture_window"),
+        (r"\bfixed\s+casement\b", "fixed_casement"),
+        (r"\bdouble\s+end\s+slider\b", "double_end_slider"),
+        (r"\bsingle\s+slider\b", "single_slider"),
+        (r"\bdouble\s+slider\b", "double_slider"),
+        (r"\bsingle\s+hung\b", "single_hung"),
+        (r"\bdouble\s+hung\b", "double_hung"),
+        (r"\b(double|dual|triple)\s+(pane|paned|glazed)\b", r"\1"),
+        (r"\bcustom\s+colou?r\b", "custom_colour"),
+        (r"\bcommercial\s+brown\b", "commercial_brown"),
+        (r"\b(\d)\s*mm\b", r"\1mm"),
+    ]
+
+    NUMBER = r"\d+(?:\.\d+)?"
+
+    _stats_lock = threading.Lock()
+    hits = 0
+    misses = 0
+
+    def __init__(self, config_validator: Optional[ConfigValidator] = None):
+        self.config_validator = config_validator or ConfigValidator()
+        self._phrases = [(re.compile(pattern, re.IGNORECASE), repl) for pattern, repl in self.PHRASES]
+        self._quantity = re.compile(rf"^\s*(\d+)\s*[x×]\s+(?={self.NUMBER}\s*\"?\s*[x×])", re.IGNORECASE)
+        self._dims = re.compile(rf"({self.NUMBER})\s*\"?\s*[x×]\s*({self.NUMBER})\s*\"?", re.IGNORECASE)
+        self._labelled = re.compile(rf"\b(width|height)\s*:\s*({self.NUMBER})\s*\"?", re.IGNORECASE)
+        self._project = re.compile(r",?\s*project description\s*:", re.IGNORECASE)
+
+    @classmethod
+    def stats(cls) -> Dict:
+        """Fast-path counters across all parsers in this process"""
+        with cls._stats_lock:
+            total = cls.hits + cls.misses
+            return {"hits": cls.hits, "misses": cls.misses, "hit_rate": cls.hits / total if total else 0.0}
+
+    @classmethod
+    def _count(cls, hit: bool):
+        with cls._stats_lock:
+            if hit:
+                cls.hits += 1
+            else:
+                cls.misses += 1
+        metrics.SHORTHAND_PARSES.labels("hit" if hit else "miss").inc()
+
+    def parse(self, free_text: str) -> Optional[Dict]:
+        """Return a valid config for free_text, or None if the description isn't fully understood."""
+        parsed = self._parse_and_validate(free_text)
+        return parsed and parsed[0]
+
+    def parse_config(self, free_text: str) -> Optional[WindowConfig]:
+        """parse(), returning the WindowConfig ConfigValidator.parse built while validating it"""
+        parsed = self._parse_and_validate(free_text)
+        return parsed and parsed[1]
+
+    def _parse_and_validate(self, free_text: str) -> Optional[Tuple[Dict, WindowConfig]]:
+        try:
+            config = self._parse(free_text)
+        except _Unparsed as e:
+            logger.debug(f"Shorthand parser fallback for '{free_text}': {e}")
+            self._count(False)
+            return None
+
+        window_config, errors = self.config_validator.parse(config)
+        if window_config is None:
+            logger.debug(f"Shorthand parser produced an invalid config for '{free_text}': {errors}")
+            self._count(False)
+            return None
+        self._count(True)
+        return config, window_config
+
+    # --- Grammar ---
+
+    def _parse(self, free_text: str) -> Dict:
+        if not isinstance(free_text, str) or not free_text.strip():
+            raise _Unparsed("empty description")
+
+        parts = self._project.split(free_text)
+        if len(parts) > 2:
+            raise _Unparsed("more than one project description")
+        window_text = parts[0]
+        project_text = parts[1] if len(parts) == 2 else ""
+
+        width, height, window_text = self._extract_dimensions(window_text)
+        window = self._parse_tokens(window_text)
+        # Project-wide settings only fill in what the window itself doesn't specify
+        project = self._parse_tokens(project_text)
+        if project["unit_types"]:
+            raise _Unparsed("window types in project description")
+
+        unit_types = window["unit_types"]
+        if not unit_types:
+            raise _Unparsed("no window type")
+
+        interior = window["interior"] or project["interior"] or "white"
+        exterior = window["exterior"] or project["exterior"] or "white"
+        glass = self._resolve_glass(window, project)
+
+        units = {}
+        for n, unit_type in enumerate(unit_types, 1):
+            unit = {"unit_type": unit_type, "window_area_frac": 1 if len(unit_types) == 1 else 1 / len(unit_types)}
+            if unit_type in self.EXTERIOR_ONLY_TYPES:
+                if interior != "white":
+                    raise _Unparsed(f"{unit_type} has a fixed white interior")
+            else:
+                unit["interior"] = interior
+            unit["exterior"] = exterior
+            unit["glass"] = dict(glass)
+            units[f"unit_{n}"] = unit
+
+        return {"width": width, "height": height, "units": units}
+
+    def _extract_dimensions(self, text: str) -> Tuple[float, float, str]:
+        text = self._quantity.sub(" ", text, count=1)
+
+        dims = self._dims.findall(text)
+        if len(dims) > 1:
+            raise _Unparsed("more than one set of dimensions")
+        text = self._dims.sub(" ", text)
+
+        labelled = {}
+        for label, value in self._labelled.findall(text):
+            label = label.lower()
+            if label in labelled:
+                raise _Unparsed(f"{label} given twice")
+            labelled[label] = self._number(value)
+        text = self._labelled.sub(" ", text)
+
+        width, height = labelled.get("width"), labelled.get("height")
+        if dims:
+            dim_width, dim_height = (self._number(v) for v in dims[0])
+            if (width is not None and width != dim_width) or (height is not None and height != dim_height):
+                raise _Unparsed("conflicting dimensions")
+            width, height = dim_width, dim_height
+        if width is None or height is None:
+            raise _Unparsed("missing width or height")
+        return width, height, text
+
+    @staticmethod
+    def _number(value: str):
+        number = float(value)
+        return int(number) if number.is_integer() else number
+
+    def _tokenize(self, text: str) -> List[str]:
+        for pattern, repl in self._phrases:
+            text = pattern.sub(repl, text)
+        text = re.sub(r"\s*/\s*", "/", text)
+        return [token for token in re.split(r"[\s,;:()]+", text) if token]
+
+    def _finish(self, word: str, side: str) -> Optional[str]:
+        word = word.lower()
+        if word in self.WHITE_WORDS:
+            return "white"
+        if word in self.STAIN_WORDS:
+            return "stain"
+        if word == "custom_colour":
+            if side == "interior":
+                raise _Unparsed("custom colour is exterior only")
+            return "custom_colour"
+        if word in self.COLOUR_WORDS:
+            return "colour"
+        return None
+
+    def _unit_type(self, token: str) -> Optional[str]:
+        if token in self.WINDOW_TYPE_ACRONYMS:
+            return self.WINDOW_TYPE_ACRONYMS[token]
+        return self.WINDOW_TYPE_NAMES.get(token.lower())
+
+    def _parse_tokens(self, text: str) -> Dict:
+        parsed = {"unit_types": [], "interior": None, "exterior": None,
+                  "panes": None, "coating": None, "glass_parts": None, "thickness": None}
+
+        def assign(key, value):
+            if parsed[key] is not None and parsed[key] != value:
+                raise _Unparsed(f"conflicting {key}")
+            parsed[key] = value
+
+        tokens = self._tokenize(text)
+        pending_finish = None  # bare finish waiting for an in/out marker or a second finish
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            lower = token.lower()
+
+            if "/" in token:
+                self._parse_slash_group(token, parsed, assign)
+            elif self._unit_type(token):
+                if parsed["unit_types"]:
+                    raise _Unparsed("window types must be separated by '/'")
+                parsed["unit_types"].append(self._unit_type(token))
+            elif lower in self.INTERIOR_MARKERS or lower in self.EXTERIOR_MARKERS:
+                if pending_finish is None:
+                    raise _Unparsed(f"'{token}' without a finish")
+                side = "interior" if lower in self.INTERIOR_MARKERS else "exterior"
+                assign(side, self._finish(pending_finish, side))
+                pending_finish = None
+            elif self._finish(lower, "exterior") is not None:
+                if pending_finish is None:
+                    pending_finish = lower
+                else:
+                    # Two bare finishes in a row read like "white/black": interior then exterior
+                    assign("interior", self._finish(pending_finish, "interior"))
+                    assign("exterior", self._finish(lower, "exterior"))
+                    pending_finish = None
+            elif lower in ("double", "dual"):
+                assign("panes", "double")
+            elif lower == "triple":
+                assign("panes", "triple")
+            elif re.fullmatch(r"lowe_(180|272|366)", lower):
+                assign("coating", lower[len("lowe_"):])
+            elif re.fullmatch(r"\dmm", lower):
+                assign("thickness", int(lower[0]))
+            elif lower in self.FILLER_WORDS:
+                pass
+            else:
+                raise _Unparsed(f"unknown token '{token}'")
+            i += 1
+
+        if pending_finish is not None:
+            if self._finish(pending_finish, "exterior") != "white":
+                raise _Unparsed(f"'{pending_finish}' doesn't say interior or exterior")
+            assign("interior", "white")
+            assign("exterior", "white")
+        return parsed
+
+    def _parse_slash_group(self, token: str, parsed: Dict, assign):
+        parts = [part for part in token.split("/")]
+        if not all(parts):
+            raise _Unparsed(f"malformed group '{token}'")
+
+        unit_types = [self._unit_type(part) for part in parts]
+        if all(unit_types):
+            if parsed["unit_types"]:
+                raise _Unparsed("more than one window type group")
+            parsed["unit_types"].extend(unit_types)
+            return
+
+        lowered = [part.lower() for part in parts]
+        if all(part in self.COATINGS or part in ("clear", "lowe_180", "lowe_272", "lowe_366") for part in lowered):
+            glass_parts = [part if part.startswith("lowe_") or part == "clear" else f"lowe_{part}" for part in lowered]
+            assign("glass_parts", tuple(glass_parts))
+            return
+
+        if len(parts) == 2:
+            interior = self._finish(parts[0], "interior")
+            exterior = self._finish(parts[1], "exterior")
+            if interior is not None and exterior is not None:
+                assign("interior", interior)
+                assign("exterior", exterior)
+                return
+
+        raise _Unparsed(f"unknown group '{token}'")
+
+    def _resolve_glass(self, window: Dict, project: Dict) -> Dict:
+        # Glass is taken as a whole from the window if it mentions any, otherwise the project
+        source = window if any(window[k] is not None for k in ("panes", "coating", "glass_parts")) else project
+        thickness = window["thickness"] or project["thickness"] or self.DEFAULT_THICKNESS_MM
+        panes, coating, glass_parts = source["panes"], source["coating"], source["glass_parts"]
+
+        if glass_parts is not None:
+            if coating is not None:
+                raise _Unparsed("glass given twice")
+            if panes is not None and panes != ("double" if len(glass_parts) == 2 else "triple"):
+                raise _Unparsed("pane count doesn't match glass layers")
+            if len(glass_parts) == 2:
+                if glass_parts[1] != "clear" or glass_parts[0] == "clear":
+                    raise _Unparsed(f"unsupported double glass {glass_parts}")
+                return {"type": "double", "subtype": glass_parts[0], "thickness_mm": thickness}
+            if len(glass_parts) == 3:
+                subtype = "_".join(glass_parts)
+                if subtype not in ConfigValidator.GLASS_TRIPLE_SUBTYPES:
+                    raise _Unparsed(f"unsupported triple glass {subtype}")
+                return {"type": "triple", "subtype": subtype, "thickness_mm": thickness}
+            raise _Unparsed(f"unsupported glass {glass_parts}")
+
+        coating = coating or "180"
+        if panes == "triple":
+            return {"type": "triple", "subtype": f"lowe_{coating}_clear_clear", "thickness_mm": thickness}
+        return {"type": "double", "subtype": f"lowe_{coating}", "thickness_mm": thickness}
@@ -0,0 +1,54 @@
+import random
+import unittest
+
+from valid_config_generator.config_model import GlassSpec, UnitConfig, WindowConfig
+from valid_config_generator.config_validator import ConfigValidator
+from window_quoter.tests.test_batch_quoter import PRICING_CONFIG_PATH, random_config
+from window_quoter.window_quoter import WindowQuoter
+
+
+class TestWindowConfig(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(99)
+        self.configs = [random_config(rng) for _ in range(200)]
+
+    def test_from_dict(self):
+        config = WindowConfig.from_dict({
+            "width": 36, "height": 48, "frame_colour": "white",
+            "units": {"unit_1": {"unit_type": "awning", "window_area_frac": 1.0, "hardware": {"limiters": True},
+                                 "glass": {"type": "double", "subtype": "lowe_180", "thickness_mm": 4}},
+                      "notes": "not a unit"},
+        })
+        self.assertEqual(config.units, (UnitConfig("unit_1", "awning", 1.0, hardware=(("limiters", True),),
+                                                   glass=GlassSpec("double", "lowe_180", 4)),))
+        self.assertIsNone(config.brickmould)
+        self.assertIsNone(WindowConfig.from_dict({"width": 36}).units)
+
+    def test_round_trip_and_hashable(self):
+        for config in self.configs:
+            window_config = WindowConfig.from_dict(config)
+            self.assertEqual(window_config.to_dict(), config)
+            self.assertEqual(hash(WindowConfig.from_dict(window_config.to_dict())), hash(window_config))
+        self.assertEqual(len({WindowConfig.from_dict(config) for config in self.configs * 2}), len(self.configs))
+
+    def test_quoter_accepts_dict_or_model(self):
+        for config in self.configs:
+            self.assertEqual(WindowQuoter(WindowConfig.from_dict(config), PRICING_CONFIG_PATH).quote_window(),
+                             WindowQuoter(config, PRICING_CONFIG_PATH).quote_window())
+        result = WindowQuoter.quote_many([WindowConfig.from_dict(config) for config in self.configs[:20]],
+                                         PRICING_CONFIG_PATH)
+        self.assertEqual(list(result.total), list(WindowQuoter.quote_many(self.configs[:20], PRICING_CONFIG_PATH).total))
+
+    def test_validator_parse(self):
+        validator = ConfigValidator()
+        window_config, errors = validator.parse(self.configs[0])
+        self.assertEqual((window_config, errors), (WindowConfig.from_dict(self.configs[0]), []))
+        self.assertEqual(validator.validate(window_config.to_dict()), (False, []))
+
+        window_config, errors = validator.parse({**self.configs[0], "width": -1})
+        self.assertIsNone(window_config)
+        self.assertEqual(errors, ["Value for 'width' must be positive and non-zero: Got -1"])
+
+
+if __name__ == '__main__':
+    unittest.main()
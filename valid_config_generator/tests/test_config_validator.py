@@ -0,0 +1,102 @@
+import unittest
+
+from valid_config_generator.config_validator import ConfigValidator
+
+VALID_CONFIG = {
+    "width": 30, "height": 40,
+    "units": {"unit_1": {"unit_type": "casement", "window_area_frac": 1.0, "interior": "white", "exterior": "colour",
+                         "hardware": {"limiters": True}, "shapes": {"type": None},
+                         "glass": {"type": "double", "subtype": "lowe_180", "thickness_mm": 4}}},
+    "brickmould": {"include": True, "size": "1_5_8", "finish": "white"},
+    "casing_extension": {"type": "wood_return", "finish": "stain", "include_bay_bow_extension": False},
+}
+
+
+class TestConfigValidator(unittest.TestCase):
+    """The error lists are pinned exactly: they're fed back to the model in repair prompts"""
+
+    def setUp(self):
+        self.validator = ConfigValidator()
+
+    def test_valid_config(self):
+        self.assertEqual(self.validator.validate(VALID_CONFIG), (False, []))
+        self.assertEqual(self.validator.validate("width: 30"), (True, ["Input must be a dictionary."]))
+
+    def test_missing_keys_reported_twice(self):
+        config = {"units": {"unit_1": {"interior": "white"}}}
+        self.assertEqual(self.validator.validate(config)[1], [
+            "Required key missing: 'width'",
+            "Required key missing: 'height'",
+            "Required key missing: 'width'",
+            "Required key missing: 'height'",
+            "Required key missing: 'unit_type'",
+            "Required key missing: 'window_area_frac'",
+            "Required key missing: 'unit_type'",
+            "Required key missing: 'window_area_frac'",
+            "Required section 'glass' is missing for unit 'unit_1'.",
+            "Unit area fractions must sum to 1.0, got 0.0",
+        ])
+
+    def test_invalid_values(self):
+        config = {
+            "width": -36, "height": "48 inches", "frame_colour": "white",
+            "units": {
+                "unit_1": {"unit_type": "casment", "window_area_frac": 0,
+                           "glass": {"type": "double", "subtype": "lowe_999", "thickness_mm": 4}},
+                "unit_2": {"unit_type": "awning", "window_area_frac": 1.5, "exterior": "black",
+                           "hardware": {"limiters": "yes", "encore_system": True},
+                           "glass": {"type": "quad", "subtype": "x"},
+                           "shapes": {"type": "circle", "extras": {"brickmould": 1}}},
+            },
+            "brickmould": {"include": True, "size": "3"},
+            "casing_extension": {"type": None, "finish": "black"},
+        }
+        self.assertEqual(self.validator.validate(config)[1], [
+            "Value for 'width' must be positive and non-zero: Got -36",
+            "Invalid type for 'height': Expected (<class 'int'>, <class 'float'>), got <class 'str'>",
+            "Invalid value for 'unit_type': 'casment'. Allowed: ['awning', 'casement', 'double_end_slider', "
+            "'double_hung', 'double_slider', 'fixed_casement', 'picture_window', 'single_hung', 'single_slider']",
+            "Value for 'window_area_frac' must be positive and non-zero: Got 0",
+            "Unit 'unit_1' window_area_frac must be between 0 and 1, got 0",
+            "Invalid value for 'subtype': 'lowe_999'. Allowed: ['frosted_clear', 'laminated_clear', "
+            "'laminated_laminated', 'laminated_lowe_180', 'laminated_lowe_272', 'lowe_180', 'lowe_180_i89', "
+            "'lowe_180_neat', 'lowe_180_pinhead', 'lowe_180_privacy', 'lowe_272', 'lowe_272_neat', "
+            "'lowe_272_pinhead', 'lowe_272_privacy', 'lowe_366', 'tempered_lowe_180', 'tempered_lowe_272', "
+            "'tinted_clear', 'tinted_lowe_180', 'tinted_lowe_272']",
+            "Unit 'unit_2' window_area_frac must be between 0 and 1, got 1.5",
+            "Required key missing: 'interior'",
+            "Required key missing: 'interior'",
+            "Invalid value for 'exterior': 'black'. Allowed: ['colour', 'custom_colour', 'stain', 'white']",
+            "Invalid type for 'limiters': Expected <class 'bool'>, got <class 'str'>",
+            "Required key missing: 'thickness_mm'",
+            "Invalid value for 'type': 'quad'. Allowed: ['double', 'triple']",
+            "Required key missing: 'thickness_mm'",
+            "Cannot validate glass subtype for unit 'unit_2' because glass type ('quad') is not 'double' or 'triple'.",
+            "Invalid value for 'type': 'circle'. Allowed: ['None', 'ellipse', 'extended_arch', 'half_circle', "
+            "'quarter_circle', 'trapezoid', 'triangle', 'true_ellipse']",
+            "Invalid type for 'brickmould': Expected <class 'bool'>, got <class 'int'>",
+            "Unit area fractions must sum to 1.0, got 1.5",
+            "Invalid value for 'size': '3'. Allowed: ['0', '1_1_4', '1_5_8', '2', '5_8']",
+            "Invalid value for 'finish': 'black'. Allowed: ['colour', 'stain', 'white']",
+        ])
+
+    def test_sections_of_the_wrong_type(self):
+        config = {
+            "width": 30, "height": 40,
+            "units": {"unit_1": {"unit_type": "single_hung", "window_area_frac": True, "exterior": "white",
+                                 "hardware": "ignored", "glass": ["double"], "shapes": "round"},
+                      "unit_2": None,
+                      "unit_3": "casement"},
+            "brickmould": "yes", "casing_extension": [],
+        }
+        self.assertEqual(self.validator.validate(config)[1], [
+            "Unit 'unit_1' glass section must be a dict.",
+            "Unit 'unit_1' shapes section must be a dict if present.",
+            "Unit 'unit_3' must be a dict.",
+            "'brickmould' section must be a dict if present.",
+            "'casing_extension' section must be a dict if present.",
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import json
+import os
+import unittest
+from unittest import mock
+
+from valid_config_generator import schema
+from valid_config_generator.config_validator import ConfigValidator
+from valid_config_generator.valid_config_generator import ValidConfigGenerator
+
+
+class TestCompactPrompt(unittest.TestCase):
+    def setUp(self):
+        self.prompt = ValidConfigGenerator.default_prompt("compact")
+
+    def test_every_option_is_in_the_prompt(self):
+        """The compact prompt lists every value the validator accepts"""
+        for name in ["WINDOW_TYPES", "INTERIOR_OPTIONS", "EXTERIOR_OPTIONS", "GLASS_TYPES", "GLASS_DOUBLE_SUBTYPES",
+                     "GLASS_TRIPLE_SUBTYPES", "BRICKMOULD_SIZES", "BRICKMOULD_FINISHES", "CASING_EXTENSION_TYPES",
+                     "CASING_EXTENSION_FINISHES", "SHAPES_TYPES"]:
+            allowed = getattr(ConfigValidator, name) - {None}
+            self.assertEqual(allowed, set(getattr(schema, name)), name)
+            for value in allowed:
+                with self.subTest(name=name, value=value):
+                    self.assertIn(value, self.prompt)
+        for flags in schema.UNIT_HARDWARE.values():
+            for flag in flags:
+                self.assertIn(flag, self.prompt)
+
+    def test_smaller_than_full_prompt(self):
+        self.assertLess(len(self.prompt), 0.5 * len(ValidConfigGenerator.default_prompt("full")))
+
+    def test_unknown_style(self):
+        with self.assertRaises(ValueError):
+            ValidConfigGenerator.default_prompt("verbose")
+
+
+JSON_RESPONSE = {
+    "width": 60, "height": 40,
+    "units": [
+        {"unit_type": "casement", "window_area_frac": 0.5, "interior": "white", "exterior": "colour",
+         "hardware": {"limiters": True, "encore_system": None, "rotto_corner_drive_1_corner": None,
+                      "rotto_corner_drive_2_corners": None, "egress_hardware": None, "hinges_add_over_30": None},
+         "shapes": None, "glass": {"type": "double", "subtype": "lowe_272", "thickness_mm": 4}},
+        {"unit_type": "double_hung", "window_area_frac": 0.5, "interior": None, "exterior": "colour",
+         "hardware": None, "shapes": None, "glass": {"type": "double", "subtype": "lowe_272", "thickness_mm": 4}},
+    ],
+    "brickmould": None, "casing_extension": None,
+}
+
+
+class TestJsonSchema(unittest.TestCase):
+    def assert_strict(self, node, path="$"):
+        """Strict structured output: every object lists all its properties as required, and no others"""
+        if node.get("type") == "object" or "object" in node.get("type", []):
+            self.assertFalse(node["additionalProperties"], path)
+            self.assertEqual(node["required"], list(node["properties"]), path)
+            for key, child in node["properties"].items():
+                self.assert_strict(child, f"{path}.{key}")
+        if "items" in node:
+            self.assert_strict(node["items"], f"{path}[]")
+
+    def test_schema_is_strict(self):
+        self.assert_strict(schema.config_json_schema())
+
+    def test_config_from_json(self):
+        """Nulls are dropped and the units list becomes unit_N keys the validator accepts"""
+        config = schema.config_from_json(json.loads(json.dumps(JSON_RESPONSE)))
+        self.assertEqual(list(config["units"]), ["unit_1", "unit_2"])
+        self.assertEqual(config["units"]["unit_1"]["hardware"], {"limiters": True})
+        self.assertNotIn("interior", config["units"]["unit_2"])
+        self.assertNotIn("brickmould", config)
+        self.assertEqual(ConfigValidator().validate(config), (False, []))
+
+    @mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test", "LLM_CACHE_PATH": ""})
+    def test_generator_json_output(self):
+        """In json mode the schema is sent with the request and responses are parsed as JSON"""
+        generator = ValidConfigGenerator("gpt-4.1", fast_path=False, output_format="json")
+        self.assertEqual(generator.model.text_format["schema"], schema.config_json_schema())
+        self.assertTrue(generator.model.text_format["strict"])
+        responses = iter(["not json", json.dumps(JSON_RESPONSE)])
+        with mock.patch.object(generator.model, "get_response", side_effect=lambda *args, **kwargs: next(responses)):
+            config = generator.generate_config("CA/DH 272, width: 60, height: 40")
+        self.assertEqual(config.units[1].unit_type, "double_hung")
+
+    def test_unknown_output_format(self):
+        with self.assertRaises(ValueError):
+            ValidConfigGenerator("gpt-4.1", output_format="xml")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+
+from valid_config_generator.config_validator import ConfigValidator
+from valid_config_generator.shorthand_parser import ShorthandParser
+
+
+class TestShorthandParser(unittest.TestCase):
+    def setUp(self):
+        self.parser = ShorthandParser()
+        self.validator = ConfigValidator()
+
+    def assertUnit(self, config, unit_key, unit_type, interior, exterior, glass_type, subtype, thickness=4):
+        unit = config['units'][unit_key]
+        self.assertEqual(unit['unit_type'], unit_type)
+        self.assertEqual(unit.get('interior'), interior)
+        self.assertEqual(unit['exterior'], exterior)
+        self.assertEqual(unit['glass'], {'type': glass_type, 'subtype': subtype, 'thickness_mm': thickness})
+
+    def test_common_shorthand(self):
+        """Quantity, dimensions, acronym finishes and glass"""
+        config = self.parser.parse("3x 36 x 48 casement, W/W, lowe 180")
+        self.assertEqual((config['width'], config['height']), (36, 48))
+        self.assertUnit(config, 'unit_1', 'casement', 'white', 'white', 'double', 'lowe_180')
+        self.assertFalse(self.validator.validate(config)[0])
+
+    def test_formatted_description_with_project_defaults(self):
+        """Project description settings fill in only what the window leaves unspecified"""
+        config = self.parser.parse("casement, width: 36, height: 48, project description: black black 180/clear")
+        self.assertUnit(config, 'unit_1', 'casement', 'colour', 'colour', 'double', 'lowe_180')
+
+        config = self.parser.parse("white white awning, width: 34, height: 34, project description: black black 272/clear")
+        self.assertUnit(config, 'unit_1', 'awning', 'white', 'white', 'double', 'lowe_272')
+
+    def test_multi_unit_acronyms(self):
+        """Slash-separated unit types split the window evenly"""
+        config = self.parser.parse('CA/A 60" x 40" white/black triple 5mm')
+        self.assertEqual(len(config['units']), 2)
+        self.assertEqual(config['units']['unit_1']['window_area_frac'], 0.5)
+        self.assertUnit(config, 'unit_1', 'casement', 'white', 'colour', 'triple', 'lowe_180_clear_clear', 5)
+        self.assertUnit(config, 'unit_2', 'awning', 'white', 'colour', 'triple', 'lowe_180_clear_clear', 5)
+
+        config = self.parser.parse("C/VF/C 96 x 48")
+        self.assertFalse(self.validator.validate(config)[0])
+        self.assertEqual([u['unit_type'] for u in config['units'].values()],
+                         ['casement', 'fixed_casement', 'casement'])
+
+    def test_in_out_markers(self):
+        """'in'/'out' mark interior/exterior; exterior-only types reject interior colours"""
+        config = self.parser.parse("double hung 30x60 black out")
+        self.assertUnit(config, 'unit_1', 'double_hung', None, 'colour', 'double', 'lowe_180')
+        self.assertIsNone(self.parser.parse("double hung 30x60 black in"))
+
+    def test_falls_back_when_not_understood(self):
+        """Anything unrecognised or ambiguous is left to the model"""
+        for description in [
+            "picture window half circle 50 x 36 triple pane low e 180",  # shapes
+            "casement, width: 36, height: 48, project description: brickmould 1_5_8",  # trim
+            "36x48 casement black",  # colour without interior/exterior
+            "casement 36 x 48 width: 40",  # conflicting dimensions
+            "casement awning 36 x 48",  # units without a separator
+            "casement",  # no dimensions
+            "a casement 36 x 48",  # lower case single-letter acronym
+        ]:
+            with self.subTest(description=description):
+                self.assertIsNone(self.parser.parse(description))
+
+    def test_hit_rate_counter(self):
+        hits, misses = ShorthandParser.hits, ShorthandParser.misses
+        self.parser.parse("36 x 48 casement")
+        self.parser.parse("36 x 48 casement with grilles")
+        stats = ShorthandParser.stats()
+        self.assertEqual(stats['hits'], hits + 1)
+        self.assertEqual(stats['misses'], misses + 1)
+        self.assertGreater(stats['hit_rate'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import asyncio
+import copy
+import os
+import unittest
+from unittest import mock
+
+import yaml
+
+from valid_config_generator.config_model import WindowConfig
+from valid_config_generator.valid_config_generator import ValidConfigGenerator
+
+CONFIG = {
+    "width": 36, "height": 48,
+    "units": {"unit_1": {"unit_type": "casement", "window_area_frac": 1.0, "interior": "white", "exterior": "colour",
+                         "glass": {"type": "double", "subtype": "lowe_180", "thickness_mm": 4}}},
+}
+
+
+@mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test", "LLM_CACHE_PATH": ""})
+class TestRetries(unittest.TestCase):
+    def test_retries_continue_the_exchange(self):
+        """Each retry sends the previous responses back with the errors, instead of starting over"""
+        generator = ValidConfigGenerator("gpt-4.1", fast_path=False)
+        not_yaml = "width: [unclosed"
+        invalid = yaml.safe_dump({**CONFIG, "width": -36})
+        with mock.patch.object(generator.model, "get_response",
+                               side_effect=[not_yaml, invalid, yaml.safe_dump(CONFIG)]) as get_response:
+            config = generator.generate_config("casement black black, width: 36, height: 48")
+
+        self.assertEqual(config, WindowConfig.from_dict(CONFIG))
+        inputs = [call.args[0] for call in get_response.call_args_list]
+        self.assertEqual(inputs[0], "casement black black, width: 36, height: 48")
+        self.assertEqual([message["role"] for message in inputs[2]], ["user", "assistant", "user", "assistant", "user"])
+        self.assertEqual(inputs[2][:3], inputs[1])
+        self.assertEqual(inputs[2][0]["content"], inputs[0])
+        self.assertEqual(inputs[2][1]["content"], not_yaml)
+        self.assertEqual(inputs[2][3]["content"], invalid)
+        self.assertIn("must be positive", inputs[2][4]["content"])
+
+    def test_no_response_is_resent(self):
+        generator = ValidConfigGenerator("gpt-4.1", fast_path=False)
+        with mock.patch.object(generator.model, "get_response",
+                               side_effect=[None, yaml.safe_dump(CONFIG)]) as get_response:
+            self.assertEqual(generator.generate_config("casement, width: 36, height: 48"), WindowConfig.from_dict(CONFIG))
+        self.assertEqual(get_response.call_args_list[1].args[0], "casement, width: 36, height: 48")
+
+
+def sized(width, height, unit_type="casement"):
+    """The config dict for a unit_type sized width x height (see sized_config for the model)"""
+    config = copy.deepcopy(CONFIG)
+    config["width"], config["height"] = width, height
+    config["units"]["unit_1"]["unit_type"] = unit_type
+    if unit_type not in ("casement", "awning", "fixed_casement", "picture_window"):
+        del config["units"]["unit_1"]["interior"]
+    return config
+
+
+def sized_config(*args, **kwargs):
+    return WindowConfig.from_dict(sized(*args, **kwargs))
+
+
+@mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test", "LLM_CACHE_PATH": ""})
+class TestGenerateConfigs(unittest.TestCase):
+    def test_dedup_key(self):
+        key, dimensions = ValidConfigGenerator.dedup_key("36x48 Casement  W/W, width: 36, height: 48")
+        self.assertEqual(dimensions, (36, 48))
+        self.assertEqual(ValidConfigGenerator.dedup_key("30 x 40.5 casement w/w, width: 30, height: 40.5"),
+                         (key, (30, 40.5)))
+        self.assertNotEqual(ValidConfigGenerator.dedup_key("casement b/w, width: 36, height: 48")[0], key)
+        self.assertEqual(ValidConfigGenerator.dedup_key("casement w/w"), ("casement w/w", None))
+
+    def test_dedup_key_keeps_unit_sizes(self):
+        """Per-unit sizes set the area split, so descriptions differing in them don't share a config"""
+        left_narrow = ValidConfigGenerator.dedup_key("twin, left 24x48 casement, right 36x48 picture, width: 60, height: 48")
+        even_split = ValidConfigGenerator.dedup_key("twin, left 30x48 casement, right 30x48 picture, width: 60, height: 48")
+        self.assertNotEqual(left_narrow[0], even_split[0])
+        self.assertEqual(left_narrow, ("twin, left 24x48 casement, right 36x48 picture", (60, 48)))
+        self.assertEqual(ValidConfigGenerator.dedup_key("60x48 twin, left 30x48 casement, width: 60, height: 48")[0],
+                         "twin, left 30x48 casement")
+
+    def test_batched_with_dedup_and_item_repair(self):
+        """Unique descriptions share one request; only the invalid item is retried, on its own"""
+        free_texts = ["casement W/W, width: 36, height: 48"] * 3 + [
+            "double hung W/W, width: 30, height: 60",
+            "casement w/w, width: 24, height: 24",
+            "single hung W/W, width: 30, height: 40",
+        ]
+        invalid = {**sized(30, 40, "single_hung"), "width": -30}
+        batch_response = yaml.safe_dump({"configs": {"item_1": sized(36, 48), "item_2": sized(30, 60, "double_hung"),
+                                                     "item_3": invalid}})
+        generator = ValidConfigGenerator("gpt-4.1", fast_path=False)
+        with mock.patch.object(generator.batch_model, "get_response", return_value=batch_response) as batch_call, \
+                mock.patch.object(generator.model, "get_response",
+                                  return_value=yaml.safe_dump(sized(30, 40, "single_hung"))) as item_call:
+            configs = generator.generate_configs(free_texts)
+
+        self.assertEqual(batch_call.call_count, 1)
+        self.assertEqual(batch_call.call_args.args[0].count("item_"), 3)
+        self.assertEqual(item_call.call_count, 1)
+        retry = item_call.call_args.args[0]
+        self.assertEqual(retry[0]["content"], free_texts[5])
+        self.assertEqual(yaml.safe_load(retry[1]["content"]), invalid)
+        self.assertEqual(configs[:3], [sized_config(36, 48)] * 3)
+        self.assertIsNot(configs[0], configs[1])
+        self.assertEqual(configs[3], sized_config(30, 60, "double_hung"))
+        self.assertEqual(configs[4], sized_config(24, 24))
+        self.assertEqual(configs[5], sized_config(30, 40, "single_hung"))
+
+    def test_item_missing_from_batch_generated_without_a_retry(self):
+        """An item the batch response leaves out gets its own first request; no retry is spent on it"""
+        batch_response = yaml.safe_dump({"configs": {"item_1": sized(36, 48)}})
+        item_response = yaml.safe_dump(sized(30, 40, "awning"))
+        for run in ("sync", "async"):
+            free_texts = [f"casement w/w kept {run}, width: 36, height: 48",
+                          f"awning w/w left out {run}, width: 30, height: 40"]
+            generator = ValidConfigGenerator("gpt-4.1", fast_path=False, num_retries=0)
+            with self.subTest(run):
+                if run == "sync":
+                    with mock.patch.object(generator.batch_model, "get_response", return_value=batch_response), \
+                            mock.patch.object(generator.model, "get_response", return_value=item_response) as item_call:
+                        configs = generator.generate_configs(free_texts)
+                else:
+                    with mock.patch.object(generator.batch_model, "aget_response", return_value=batch_response), \
+                            mock.patch.object(generator.model, "aget_response", return_value=item_response) as item_call:
+                        configs = asyncio.run(generator.agenerate_configs(free_texts))
+                self.assertEqual(configs, [sized_config(36, 48), sized_config(30, 40, "awning")])
+                self.assertEqual(item_call.call_args_list, [mock.call(free_texts[1], use_cache=True)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,16 +1,45 @@
-from llm_io.model_io import ModelIO
+from llm_io.model_io import CacheStore, ModelCall, ModelIO, arun_steps, run_steps
+from valid_config_generator.config_model import WindowConfig
 from valid_config_generator.config_validator import ConfigValidator
+from valid_config_generator.shorthand_parser import ShorthandParser
+from valid_config_generator import schema
+from util import metrics
+from util.timing import NULL_TIMINGS
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import asyncio
+import functools
+import json
+import os
+import re
 import yaml
 import logging
 
 logger = logging.getLogger(__name__)
 
-class ValidConfigGenerator:
+# The "width: W, height: H" ProjectQuoter.format_window_description appends, and inline sizes like 36 x 48
+_FIELD_DIMENSIONS = re.compile(r",? ?width: ([\d.]+), height: ([\d.]+)")
+_INLINE_DIMENSIONS = re.compile(r"\b(\d+(?:\.\d+)?)\s*(?:\"|in)?\s*[x×*]\s*(\d+(?:\.\d+)?)\s*(?:\"|in)?")
+
+
+def _number(text):
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 
-    default_conf = open("valid_config_generator/window.yaml", "r").read()
-    additional_context = open("valid_config_generator/custom_context.txt", "r").read()
+@functools.lru_cache(maxsize=None)
+def read_prompt_asset(name):
+    """A prompt asset shipped with this package (window.yaml, custom_context.txt), read on first use"""
+    with open(os.path.join(_PACKAGE_DIR, name), "r") as file:
+        return file.read()
 
-    prompt_instructions = f"""
+
+class ValidConfigGenerator:
+
+    # Formatted with window.yaml and custom_context.txt by default_prompt("full")
+    prompt_instructions = """
         You are a helpful assistant that converts free-form specifications on a quote sheet for window replacements to a yaml format with constrained keys.
         Return in text the .yaml file for inspection
 
@@ -44,52 +73,350 @@ class ValidConfigGenerator:
     """
 
 
-    def __init__(self, model_name, debug = False, num_retries=2):
-        self.model = ModelIO("openai", model_name, self.generate_prompt())
+    # Generated from schema.py: the same rules and options in about a third of the tokens
+    compact_prompt_instructions = """Convert a free-text window quote line to a YAML window config.
+Output only raw YAML: no code fences, standard double quotes, only the keys and options below. * = required; the first option is the default.
+- A window has one or more units sharing its width x height. Units are usually separated by "/"; split the area evenly unless stated.
+- Include everything the text mentions (casing, brickmould, shapes, hardware). Omit optional keys and sections it doesn't mention.
+- Settings after "project description:" apply only where the window's own text doesn't set them.
+- Any non-white colour (red, black, ...) is colour. "in" = interior, "out" = exterior. Finishes "a/b" are interior/exterior: white/black = white interior, colour exterior.
+- jamb = casing. Casing sizes are fractions (1_3_8 = 1 3/8"); convert decimals (2.5 = 2_1_2).
+
+{schema}
+"""
+
+    # Appended to either prompt style when the output is constrained to schema.config_json_schema()
+    json_output_instructions = """
+Respond with JSON matching the response schema instead of YAML. units is a list in unit order (unit_1 first).
+Use null for optional keys and sections the text doesn't mention.
+"""
+
+    # Sent as a follow-up to an invalid response
+    retry_message = "That config was invalid. Fix only these errors, keep everything else the same and return the full config: {warnings}"
+
+    # Appended to the prompt for generate_configs() batch requests
+    batch_instructions = """
+The input lists several quote lines as item_<N>: <text>. Convert each one on its own and return
+configs:
+  item_<N>: # the same N as the input
+    <that item's config>
+"""
+    json_batch_instructions = """
+The input lists several quote lines as item_<N>: <text>. Convert each one on its own: configs is a list with
+item set to N and config set to that item's config.
+"""
+
+    PROMPT_STYLES = ("compact", "full")
+    OUTPUT_FORMATS = ("yaml", "json")
+
+    # Formatted once per process per (style, output format) by default_prompt(), the prompts are several kilobytes
+    _default_prompts = {}
+
+    def __init__(self, model_name, debug = False, num_retries=2, fast_path=True, prompt_style="compact", output_format="yaml"):
+        """
+        prompt_style: "compact" (default) renders the prompt from schema.py; "full" inlines
+        window.yaml and custom_context.txt verbatim.
+        output_format: "yaml" (default) asks for YAML text; "json" constrains the model to
+        schema.config_json_schema() with structured output, so responses always parse.
+        """
+        if output_format not in self.OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output_format '{output_format}', expected one of {self.OUTPUT_FORMATS}")
+        self.prompt_style = prompt_style
+        self.output_format = output_format
+        text_format = None
+        if output_format == "json":
+            text_format = {"type": "json_schema", "name": "window_config", "schema": schema.config_json_schema(),
+                           "strict": True}
+        self.model = ModelIO("openai", model_name, self.default_prompt(prompt_style, output_format),
+                             caller="config_generator", text_format=text_format)
+        # Several descriptions per request for generate_configs(); items that fail validation are
+        # repaired through self.model
+        batch_text_format = None
+        if output_format == "json":
+            item = {"type": "object",
+                    "properties": {"item": {"type": "integer"}, "config": schema.config_json_schema()},
+                    "required": ["item", "config"], "additionalProperties": False}
+            batch_text_format = {"type": "json_schema", "name": "window_configs", "strict": True, "schema": {
+                "type": "object", "properties": {"configs": {"type": "array", "items": item}},
+                "required": ["configs"], "additionalProperties": False}}
+        batch_prompt = self.default_prompt(prompt_style, output_format) + (
+            self.json_batch_instructions if output_format == "json" else self.batch_instructions)
+        self.batch_model = ModelIO("openai", model_name, batch_prompt, caller="config_generator_batch",
+                                   text_format=batch_text_format)
         self.config_validator = ConfigValidator()
         self.debug = debug
         self.num_retries = num_retries
+        # Rule-based parser for common shorthand, the model is only called when it can't parse
+        self.shorthand_parser = ShorthandParser(self.config_validator) if fast_path else None
     
-    def generate_prompt(self, default_conf=default_conf, additional_context=additional_context):
-        return self.prompt_instructions.format(default_conf=default_conf, additional_context=additional_context)
+    def generate_prompt(self, default_conf=None, additional_context=None):
+        return self.prompt_instructions.format(default_conf=default_conf or read_prompt_asset("window.yaml"),
+                                               additional_context=additional_context or read_prompt_asset("custom_context.txt"))
 
-    def generate_config(self, free_text, debug_file_path = ""):
-        response = self.model.get_response(free_text)
-        if self.debug:
+    @classmethod
+    def default_prompt(cls, prompt_style="compact", output_format="yaml"):
+        """The system prompt for prompt_style and output_format, formatted on first use"""
+        prompt = cls._default_prompts.get((prompt_style, output_format))
+        if prompt is None:
+            if prompt_style == "compact":
+                prompt = cls.compact_prompt_instructions.format(schema=schema.render_compact_schema())
+            elif prompt_style == "full":
+                prompt = cls.prompt_instructions.format(default_conf=read_prompt_asset("window.yaml"),
+                                                        additional_context=read_prompt_asset("custom_context.txt"))
+            else:
+                raise ValueError(f"Unknown prompt_style '{prompt_style}', expected one of {cls.PROMPT_STYLES}")
+            if output_format == "json":
+                prompt += cls.json_output_instructions
+            cls._default_prompts[(prompt_style, output_format)] = prompt
+        return prompt
+
+    def generate_config(self, free_text, debug_file_path = "", timings=NULL_TIMINGS) -> Optional[WindowConfig]:
+        """
+        Generate a validated config for free_text, or None if none could be generated. The
+        config is the WindowConfig built while validating it, ready for WindowQuoter.
+
+        timings (util.timing.StageTimings) records the shorthand, llm, yaml_parse (or
+        json_parse) and validate stages and counts retries.
+        """
+        return run_steps(self.config_steps(free_text, debug_file_path, timings))
+
+    async def agenerate_config(self, free_text, debug_file_path = "", timings=NULL_TIMINGS):
+        """generate_config() with the model calls awaited"""
+        return await arun_steps(self.config_steps(free_text, debug_file_path, timings))
+
+    def config_steps(self, free_text, debug_file_path = "", timings=NULL_TIMINGS):
+        """generate_config() as a step generator (see llm_io.model_io.run_steps)"""
+        if self.shorthand_parser is not None:
+            with timings.stage("shorthand"):
+                config = self.shorthand_parser.parse_config(free_text)
+            if config:
+                logger.debug(f"Parsed '{free_text}' without the model")
+                if self.debug:
+                    self.write_yaml_to_file(yaml.safe_dump(config.to_dict(), sort_keys=False), debug_file_path)
+                return config
+
+        with timings.stage("llm"):
+            response = yield ModelCall(self.model, free_text)
+        if self.debug and response is not None:
             self.write_yaml_to_file(response, debug_file_path)
-        try:
-            config = yaml.safe_load(response)
-            errs, warnings = self.validate_config(config)
-        except yaml.YAMLError as e:
-            errs = True
-            warnings = [f"Could not create dict using yaml.safe_load(), reconstruct response to be in yaml format: {e}"] 
-        free_window_config = free_text
+        return (yield from self.repair_steps(free_text, response, debug_file_path, timings))
+
+    def repair_config(self, free_text, response, debug_file_path = "", timings=NULL_TIMINGS):
+        """
+        Validate the model's response to free_text, retrying in a continuation of the exchange
+        until it is valid or the retries run out. Returns the config, or None if none was valid.
+        """
+        return run_steps(self.repair_steps(free_text, response, debug_file_path, timings))
+
+    def repair_steps(self, free_text, response, debug_file_path = "", timings=NULL_TIMINGS):
+        """repair_config() as a step generator"""
+        config, errs, warnings = self.parse_response(response, timings)
+        conversation = free_text
         i = 0
         while errs and i < self.num_retries:
-            free_window_config = f"The config {free_text} was provided but the following was invalid. Fix the errors and return the full config: {warnings}"
-            logger.debug(f"Sending retry prompt: {free_window_config}")
-            response = self.model.get_response(free_window_config)
+            timings.increment("retries")
+            if response is not None:
+                # Continue the exchange rather than starting over: the model fixes its own previous
+                # output, and the unchanged prefix can be served from the provider's prompt cache
+                conversation = ModelIO.continuation(conversation, response, self.retry_message.format(warnings=warnings))
+            logger.debug(f"Sending retry for errors: {warnings}")
+            with timings.stage("llm"):
+                response = yield ModelCall(self.model, conversation, use_cache=False)
             if response is None:
                 logger.warning("Did not receive a response from model")
-                errs = True
-            else:
-                if self.debug:
-                    self.write_yaml_to_file(response, debug_file_path)
-                try:
-                    config = yaml.safe_load(response)
-                    errs, warnings = self.validate_config(config)
-                except yaml.YAMLError as e:
-                    errs = True
-                    warnings = [f"Could not create dict using yaml.safe_load(), reconstruct response to be in yaml format: {e}"]         
+            elif self.debug:
+                self.write_yaml_to_file(response, debug_file_path)
+            config, errs, warnings = self.parse_response(response, timings)
             i += 1
         
+        metrics.CONFIG_RETRIES.observe(i)
         if errs:
             logger.error(f"Failed to generate a valid config after {self.num_retries} attempts")
             logger.error(f"Errors: {errs}")
             logger.error(f"Warnings: {warnings}")
-            return {}
+            return None
+        # Only validated responses are cached, keyed on the original description
+        yield CacheStore(self.model, free_text, response)
         return config
 
+    @staticmethod
+    def dedup_key(free_text):
+        """
+        Returns (key, dimensions): descriptions with the same key get the same config apart from
+        width and height, and dimensions is this description's (width, height), or None when it
+        has no "width: W, height: H" fields, in which case only identical descriptions share a key.
+        Only inline sizes repeating those fields are dropped from the key: other sizes, such as
+        per-unit ones, decide the config's area split.
+        """
+        text = " ".join(free_text.lower().split())
+        match = _FIELD_DIMENSIONS.search(text)
+        if match is None:
+            return text, None
+        dimensions = (_number(match.group(1)), _number(match.group(2)))
+
+        def strip_window_size(inline):
+            return "" if (_number(inline.group(1)), _number(inline.group(2))) == dimensions else inline.group(0)
+        rest = _INLINE_DIMENSIONS.sub(strip_window_size, text[:match.start()] + text[match.end():])
+        return " ".join(rest.split()), dimensions
+
+    def generate_configs(self, free_texts: List[str], batch_size=8, max_concurrency=8,
+                         timings=NULL_TIMINGS) -> List[Optional[WindowConfig]]:
+        """
+        Generate configs for many descriptions, returned in the same order (None where none was valid).
+
+        Identical descriptions, and ones differing only in width and height, are generated once
+        and fanned back out with their own dimensions. Unique descriptions go through the
+        shorthand parser and the response cache first; the rest are sent batch_size per model
+        request, with up to max_concurrency requests in flight. Each item is validated on its
+        own, and only invalid items are retried, individually (see repair_config).
+
+        timings (util.timing.StageTimings) records the llm and validate stages, counts
+        deduplicated descriptions and, through repair_config, retries.
+        """
+        groups, dimensions, configs, pending = self.plan_configs(free_texts, timings)
+        batches = [pending[n:n + batch_size] for n in range(0, len(pending), batch_size)]
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(batches) or 1))) as executor:
+            responses = {}
+            for batch, items in zip(batches, executor.map(lambda batch: self.generate_batch(batch, timings), batches)):
+                responses.update(zip(batch, items))
+            # One bad item is retried on its own, continuing from its output in the batch
+            repaired = executor.map(lambda free_text: run_steps(self.batch_item_steps(free_text, responses[free_text], timings)),
+                                    pending)
+            configs.update(zip(pending, repaired))
+        return self.fan_out_configs(free_texts, groups, dimensions, configs)
+
+    async def agenerate_configs(self, free_texts: List[str], batch_size=8, max_concurrency=8,
+                                timings=NULL_TIMINGS) -> List[Optional[WindowConfig]]:
+        """generate_configs() with the model calls awaited, at most max_concurrency at once"""
+        # plan_configs reads the response cache (SQLite), so it runs off the event loop
+        groups, dimensions, configs, pending = await asyncio.to_thread(self.plan_configs, free_texts, timings)
+        batches = [pending[n:n + batch_size] for n in range(0, len(pending), batch_size)]
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def limited(steps):
+            async with semaphore:
+                return await arun_steps(steps)
+        responses = {}
+        batch_items = await asyncio.gather(*(limited(self.batch_steps(batch, timings)) for batch in batches))
+        for batch, items in zip(batches, batch_items):
+            responses.update(zip(batch, items))
+        repaired = await asyncio.gather(*(limited(self.batch_item_steps(free_text, responses[free_text], timings))
+                                          for free_text in pending))
+        configs.update(zip(pending, repaired))
+        return self.fan_out_configs(free_texts, groups, dimensions, configs)
+
+    def batch_item_steps(self, free_text, response, timings=NULL_TIMINGS):
+        """
+        repair_steps() for one item of a batch response. An item the batch left out (response
+        None) first gets its own request, as generate_config would make, before any retries.
+        """
+        if response is None:
+            with timings.stage("llm"):
+                response = yield ModelCall(self.model, free_text)
+        return (yield from self.repair_steps(free_text, response, timings=timings))
+
+    def plan_configs(self, free_texts: List[str], timings=NULL_TIMINGS):
+        """
+        The model-free part of generate_configs(): deduplicate free_texts and try the shorthand
+        parser and the response cache. Returns (groups, dimensions, configs, pending), pending
+        being the unique descriptions that still need the model.
+        """
+        groups = {}  # dedup key -> indexes into free_texts
+        dimensions = []
+        for n, free_text in enumerate(free_texts):
+            key, window_dimensions = self.dedup_key(free_text)
+            groups.setdefault(key, []).append(n)
+            dimensions.append(window_dimensions)
+        timings.increment("deduplicated", len(free_texts) - len(groups))
+        unique = [free_texts[indexes[0]] for indexes in groups.values()]
+
+        configs = {}
+        pending = []
+        for free_text in unique:
+            config = None
+            if self.shorthand_parser is not None:
+                with timings.stage("shorthand"):
+                    config = self.shorthand_parser.parse_config(free_text)
+            if not config:
+                cached = self.model.cached_response(free_text)
+                if cached is not None:
+                    config, _, _ = self.parse_response(cached, timings)
+            if config:
+                configs[free_text] = config
+            else:
+                pending.append(free_text)
+        return groups, dimensions, configs, pending
+
+    @staticmethod
+    def fan_out_configs(free_texts: List[str], groups: Dict, dimensions: List,
+                        configs: Dict) -> List[Optional[WindowConfig]]:
+        """Each description's config, from its group's config with its own width and height"""
+        results = []
+        for indexes in groups.values():
+            config = configs.get(free_texts[indexes[0]])
+            for n in indexes:
+                window_config = config
+                # WindowConfigs are immutable, so the group shares everything but the size
+                if window_config and dimensions[n] is not None:
+                    window_config = window_config._replace(width=dimensions[n][0], height=dimensions[n][1])
+                results.append((n, window_config))
+        return [config for _, config in sorted(results, key=lambda result: result[0])]
+
+    def generate_batch(self, free_texts: List[str], timings=NULL_TIMINGS) -> List:
+        """
+        One model request for several descriptions. Returns each item's output as a single
+        config response would be (YAML or JSON text), or None where the batch had no usable item.
+        """
+        return run_steps(self.batch_steps(free_texts, timings))
+
+    def batch_steps(self, free_texts: List[str], timings=NULL_TIMINGS):
+        """generate_batch() as a step generator"""
+        batch_input = "\n".join(f"item_{n}: {free_text}" for n, free_text in enumerate(free_texts, start=1))
+        with timings.stage("llm"):
+            response = yield ModelCall(self.batch_model, batch_input, use_cache=False)
+        items = {}
+        try:
+            if response is not None and self.output_format == "json":
+                data = json.loads(response)
+                for item in data.get("configs", []) if isinstance(data, dict) else []:
+                    if isinstance(item, dict):
+                        items[f"item_{item.get('item')}"] = json.dumps(item.get("config"))
+            elif response is not None:
+                data = yaml.safe_load(response)
+                configs = data.get("configs") if isinstance(data, dict) else None
+                for key, config in (configs.items() if isinstance(configs, dict) else []):
+                    items[str(key)] = yaml.safe_dump(config, sort_keys=False)
+        except (yaml.YAMLError, ValueError) as e:
+            metrics.VALIDATION_FAILURES.labels(f"{self.output_format}_parse").inc()
+            logger.warning(f"Could not parse batch response, generating its {len(free_texts)} items one by one: {e}")
+        return [items.get(f"item_{n}") for n in range(1, len(free_texts) + 1)]
+
+    def parse_response(self, response, timings=NULL_TIMINGS):
+        """
+        Parse a model response in this generator's output format and validate it.
+
+        Returns:
+            tuple: (config, errors_exist, warnings), config being the WindowConfig, or None if
+            the response isn't valid, and warnings fit to send back to the model
+        """
+        if response is None:
+            return None, True, ["No response was received, return the full config"]
+        try:
+            with timings.stage(f"{self.output_format}_parse"):
+                if self.output_format == "json":
+                    config = schema.config_from_json(json.loads(response))
+                else:
+                    config = yaml.safe_load(response)
+        except yaml.YAMLError as e:
+            metrics.VALIDATION_FAILURES.labels("yaml_parse").inc()
+            return None, True, [f"Could not create dict using yaml.safe_load(), reconstruct response to be in yaml format: {e}"]
+        except ValueError as e:
+            metrics.VALIDATION_FAILURES.labels("json_parse").inc()
+            return None, True, [f"Could not parse the response as JSON, return only JSON matching the schema: {e}"]
+        with timings.stage("validate"):
+            window_config, warnings = self.validate_config(config)
+        return window_config, window_config is None, warnings
+
     def write_yaml_to_file(self, config_string, file_path='window_descriptions.yaml'):
         """
         Write a YAML configuration string directly to a file. For debugging mode only.
@@ -137,8 +464,10 @@ class ValidConfigGenerator:
         
         return cleaned_config
 
-    def validate_config(self, config: str):
-
-        errs, warnings = self.config_validator.validate(config)
-        return errs, warnings
+    def validate_config(self, config: Dict):
+        """(window_config, warnings) from ConfigValidator.parse, counting the failures"""
+        window_config, warnings = self.config_validator.parse(config)
+        for warning in warnings:
+            metrics.VALIDATION_FAILURES.labels(ConfigValidator.error_type(warning)).inc()
+        return window_config, warnings
 
@@ -0,0 +1,430 @@
+import logging
+
+import numpy as np
+
+from util.yaml_util import getOrReturnNoneYaml
+from valid_config_generator.config_model import WindowConfig
+from window_quoter.helper_funcs import calculate_sf, calculate_lf, compile_brackets
+from window_quoter.pricing_catalog import get_pricing_config
+
+logger = logging.getLogger(__name__)
+
+EXTERIOR_NONE = 0
+EXTERIOR_COLOUR = 1
+EXTERIOR_CUSTOM_COLOUR = 2
+EXTERIOR_STAIN = 3
+
+CASING_NONE = 0
+CASING_RATE = 1
+CASING_BRACKETS = 2
+
+
+class BatchQuote:
+    """
+    Result of WindowQuoter.quote_many. All arrays are indexed like the input configs.
+
+    frame, glass and trim are the per-stage subtotals, total is the window price (what
+    quote_window returns) and labour is kept separate as it is in quote_window. Rows that
+    could not be quoted have ok=False, NaN prices and the exception text in errors; rows
+    quoted with an error in their breakdown (e.g. a unit without glass) also have ok=False.
+    """
+
+    def __init__(self, frame, glass, trim, labour, total, ok, errors, breakdowns=None):
+        self.frame = frame
+        self.glass = glass
+        self.trim = trim
+        self.labour = labour
+        self.total = total
+        self.ok = ok
+        self.errors = errors
+        self.breakdowns = breakdowns
+
+    def __len__(self):
+        return len(self.total)
+
+
+class _Fallback(Exception):
+    """Raised while gathering a config the vectorized path doesn't cover; it is quoted by the scalar path instead."""
+
+
+_MISSING = object()
+
+
+class _PricingIndex:
+    """
+    Memoized pricing lookups plus integer ids for the bracket tables and glass prices
+    referenced by a batch. Each distinct key path is resolved against the pricing config once.
+    """
+
+    def __init__(self, pricing_config):
+        self.pricing_config = pricing_config
+        self.tables = []
+        self._table_ids = {}
+        self.glass_prices = []
+        self._glass_ids = {}
+        self._prices = {}
+        self._numbers = {}
+
+    def price(self, *keys):
+        """Same lookup as getOrReturnNoneYaml(pricing_config, ".".join(keys)), memoized."""
+        value = self._prices.get(keys, _MISSING)
+        if value is _MISSING:
+            node = self.pricing_config
+            for key in keys[:-1]:
+                node = node.get(key, {})
+            value = node.get(keys[-1])
+            self._prices[keys] = value
+        return value
+
+    def number(self, *keys):
+        value = self._numbers.get(keys)
+        if value is None:
+            value = self._numbers[keys] = _number(self.price(*keys))
+        return value
+
+    def table_id(self, *keys):
+        brackets = self.price(*keys)
+        if not brackets:
+            raise _Fallback(f"Brackets not found for {'.'.join(keys)}")
+        table_id = self._table_ids.get(id(brackets))
+        if table_id is None:
+            table_id = len(self.tables)
+            self.tables.append(compile_brackets(brackets))
+            self._table_ids[id(brackets)] = table_id
+        return table_id
+
+    def glass_id(self, glass_type, glass_subtype, glass_thickness):
+        key = (glass_type, glass_subtype, glass_thickness)
+        glass_id = self._glass_ids.get(key)
+        if glass_id is None:
+            glass_price_brackets = getOrReturnNoneYaml(self.pricing_config, f"glass.{glass_type}.{glass_subtype}")
+            if glass_price_brackets is None:
+                raise _Fallback(f"Glass pricing not found for {glass_type}.{glass_subtype}")
+            glass_price_unit = None
+            for bracket in glass_price_brackets:
+                if getOrReturnNoneYaml(bracket, 'thickness') == glass_thickness:
+                    glass_price_unit = getOrReturnNoneYaml(bracket, 'price')
+                    break
+            if glass_price_unit is None:
+                raise _Fallback(f"Glass price not found for thickness {glass_thickness}mm")
+            glass_id = len(self.glass_prices)
+            self.glass_prices.append(_number(glass_price_unit))
+            self._glass_ids[key] = glass_id
+        return glass_id
+
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise _Fallback(f"expected a number, got {value!r}")
+    return value
+
+
+def _gather_unit(unit, sf, index):
+    """Pull everything quote_frame/quote_glass need for one UnitConfig, in the order they add it."""
+    unit_type = unit.unit_type
+    area_frac = unit.window_area_frac
+    if unit_type is None or area_frac is None:
+        raise _Fallback("Missing unit_type or window_area_frac")
+    unit_sf = sf * _number(area_frac)
+
+    interior_finish = unit.interior
+    exterior_finish = unit.exterior
+    interior_finish = "white" if interior_finish is None else interior_finish
+    base_finish = 'white' if interior_finish == 'stain' else interior_finish
+    table_id = index.table_id(unit_type, base_finish)
+
+    exterior_mode = EXTERIOR_NONE
+    colour_perc = custom_colour_add_on = exterior_stain = 0.0
+    if exterior_finish == 'colour':
+        exterior_mode = EXTERIOR_COLOUR
+        colour_perc = index.number(unit_type, 'exterior', 'colour_base_perc')
+    elif exterior_finish == 'custom_colour':
+        exterior_mode = EXTERIOR_CUSTOM_COLOUR
+        colour_perc = index.number(unit_type, 'exterior', 'colour_base_perc')
+        custom_colour_add_on = index.number(unit_type, 'exterior', 'custom_colour_add_on')
+    elif exterior_finish == 'stain':
+        stain_cost = index.price(unit_type, 'exterior', 'stain_add_on')
+        if stain_cost is not None:
+            exterior_mode = EXTERIOR_STAIN
+            exterior_stain = _number(stain_cost)
+
+    interior_stain = 0.0
+    if interior_finish == 'stain':
+        stain_cost = index.price(unit_type, 'interior', 'stain_add_on')
+        if stain_cost is not None:
+            interior_stain = _number(stain_cost)
+
+    hardware_costs = []
+    for hardware, incl_bool in unit.hardware:
+        if incl_bool:
+            cost = index.price(unit_type, *hardware.split("."))
+            if cost is not None:
+                hardware_costs.append(_number(cost))
+
+    shape_cost = 0.0
+    extra_costs = []
+    has_shape = False
+    shape = unit.shape
+    if shape is not None and shape.type is not None:
+        has_shape = True
+        shape_cost = index.number('shapes', shape.type)
+        for extra, incl_bool in shape.extras:
+            if incl_bool:
+                extra_costs.append(index.number('shapes', extra))
+
+    glass = unit.glass
+    if glass is None:
+        raise _Fallback("No glass configuration found")
+    glass_id = index.glass_id(glass.type, glass.subtype, glass.thickness_mm)
+    glass_min_sf = index.number('glass', glass.type, 'min_size_sf')
+    glass_shape_add_on = index.number('glass', glass.type, 'shaped_add_on') if has_shape else 0.0
+
+    return (table_id, unit_sf, exterior_mode, colour_perc, custom_colour_add_on, exterior_stain,
+            interior_stain, shape_cost, glass_id, glass_min_sf, glass_shape_add_on,
+            hardware_costs, extra_costs)
+
+
+def _gather(window_config, index):
+    """Flatten one WindowConfig into the values the vectorized pass consumes."""
+    width = _number(window_config.width)
+    height = _number(window_config.height)
+    sf = calculate_sf(width, height)
+    lf = calculate_lf(width, height)
+
+    if window_config.units is None:
+        raise _Fallback("No units configuration found.")
+    gathered_units = [_gather_unit(unit, sf, index) for unit in window_config.units]
+
+    has_brickmould, brickmould_rate = False, 0.0
+    brickmould = window_config.brickmould
+    if brickmould is not None and brickmould.include:
+        has_brickmould = True
+        brickmould_rate = index.number('brickmould', str(brickmould.size), str(brickmould.finish))
+
+    casing_mode, casing_rate, casing_table, bay_bow_extension, plywood_table = CASING_NONE, 0.0, -1, 0.0, -1
+    casing_extension = window_config.casing_extension
+    if casing_extension is not None and casing_extension.type:
+        casing_type = casing_extension.type
+        if casing_type == 'wood_ext':
+            casing_mode = CASING_BRACKETS
+            casing_table = index.table_id('casing_extension', 'wood_ext')
+        else:
+            casing_mode = CASING_RATE
+            casing_rate = index.number('casing_extension', str(casing_type), str(casing_extension.finish))
+        if casing_extension.include_bay_bow_extension:
+            bay_bow_extension = index.number('casing_extension', 'bay_bow_extension')
+        if casing_extension.include_bay_bow_plywood:
+            plywood_table = index.table_id('casing_extension', 'bay_bow_plywood')
+
+    window_row = (sf, lf, has_brickmould, brickmould_rate, casing_mode, casing_rate, casing_table,
+                  bay_bow_extension, plywood_table)
+    return window_row, gathered_units
+
+
+def _lookup_brackets(table, values):
+    """Vectorized BracketTable.lookup using searchsorted on the compiled bounds."""
+    bounds = np.asarray(table.bounds, dtype=np.float64)
+    prices = np.asarray(table.prices, dtype=np.float64)
+    i = np.searchsorted(bounds, values, side='left')
+    in_range = i < len(bounds)
+    if table.overflow_rate > 0:
+        overflow = values * table.overflow_rate
+    else:
+        overflow = np.full_like(values, table.overflow_price, dtype=np.float64)
+    result = np.where(in_range, prices[np.minimum(i, len(bounds) - 1)], overflow)
+    return np.where(values <= 0, 0.0, result)
+
+
+def _lookup_by_table(tables, table_ids, values):
+    """Bracket lookup where each element names its own table; -1 marks no lookup (0.0)."""
+    result = np.zeros(values.shape, dtype=np.float64)
+    for table_id in np.unique(table_ids):
+        if table_id < 0:
+            continue
+        mask = table_ids == table_id
+        result[mask] = _lookup_brackets(tables[table_id], values[mask])
+    return result
+
+
+def _quote_vectorized(window_rows, unit_rows, pricing_config, index):
+    """
+    Price gathered rows with NumPy.
+
+    Terms are added column by column in exactly the order quote_window adds them, so the
+    floating point totals are bit-identical to the scalar path (adding 0.0 for an absent
+    term leaves a sum unchanged).
+    """
+    n = len(window_rows)
+    n_units = max((len(units) for units in unit_rows), default=0)
+
+    (sf, lf, has_brickmould, brickmould_rate, casing_mode, casing_rate, casing_table,
+     bay_bow_extension, plywood_table) = (np.array(column) for column in zip(*window_rows))
+
+    # Scatter the per-unit values into (window, unit slot) arrays in one assignment per column
+    row_idx, slot_idx, flat_units = [], [], []
+    for r, units in enumerate(unit_rows):
+        for u, unit in enumerate(units):
+            row_idx.append(r)
+            slot_idx.append(u)
+            flat_units.append(unit)
+
+    columns = list(zip(*flat_units)) if flat_units else [()] * 13
+
+    def scatter(column, fill=0.0, dtype=np.float64):
+        out = np.full((n, n_units), fill, dtype=dtype)
+        if flat_units:
+            out[row_idx, slot_idx] = column
+        return out
+
+    table_ids = scatter(columns[0], -1, np.int64)
+    unit_sf = scatter(columns[1])
+    exterior_mode = scatter(columns[2], EXTERIOR_NONE, np.int8)
+    colour_perc = scatter(columns[3])
+    custom_colour_add_on = scatter(columns[4])
+    exterior_stain = scatter(columns[5])
+    interior_stain = scatter(columns[6])
+    shape = scatter(columns[7])
+    glass_ids = scatter(columns[8], -1, np.int64)
+    glass_min_sf = scatter(columns[9])
+    glass_shape = scatter(columns[10])
+
+    def scatter_ragged(lists):
+        width = max((len(costs) for costs in lists), default=0)
+        out = np.zeros((n, n_units, width))
+        for r, u, costs in zip(row_idx, slot_idx, lists):
+            if costs:
+                out[r, u, :len(costs)] = costs
+        return out
+
+    hardware = scatter_ragged(columns[11])
+    extras = scatter_ragged(columns[12])
+
+    # Frame: base price from brackets, then masked finish upcharges
+    base = _lookup_by_table(index.tables, table_ids, unit_sf)
+    colour_upcharge = base * colour_perc
+    exterior = np.select(
+        [exterior_mode == EXTERIOR_COLOUR, exterior_mode == EXTERIOR_CUSTOM_COLOUR, exterior_mode == EXTERIOR_STAIN],
+        [colour_upcharge, colour_upcharge + custom_colour_add_on, exterior_stain],
+        0.0)
+
+    frame = np.zeros(n)
+    for u in range(n_units):
+        frame += base[:, u]
+        frame += exterior[:, u]
+        frame += interior_stain[:, u]
+        for h in range(hardware.shape[2]):
+            frame += hardware[:, u, h]
+        frame += shape[:, u]
+        for e in range(extras.shape[2]):
+            frame += extras[:, u, e]
+
+    # Glass: (type, subtype, thickness) resolved to a price table index during gathering
+    glass_price_table = np.asarray(index.glass_prices + [0.0], dtype=np.float64)
+    glass_base = np.where(glass_ids >= 0,
+                          glass_price_table[glass_ids] * np.maximum(unit_sf, glass_min_sf),
+                          0.0)
+
+    total = frame.copy()
+    glass = np.zeros(n)
+    for u in range(n_units):
+        for term in (glass_base[:, u], glass_shape[:, u]):
+            total += term
+            glass += term
+
+    # Trim
+    brickmould = np.where(has_brickmould, lf * brickmould_rate, 0.0)
+    casing = np.where(casing_mode == CASING_RATE, lf * casing_rate,
+                      _lookup_by_table(index.tables, casing_table, lf))
+    plywood = _lookup_by_table(index.tables, plywood_table, lf)
+
+    trim = np.zeros(n)
+    for term in (brickmould, casing, bay_bow_extension.astype(np.float64), plywood):
+        total += term
+        trim += term
+
+    labour_pricing = pricing_config.get("labour")
+    labour = np.maximum(labour_pricing.get("min_sf"), sf) * labour_pricing.get("per_sf_rate")
+
+    return frame, glass, trim, labour, total
+
+
+def _as_model(window_config):
+    if isinstance(window_config, WindowConfig):
+        return window_config
+    try:
+        return WindowConfig.from_dict(window_config)
+    except Exception:
+        return window_config
+
+
+def has_error(price_breakdown):
+    """Whether a quote_window breakdown reports an error, for the window ('Error', 'Error - unit_1') or a unit"""
+    for key, value in price_breakdown.items():
+        if key.startswith('Error') or (isinstance(value, dict) and any(k.startswith('Error') for k in value)):
+            return True
+    return False
+
+
+def quote_many(window_configs, pricing_config_path, include_breakdowns=False):
+    """
+    Quote a batch of validated window configs at once.
+
+    Prices are computed with NumPy and match WindowQuoter.quote_window exactly. Configs the
+    vectorized path doesn't cover (missing pricing, malformed sections) are quoted with the
+    scalar WindowQuoter so behaviour, including error breakdowns, is unchanged.
+
+    Args:
+        window_configs: List of WindowConfigs (as produced by ValidConfigGenerator) or config
+            dicts, which are parsed with WindowConfig.from_dict first.
+        pricing_config_path: Path to pricing.yaml
+        include_breakdowns: Also build the per-window price_breakdown dicts. Skip for bulk runs.
+
+    Returns:
+        BatchQuote
+    """
+    from window_quoter.window_quoter import WindowQuoter
+
+    pricing_config = get_pricing_config(pricing_config_path)
+    index = _PricingIndex(pricing_config)
+    n = len(window_configs)
+
+    # Dicts that don't parse are left as they are; the scalar path reports their error
+    window_configs = [_as_model(window_config) for window_config in window_configs]
+    window_rows, unit_rows, row_positions, fallback_positions = [], [], [], []
+    for i, window_config in enumerate(window_configs):
+        try:
+            window_row, units = _gather(window_config, index)
+            window_rows.append(window_row)
+            unit_rows.append(units)
+            row_positions.append(i)
+        except Exception as e:
+            logger.debug(f"Window {i} quoted with scalar path: {e}")
+            fallback_positions.append(i)
+
+    frame, glass, trim, labour, total = (np.full(n, np.nan) for _ in range(5))
+    ok = np.zeros(n, dtype=bool)
+    errors = [None] * n
+    breakdowns = [None] * n if include_breakdowns else None
+
+    if window_rows:
+        positions = np.asarray(row_positions, dtype=np.int64)
+        (frame[positions], glass[positions], trim[positions],
+         labour[positions], total[positions]) = _quote_vectorized(window_rows, unit_rows, pricing_config, index)
+        ok[positions] = True
+        if include_breakdowns:
+            for i in row_positions:
+                breakdowns[i] = WindowQuoter(window_configs[i], pricing_config_path).quote_window()[1]
+
+    for i in fallback_positions:
+        try:
+            frame[i], glass[i], trim[i], total[i], breakdown = WindowQuoter(
+                window_configs[i], pricing_config_path).quote_stages()
+            labour[i] = breakdown["labour"]
+            ok[i] = not has_error(breakdown)
+            if include_breakdowns:
+                breakdowns[i] = breakdown
+        except Exception as e:
+            frame[i] = glass[i] = trim[i] = labour[i] = total[i] = np.nan
+            errors[i] = str(e)
+
+    return BatchQuote(frame, glass, trim, labour, total, ok, errors, breakdowns)
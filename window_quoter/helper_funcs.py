@@ -1,3 +1,4 @@
+from bisect import bisect_left
 from util.yaml_util import getOrReturnNoneYaml
 # --- Helper Functions --- 
 
@@ -40,6 +41,65 @@ def get_base_price(window_type, finish, pricing_config, sf):
     except Exception as e:
         raise ValueError(f"Error calculating base price: {str(e)}")
 
+class BracketTable:
+    """
+    Pricing brackets compiled into parallel arrays sorted by their max value.
+
+    Lookup is a bisect over `bounds`, which gives the same result as scanning the sorted
+    brackets for the first one where prev_max < value <= max_val.
+    """
+    __slots__ = ('bounds', 'prices', 'overflow_rate', 'overflow_price')
+
+    def __init__(self, yaml_brackets):
+        # Sort brackets by max value (could be max_sf or max_size)
+        sorted_brackets = sorted(yaml_brackets, key=lambda x: x.get('max_sf') or x.get('max_size'))
+        self.bounds = [bracket.get('max_sf') or bracket.get('max_size') for bracket in sorted_brackets]
+        self.prices = [bracket.get('price', 0) for bracket in sorted_brackets]
+
+        last_bracket = sorted_brackets[-1]
+        self.overflow_rate = last_bracket.get('per_sf_rate', 0)
+        self.overflow_price = last_bracket.get('price', 0)
+
+    def lookup(self, value):
+        if value <= 0:
+            return 0
+
+        i = bisect_left(self.bounds, value)
+        if i < len(self.bounds):
+            return self.prices[i]  # Always use fixed price within ranges
+
+        # If value exceeds all ranges, use rate-based pricing from last bracket
+        if self.overflow_rate > 0:
+            return value * self.overflow_rate
+        else:
+            # Fallback to last bracket's price if no rate specified
+            return self.overflow_price
+
+
+# Compiled tables keyed by id() of the source list. The list itself is kept alongside its
+# table so the id can't be reused while the entry is alive.
+_compiled_brackets = {}
+_MAX_COMPILED_BRACKETS = 1024
+
+
+def compile_brackets(yaml_brackets):
+    """
+    Return the BracketTable for a list of YAML bracket dicts, compiling it on first use.
+
+    Bracket lists are treated as immutable once compiled - they come from the shared
+    pricing catalog, which replaces rather than mutates its config on reload.
+    """
+    cached = _compiled_brackets.get(id(yaml_brackets))
+    if cached is not None and cached[0] is yaml_brackets:
+        return cached[1]
+
+    table = BracketTable(yaml_brackets)
+    if len(_compiled_brackets) >= _MAX_COMPILED_BRACKETS:
+        _compiled_brackets.clear()
+    _compiled_brackets[id(yaml_brackets)] = (yaml_brackets, table)
+    return table
+
+
 def calculate_price_from_yaml_brackets(value, yaml_brackets, error_prefix="Price"):
     """
     Calculate price from YAML bracket dictionaries using range-based logic.
@@ -58,30 +118,8 @@ def calculate_price_from_yaml_brackets(value, yaml_brackets, error_prefix="Price
         
         if value <= 0:
             return 0
-        
-        # Sort brackets by max value (could be max_sf or max_size)
-        sorted_brackets = sorted(yaml_brackets, key=lambda x: x.get('max_sf') or x.get('max_size'))
-        
-        prev_max = 0
-        for bracket in sorted_brackets:
-            max_val = bracket.get('max_sf') or bracket.get('max_size')
-            price = bracket.get('price', 0)
-            
-            # Check if value falls in this range: prev_max < value <= max_val
-            if prev_max < value <= max_val:
-                return price  # Always use fixed price within ranges
-            
-            prev_max = max_val
-        
-        # If value exceeds all ranges, use rate-based pricing from last bracket
-        last_bracket = sorted_brackets[-1]
-        per_sf_rate = last_bracket.get('per_sf_rate', 0)
-        
-        if per_sf_rate > 0:
-            return value * per_sf_rate
-        else:
-            # Fallback to last bracket's price if no rate specified
-            return last_bracket.get('price', 0)
+
+        return compile_brackets(yaml_brackets).lookup(value)
         
     except Exception as e:
         raise ValueError(f"Error calculating {error_prefix}: {str(e)}")
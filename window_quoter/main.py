@@ -4,6 +4,7 @@ import os
 import yaml
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from window_quoter.pricing_catalog import DEFAULT_PRICING_CONFIG_PATH
 from window_quoter.window_quoter import WindowQuoter
 from utils import pretty_print_dict
 
@@ -75,8 +76,7 @@ if __name__ == "__main__":
     print(f"Configuration: {yaml.dump(multi_unit_config, default_flow_style=False)}")
     
     # Initialize the quoter
-    pricing_config_path = "valid_config_generator/pricing.yaml"
-    quoter = WindowQuoter(multi_unit_config, pricing_config_path)
+    quoter = WindowQuoter(multi_unit_config, DEFAULT_PRICING_CONFIG_PATH)
     
     # Get the quote
     total_price, breakdown = quoter.quote_window()
@@ -0,0 +1,111 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+
+import yaml
+
+from window_quoter.pricing_snapshot import load_snapshot, load_yaml, snapshot_path
+
+logger = logging.getLogger(__name__)
+
+# The pricing.yaml shipped with the repo, independent of the working directory
+DEFAULT_PRICING_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                           "valid_config_generator", "pricing.yaml")
+
+
+class PricingCatalog:
+    """
+    Process-wide, hot-reloadable view of a pricing.yaml file.
+
+    The file is parsed once and the parsed dict is shared by every WindowQuoter.
+    On access the file's mtime/size is checked (at most every `check_interval`
+    seconds); if it changed, the content hash is compared and the file is re-parsed.
+    A fresh snapshot built by `python -m window_quoter.pricing_snapshot` is loaded
+    instead of parsing the yaml; a stale one is ignored.
+    The new dict is swapped in with a single reference assignment, so callers that
+    already hold a config keep a consistent snapshot for the rest of their quote.
+    """
+
+    _catalogs = {}
+    _catalogs_lock = threading.Lock()
+
+    def __init__(self, pricing_config_path, check_interval=1.0):
+        self.path = os.path.abspath(pricing_config_path)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._config = None
+        self._version = None
+        self._stat_key = None
+        self._last_check = 0.0
+        self._load()
+
+    @classmethod
+    def get_catalog(cls, pricing_config_path, check_interval=1.0):
+        """Return the shared catalog for a pricing file, creating it on first use."""
+        path = os.path.abspath(pricing_config_path)
+        catalog = cls._catalogs.get(path)
+        if catalog is None:
+            with cls._catalogs_lock:
+                catalog = cls._catalogs.get(path)
+                if catalog is None:
+                    catalog = cls(path, check_interval=check_interval)
+                    cls._catalogs[path] = catalog
+        return catalog
+
+    @property
+    def config(self):
+        """The current parsed pricing config. Treat it as read-only."""
+        self._maybe_reload()
+        return self._config
+
+    @property
+    def version(self):
+        """Content hash (sha256) of the pricing file the current config was parsed from."""
+        self._maybe_reload()
+        return self._version
+
+    def _stat(self):
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        with self._lock:
+            if now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+            try:
+                if self._stat() == self._stat_key:
+                    return
+                self._load()
+            except (OSError, yaml.YAMLError) as e:
+                # Keep serving the last good catalog rather than failing quotes mid-edit
+                logger.error(f"Failed to reload pricing config {self.path}, keeping previous version: {e}")
+
+    def _load(self):
+        stat_key = self._stat()
+        with open(self.path, "rb") as file:
+            raw = file.read()
+        version = hashlib.sha256(raw).hexdigest()
+        if version != self._version:
+            config = load_snapshot(snapshot_path(self.path), version)
+            source = "snapshot"
+            if config is None:
+                config = load_yaml(raw)
+                source = "yaml"
+            # Publish the new config before the version so readers never pair a new
+            # version with an old config
+            self._config = config
+            self._version = version
+            logger.info(f"Loaded pricing config {self.path} (version {version[:12]}, from {source})")
+        self._stat_key = stat_key
+        self._last_check = time.monotonic()
+
+
+def get_pricing_config(pricing_config_path):
+    """Return the shared, parsed pricing config for the given pricing.yaml path."""
+    return PricingCatalog.get_catalog(pricing_config_path).config
@@ -0,0 +1,76 @@
+import math
+import random
+import unittest
+
+from benchmarks import corpus
+from benchmarks.corpus import PRICING_CONFIG_PATH
+from window_quoter.window_quoter import WindowQuoter
+
+
+def random_config(rng):
+    """A random config in the shape ValidConfigGenerator produces, with float heights too"""
+    return corpus.random_config(rng, float_heights=True)
+
+
+class TestQuoteMany(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(1234)
+        self.configs = [random_config(rng) for _ in range(500)]
+
+    def test_totals_match_scalar_exactly(self):
+        """Every vectorized total and labour cost is bit-identical to quote_window"""
+        result = WindowQuoter.quote_many(self.configs, PRICING_CONFIG_PATH)
+        self.assertTrue(result.ok.all())
+        for i, config in enumerate(self.configs):
+            price, breakdown = WindowQuoter(config, PRICING_CONFIG_PATH).quote_window()
+            with self.subTest(i=i):
+                self.assertEqual(result.total[i], price)
+                self.assertEqual(result.labour[i], breakdown['labour'])
+
+    def test_stage_subtotals(self):
+        """Frame, glass and trim subtotals match the individual quote stages"""
+        result = WindowQuoter.quote_many(self.configs[:50], PRICING_CONFIG_PATH)
+        for i, config in enumerate(self.configs[:50]):
+            quoter = WindowQuoter(config, PRICING_CONFIG_PATH)
+            with self.subTest(i=i):
+                self.assertEqual(result.frame[i], quoter.quote_frame({}, 0)[0])
+                self.assertAlmostEqual(result.glass[i], quoter.quote_glass({}, 0)[0])
+                self.assertAlmostEqual(result.trim[i], quoter.quote_trim({}, 0)[0])
+
+    def test_breakdowns_optional(self):
+        """Breakdowns are only built on request and match quote_window"""
+        self.assertIsNone(WindowQuoter.quote_many(self.configs[:5], PRICING_CONFIG_PATH).breakdowns)
+        result = WindowQuoter.quote_many(self.configs[:5], PRICING_CONFIG_PATH, include_breakdowns=True)
+        for i, config in enumerate(self.configs[:5]):
+            self.assertEqual(result.breakdowns[i], WindowQuoter(config, PRICING_CONFIG_PATH).quote_window()[1])
+
+    def test_unpriceable_configs_use_scalar_path(self):
+        """Configs with unknown pricing behave exactly like the scalar quoter"""
+        missing_glass = random_config(random.Random(1))
+        missing_glass['units']['unit_1']['glass']['subtype'] = 'not_a_glass'
+        no_units = {'width': 30, 'height': 30}
+        result = WindowQuoter.quote_many([self.configs[0], missing_glass, no_units], PRICING_CONFIG_PATH,
+                                         include_breakdowns=True)
+
+        price, breakdown = WindowQuoter(missing_glass, PRICING_CONFIG_PATH).quote_window()
+        self.assertEqual(result.total[1], price)
+        self.assertEqual(result.breakdowns[1], breakdown)
+        self.assertTrue(result.ok[0])
+        self.assertFalse(result.ok[1])
+        self.assertFalse(result.ok[2])
+        self.assertTrue(math.isnan(result.total[2]) or 'Error' in result.breakdowns[2])
+
+    def test_unit_errors_are_not_ok(self):
+        """A window priced without one of its units is flagged, not counted as a good quote"""
+        no_glass = {'width': 36, 'height': 48,
+                    'units': {'unit_1': {'unit_type': 'casement', 'window_area_frac': 1.0}}}
+        result = WindowQuoter.quote_many([no_glass], PRICING_CONFIG_PATH, include_breakdowns=True)
+        self.assertEqual(result.breakdowns[0]['Error - unit_1'], "No glass configuration found")
+        self.assertFalse(result.ok[0])
+        quoter = WindowQuoter(no_glass, PRICING_CONFIG_PATH)
+        self.assertEqual(result.total[0], quoter.quote_window()[0])
+        self.assertEqual(result.frame[0], quoter.quote_frame({}, 0)[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
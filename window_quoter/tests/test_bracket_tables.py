@@ -0,0 +1,89 @@
+import os
+import unittest
+
+import yaml
+
+from window_quoter.helper_funcs import BracketTable, calculate_price_from_yaml_brackets
+
+PRICING_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                   "valid_config_generator", "pricing.yaml")
+
+
+def legacy_price_from_yaml_brackets(value, yaml_brackets):
+    """The linear-scan implementation the compiled tables replaced, kept as the reference."""
+    if value <= 0:
+        return 0
+    sorted_brackets = sorted(yaml_brackets, key=lambda x: x.get('max_sf') or x.get('max_size'))
+    prev_max = 0
+    for bracket in sorted_brackets:
+        max_val = bracket.get('max_sf') or bracket.get('max_size')
+        price = bracket.get('price', 0)
+        if prev_max < value <= max_val:
+            return price
+        prev_max = max_val
+    last_bracket = sorted_brackets[-1]
+    per_sf_rate = last_bracket.get('per_sf_rate', 0)
+    if per_sf_rate > 0:
+        return value * per_sf_rate
+    return last_bracket.get('price', 0)
+
+
+def find_bracket_lists(node, path=""):
+    """Yield (path, brackets) for every list of max_sf/max_size brackets in the pricing config"""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            yield from find_bracket_lists(value, f"{path}.{key}" if path else str(key))
+    elif isinstance(node, list) and node and all(isinstance(b, dict) for b in node):
+        if all('max_sf' in b or 'max_size' in b for b in node):
+            yield path, node
+
+
+class TestBracketTables(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(PRICING_CONFIG_PATH, "r") as file:
+            cls.pricing_config = yaml.safe_load(file)
+        cls.bracket_lists = list(find_bracket_lists(cls.pricing_config))
+
+    def test_pricing_yaml_has_brackets(self):
+        """Sanity check that the regression test below covers real data"""
+        paths = [path for path, _ in self.bracket_lists]
+        self.assertIn("casement.white", paths)
+        self.assertIn("casing_extension.wood_ext", paths)
+        self.assertIn("casing_extension.bay_bow_plywood", paths)
+
+    def test_matches_legacy_for_every_bracket(self):
+        """Compiled lookup matches the linear scan on, around and between every boundary"""
+        for path, brackets in self.bracket_lists:
+            bounds = sorted(b.get('max_sf') or b.get('max_size') for b in brackets)
+            values = [-1, 0, 0.001, 0.5, 1, 2.5]
+            for bound in bounds:
+                values += [bound - 0.01, bound, bound + 0.01]
+            values += [bounds[-1] * 2, bounds[-1] * 10 + 0.37]
+            for value in values:
+                with self.subTest(path=path, value=value):
+                    self.assertEqual(calculate_price_from_yaml_brackets(value, brackets),
+                                     legacy_price_from_yaml_brackets(value, brackets))
+
+    def test_unsorted_and_overflow(self):
+        """Brackets are sorted on compile and the last bracket's rate applies past the end"""
+        brackets = [
+            {"max_size": 20, "price": 150, "per_sf_rate": 10},
+            {"max_size": 10, "price": 100, "per_sf_rate": 0},
+        ]
+        table = BracketTable(brackets)
+        self.assertEqual(table.lookup(10), 100)
+        self.assertEqual(table.lookup(10.5), 150)
+        self.assertEqual(table.lookup(25), 250)
+
+    def test_errors(self):
+        """Missing and empty bracket lists still raise ValueError"""
+        with self.assertRaises(ValueError):
+            calculate_price_from_yaml_brackets(10, None)
+        with self.assertRaises(ValueError):
+            calculate_price_from_yaml_brackets(10, [])
+        self.assertEqual(calculate_price_from_yaml_brackets(0, []), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+
+import yaml
+
+from window_quoter.pricing_catalog import PricingCatalog
+
+
+class TestPricingCatalog(unittest.TestCase):
+    def setUp(self):
+        self.pricing_conf = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.yaml')
+        yaml.dump({"labour": {"per_sf_rate": 14.5, "min_sf": 9}}, self.pricing_conf)
+        self.pricing_conf.close()
+
+    def tearDown(self):
+        PricingCatalog._catalogs.pop(os.path.abspath(self.pricing_conf.name), None)
+        os.unlink(self.pricing_conf.name)
+
+    def _rewrite(self, config):
+        with open(self.pricing_conf.name, 'w') as file:
+            yaml.dump(config, file)
+        # Force a distinct mtime even on coarse-grained filesystems
+        st = os.stat(self.pricing_conf.name)
+        os.utime(self.pricing_conf.name, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    def test_catalog_is_shared(self):
+        """The same path returns the same catalog and the same parsed config"""
+        first = PricingCatalog.get_catalog(self.pricing_conf.name)
+        second = PricingCatalog.get_catalog(self.pricing_conf.name)
+        self.assertIs(first, second)
+        self.assertIs(first.config, second.config)
+
+    def test_reload_on_change(self):
+        """A changed file is picked up and old snapshots are left untouched"""
+        catalog = PricingCatalog(self.pricing_conf.name, check_interval=0)
+        old_config = catalog.config
+        old_version = catalog.version
+
+        self._rewrite({"labour": {"per_sf_rate": 20.0, "min_sf": 9}})
+
+        self.assertEqual(catalog.config["labour"]["per_sf_rate"], 20.0)
+        self.assertNotEqual(catalog.version, old_version)
+        self.assertEqual(old_config["labour"]["per_sf_rate"], 14.5)
+
+    def test_touch_without_content_change_keeps_config(self):
+        """An mtime-only change does not re-parse the file"""
+        catalog = PricingCatalog(self.pricing_conf.name, check_interval=0)
+        old_config = catalog.config
+
+        self._rewrite({"labour": {"per_sf_rate": 14.5, "min_sf": 9}})
+
+        self.assertIs(catalog.config, old_config)
+
+    def test_invalid_yaml_keeps_previous_config(self):
+        """A broken edit does not replace the last good catalog"""
+        catalog = PricingCatalog(self.pricing_conf.name, check_interval=0)
+        old_config = catalog.config
+
+        with open(self.pricing_conf.name, 'w') as file:
+            file.write("labour: [unclosed\n")
+        st = os.stat(self.pricing_conf.name)
+        os.utime(self.pricing_conf.name, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+        self.assertIs(catalog.config, old_config)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import yaml
+
+from window_quoter import pricing_snapshot
+from window_quoter.pricing_catalog import PricingCatalog
+from window_quoter.pricing_snapshot import build_snapshot, is_fresh, snapshot_path
+
+PRICING_CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "valid_config_generator", "pricing.yaml")
+
+
+class TestPricingSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "pricing.yaml")
+        shutil.copy(PRICING_CONFIG_PATH, self.path)
+        with open(self.path, "rb") as file:
+            self.expected = yaml.safe_load(file)
+
+    def tearDown(self):
+        PricingCatalog._catalogs.pop(os.path.abspath(self.path), None)
+        shutil.rmtree(self.tmp_dir)
+
+    def _load(self):
+        """Load a catalog, failing if it parses the yaml"""
+        with mock.patch("window_quoter.pricing_catalog.load_yaml", side_effect=AssertionError("parsed the yaml")):
+            return PricingCatalog(self.path).config
+
+    def test_fresh_snapshot_is_used(self):
+        self.assertFalse(is_fresh(self.path))
+        self.assertEqual(build_snapshot(self.path), snapshot_path(self.path))
+        self.assertTrue(is_fresh(self.path))
+        self.assertEqual(self._load(), self.expected)
+
+    def test_stale_snapshot_falls_back_to_yaml(self):
+        build_snapshot(self.path)
+        with open(self.path, "a") as file:
+            file.write("\nnew_dealer_surcharge: 25\n")
+        self.assertFalse(is_fresh(self.path))
+        self.assertEqual(PricingCatalog(self.path).config, {**self.expected, "new_dealer_surcharge": 25})
+
+        with mock.patch.object(pricing_snapshot, "INTERPRETER", b"other-interpreter"):
+            build_snapshot(self.path)
+        self.assertEqual(PricingCatalog(self.path).config, {**self.expected, "new_dealer_surcharge": 25})
+
+    def test_corrupt_snapshot_falls_back_to_yaml(self):
+        build_snapshot(self.path)
+        with open(snapshot_path(self.path), "r+b") as file:
+            file.truncate(os.path.getsize(snapshot_path(self.path)) // 2)
+        with self.assertLogs(pricing_snapshot.logger, "WARNING"):
+            self.assertEqual(PricingCatalog(self.path).config, self.expected)
+
+    def test_check_cli(self):
+        with mock.patch("builtins.print"):
+            self.assertEqual(pricing_snapshot.main([self.path, "--check"]), 1)
+            self.assertEqual(pricing_snapshot.main([self.path]), 0)
+            self.assertEqual(pricing_snapshot.main([self.path, "--check"]), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
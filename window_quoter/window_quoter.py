@@ -1,28 +1,32 @@
+from valid_config_generator.config_model import WindowConfig
 from window_quoter.helper_funcs import *
-import yaml
+from window_quoter.pricing_catalog import get_pricing_config
 
 class WindowQuoter:
     def __init__(self, window_config, pricing_config_path):
+        # A WindowConfig (as the config generators return), or a config dict parsed into one here
+        if not isinstance(window_config, WindowConfig):
+            window_config = WindowConfig.from_dict(window_config)
         self.window_config = window_config
-        with open(pricing_config_path, "r") as file:
-            self.pricing_config = yaml.safe_load(file)
+        # Shared across quoters; one snapshot is held for the lifetime of this quote
+        self.pricing_config = get_pricing_config(pricing_config_path)
         
         # Window-level properties
-        self.width = self.window_config.get('width')
-        self.height = self.window_config.get('height')
+        self.width = window_config.width
+        self.height = window_config.height
         self.sf = calculate_sf(self.width, self.height)
         self.lf = calculate_lf(self.width, self.height)
         
-        # Units configuration
-        self.units = getOrReturnNoneYaml(self.window_config, "units")
+        # Units configuration (tuple of UnitConfig)
+        self.units = window_config.units
         
         # Window-scoped configurations (apply to whole window)
-        self.brickmould_config = getOrReturnNoneYaml(self.window_config, "brickmould")
-        if self.brickmould_config is not None and not getOrReturnNoneYaml(self.brickmould_config, "include"):
+        self.brickmould_config = window_config.brickmould
+        if self.brickmould_config is not None and not self.brickmould_config.include:
             self.brickmould_config = None
             
-        self.casing_extension_config = getOrReturnNoneYaml(self.window_config, "casing_extension")
-        if self.casing_extension_config is not None and not getOrReturnNoneYaml(self.casing_extension_config, "type"):
+        self.casing_extension_config = window_config.casing_extension
+        if self.casing_extension_config is not None and not self.casing_extension_config.type:
             self.casing_extension_config = None
 
     def quote_frame(self, price_breakdown = {}, current_price = 0.0):
@@ -38,12 +42,10 @@ class WindowQuoter:
             return 0, price_breakdown
         
         # 2. Process each unit
-        for unit_key, unit_data in self.units.items():
-            if not unit_key.startswith('unit_'):
-                continue
-                
-            unit_type = getOrReturnNoneYaml(unit_data, 'unit_type')
-            area_frac = getOrReturnNoneYaml(unit_data, 'window_area_frac')
+        for unit in self.units:
+            unit_key = unit.key
+            unit_type = unit.unit_type
+            area_frac = unit.window_area_frac
             unit_sf = self.sf * area_frac
             
             if unit_type is None or area_frac is None:
@@ -56,8 +58,8 @@ class WindowQuoter:
             unit_breakdown = price_breakdown[unit_name]
             
             # Unit interior/exterior finishes
-            interior_finish = getOrReturnNoneYaml(unit_data, 'interior') 
-            exterior_finish = getOrReturnNoneYaml(unit_data, 'exterior')
+            interior_finish = unit.interior
+            exterior_finish = unit.exterior
             interior_finish = "white" if interior_finish is None else interior_finish
             
             # 3. Base Price for this unit
@@ -96,31 +98,26 @@ class WindowQuoter:
                     current_price += stain_cost
 
             # 6. Hardware Options for this unit
-            hardware_config = getOrReturnNoneYaml(unit_data, 'hardware')
-            if hardware_config:
-                for hardware, incl_bool in hardware_config.items():
-                    if incl_bool:
-                        cost = getOrReturnNoneYaml(self.pricing_config, f"{unit_type}.{hardware}")
-                        if cost is not None:
-                            unit_breakdown[f"Hardware: {hardware}"] = cost
-                            current_price += cost
+            for hardware, incl_bool in unit.hardware:
+                if incl_bool:
+                    cost = getOrReturnNoneYaml(self.pricing_config, f"{unit_type}.{hardware}")
+                    if cost is not None:
+                        unit_breakdown[f"Hardware: {hardware}"] = cost
+                        current_price += cost
 
             # 7. Shape Add-on for this unit
-            shape_config = getOrReturnNoneYaml(unit_data, 'shapes')
-            if shape_config is not None:
-                shape_type = getOrReturnNoneYaml(shape_config, "type")
+            if unit.shape is not None:
+                shape_type = unit.shape.type
                 if shape_type is not None:
                     shape_cost = getOrReturnNoneYaml(self.pricing_config, f"shapes.{shape_type}")
                     unit_breakdown[f"Shape Add-on: {shape_type}"] = shape_cost
                     current_price += shape_cost
                     
-                    extras = getOrReturnNoneYaml(shape_config, "extras")
-                    if extras:
-                        for extra, incl_bool in extras.items():
-                            if incl_bool:
-                                cost = getOrReturnNoneYaml(self.pricing_config, f"shapes.{extra}")
-                                unit_breakdown[f"Shape Extra: {extra}"] = cost
-                                current_price += cost
+                    for extra, incl_bool in unit.shape.extras:
+                        if incl_bool:
+                            cost = getOrReturnNoneYaml(self.pricing_config, f"shapes.{extra}")
+                            unit_breakdown[f"Shape Extra: {extra}"] = cost
+                            current_price += cost
 
         return current_price, price_breakdown
 
@@ -130,18 +127,16 @@ class WindowQuoter:
             return 0, price_breakdown
         
         # Process glass for each unit
-        for unit_key, unit_data in self.units.items():
-            if not unit_key.startswith('unit_'):
-                continue
-                
-            unit_type = getOrReturnNoneYaml(unit_data, 'unit_type')
-            glass_config = getOrReturnNoneYaml(unit_data, 'glass')
+        for unit in self.units:
+            unit_key = unit.key
+            unit_type = unit.unit_type
+            glass_config = unit.glass
 
             if glass_config is None:
                 price_breakdown[f'Error - {unit_key}'] = "No glass configuration found"
                 continue
                 
-            area_frac = getOrReturnNoneYaml(unit_data, 'window_area_frac')
+            area_frac = unit.window_area_frac
             unit_sf = self.sf * area_frac
             
             # Create or access nested breakdown for this unit
@@ -151,9 +146,7 @@ class WindowQuoter:
                 price_breakdown[unit_name] = {}
             unit_breakdown = price_breakdown[unit_name]
             
-            glass_type = getOrReturnNoneYaml(glass_config, 'type')
-            glass_subtype = getOrReturnNoneYaml(glass_config, 'subtype')
-            glass_thickness = getOrReturnNoneYaml(glass_config, 'thickness_mm')
+            glass_type, glass_subtype, glass_thickness = glass_config
             min_sf = getOrReturnNoneYaml(self.pricing_config, f"glass.{glass_type}.min_size_sf")
             
             # Get the glass price brackets for the specific subtype
@@ -180,8 +173,7 @@ class WindowQuoter:
             unit_breakdown[f"Glass Base Price ({glass_type} {glass_subtype} {glass_thickness}mm)"] = glass_price
             
             # Add shape surcharge if applicable for this unit
-            shape_config = getOrReturnNoneYaml(unit_data, 'shapes')
-            if shape_config is not None and getOrReturnNoneYaml(shape_config, 'type') is not None:
+            if unit.shape is not None and unit.shape.type is not None:
                 shape_add_on = getOrReturnNoneYaml(self.pricing_config, f"glass.{glass_type}.shaped_add_on")
                 current_price += shape_add_on
                 unit_breakdown["Glass Shape Add-on"] = shape_add_on
@@ -190,12 +182,14 @@ class WindowQuoter:
 
     def quote_trim(self, price_breakdown = {}, current_price = 0.0):
         if self.brickmould_config:
-            brickmould_cost = self.lf * getOrReturnNoneYaml(self.pricing_config, f"brickmould.{getOrReturnNoneYaml(self.brickmould_config, 'size')}.{getOrReturnNoneYaml(self.brickmould_config, 'finish')}")
-            price_breakdown[f"Brickmould ({getOrReturnNoneYaml(self.brickmould_config, 'size')}, {getOrReturnNoneYaml(self.brickmould_config, 'finish')})"] = brickmould_cost
+            size, finish = self.brickmould_config.size, self.brickmould_config.finish
+            brickmould_cost = self.lf * getOrReturnNoneYaml(self.pricing_config, f"brickmould.{size}.{finish}")
+            price_breakdown[f"Brickmould ({size}, {finish})"] = brickmould_cost
             current_price += brickmould_cost
 
         if self.casing_extension_config:
-            if getOrReturnNoneYaml(self.casing_extension_config, 'type') == 'wood_ext':
+            casing_type, finish = self.casing_extension_config.type, self.casing_extension_config.finish
+            if casing_type == 'wood_ext':
                 # Get wood extension price brackets
                 wood_ext_brackets = getOrReturnNoneYaml(self.pricing_config, "casing_extension.wood_ext")
                 if wood_ext_brackets is None:
@@ -204,16 +198,16 @@ class WindowQuoter:
                     
                 casing_extension_cost = calculate_price_from_yaml_brackets(self.lf, wood_ext_brackets, "Wood extension")
             else:
-                casing_extension_cost = self.lf * getOrReturnNoneYaml(self.pricing_config, f"casing_extension.{getOrReturnNoneYaml(self.casing_extension_config, 'type')}.{getOrReturnNoneYaml(self.casing_extension_config, 'finish')}")
-            price_breakdown[f"Casing Extension ({getOrReturnNoneYaml(self.casing_extension_config, 'type')}, {getOrReturnNoneYaml(self.casing_extension_config, 'finish')})"] = casing_extension_cost
+                casing_extension_cost = self.lf * getOrReturnNoneYaml(self.pricing_config, f"casing_extension.{casing_type}.{finish}")
+            price_breakdown[f"Casing Extension ({casing_type}, {finish})"] = casing_extension_cost
             current_price += casing_extension_cost
 
-            if getOrReturnNoneYaml(self.casing_extension_config, "include_bay_bow_extension"):
+            if self.casing_extension_config.include_bay_bow_extension:
                 bay_bow_extension_cost = getOrReturnNoneYaml(self.pricing_config, "casing_extension.bay_bow_extension")
                 price_breakdown[f"Bay & Bow Extension"] = bay_bow_extension_cost
                 current_price += bay_bow_extension_cost
 
-            if getOrReturnNoneYaml(self.casing_extension_config, "include_bay_bow_plywood"):
+            if self.casing_extension_config.include_bay_bow_plywood:
                 # Get bay/bow plywood price brackets
                 plywood_brackets = getOrReturnNoneYaml(self.pricing_config, "casing_extension.bay_bow_plywood")
                 if plywood_brackets is None:
@@ -234,15 +228,33 @@ class WindowQuoter:
         return price_breakdown
     
     def quote_window(self):
-        current_price = 0
+        current_price, price_breakdown = self.quote_stages()[3:]
+        return current_price, price_breakdown
+
+    def quote_stages(self):
+        """
+        quote_window() with the price each stage added: (frame, glass, trim, price, price_breakdown).
+        A stage that fails resets the running price, so subtotals only add up for error-free quotes.
+        """
         price_breakdown = {}
 
-        current_price, price_breakdown = self.quote_frame(price_breakdown, current_price)
-        current_price, price_breakdown = self.quote_glass(price_breakdown, current_price)
-        current_price, price_breakdown = self.quote_trim(price_breakdown, current_price)
+        frame_price, price_breakdown = self.quote_frame(price_breakdown, 0)
+        glass_price, price_breakdown = self.quote_glass(price_breakdown, frame_price)
+        current_price, price_breakdown = self.quote_trim(price_breakdown, glass_price)
         price_breakdown = self.quote_labour(price_breakdown) # labour does not get added to window price
 
-        return current_price, price_breakdown
+        return (frame_price, glass_price - frame_price, current_price - glass_price,
+                current_price, price_breakdown)
+
+    @classmethod
+    def quote_many(cls, window_configs, pricing_config_path, include_breakdowns=False):
+        """
+        Vectorized quote over many window configs. Totals match quote_window exactly.
+        See window_quoter.batch_quoter.quote_many.
+        """
+        # NumPy is only needed for batch quoting, keep it out of single-window imports
+        from window_quoter.batch_quoter import quote_many
+        return quote_many(window_configs, pricing_config_path, include_breakdowns=include_breakdowns)
 
 """
                 ## TODO: implement grills, sdl